@@ -5,13 +5,19 @@ Matrix AI Assistant — Multi-page Dash application entry point.
 import os
 import base64
 import dash
-from dash import html, dcc
+import diskcache
+from dash import html, dcc, DiskcacheManager
 import dash_bootstrap_components as dbc
-from flask import request, Response
+from flask import request, Response, jsonify
 from config import COLORS, COMPANY_NAME, CACHE_DIR
 
 # ── Diskcache for background callbacks ──
+# Long-running callbacks (inbox scans, uploads, persona rebuilds, ingests) run
+# in worker processes via this manager so Flask threads stay free.
 os.makedirs(CACHE_DIR, exist_ok=True)
+background_callback_manager = DiskcacheManager(
+    diskcache.Cache(os.path.join(CACHE_DIR, "background"))
+)
 
 # ── App init ──
 app = dash.Dash(
@@ -20,6 +26,7 @@ app = dash.Dash(
     suppress_callback_exceptions=True,
     title=f"{COMPANY_NAME} | Matrix AI Assistant",
     update_title=None,
+    background_callback_manager=background_callback_manager,
     external_stylesheets=[
         dbc.themes.DARKLY,
         dbc.icons.BOOTSTRAP,
@@ -35,6 +42,9 @@ AUTH_PASSWORD = os.getenv("AUTH_PASSWORD", "morpheus")
 
 @server.before_request
 def require_auth():
+    # Health checks come from load balancers / monitors without credentials
+    if request.path == "/health":
+        return
     auth = request.authorization
     if not auth:
         return Response(
@@ -58,6 +68,35 @@ def require_auth():
 import db
 db.init_db()
 
+# ── Prompt templates: load once and check required placeholders ──
+from services import prompt_registry
+for problem in prompt_registry.validate():
+    print(f"Prompt template warning: {problem}")
+
+# ── Morning briefing pre-generation ──
+from services import briefings
+briefings.start_scheduler()
+
+# ── Vector store warm-up (embedding model, collections) off the request path ──
+from services import vector_store, persona_engine
+vector_store.start_warmup(persona_engine.vector_collections() + [vector_store.DOCUMENTS_COLLECTION])
+# Samples not yet in the current vector layout (e.g. after an upgrade) are re-synced in the background
+persona_engine.start_vector_sync()
+# Documents uploaded before the search index existed are indexed in the background
+from services import document_index
+document_index.start_backfill()
+
+
+@server.route("/health")
+def health():
+    """Liveness plus warm-up readiness; never waits for the warm-up."""
+    warmup = vector_store.readiness()
+    return jsonify({
+        "status": "ok",
+        "ready": warmup["state"] in ("ready", "disabled"),
+        "warmup": warmup,
+    })
+
 # ── Import sidebar (must be after page registration) ──
 from components.sidebar import create_sidebar
 
@@ -0,0 +1,53 @@
+"""
+Progress line and cancel button for long-running background callbacks.
+"""
+
+from dash import html, Output
+import dash_bootstrap_components as dbc
+from config import COLORS
+
+CANCEL_STYLE_HIDDEN = {"display": "none", "fontSize": "0.75rem"}
+CANCEL_STYLE_VISIBLE = {"display": "inline-block", "fontSize": "0.75rem"}
+PROGRESS_STYLE_HIDDEN = {"display": "none"}
+PROGRESS_STYLE_VISIBLE = {"display": "block", "marginTop": "8px"}
+
+
+def progress_status(text):
+    """Spinner + message shown while a background job is running."""
+    return html.Span(
+        [
+            dbc.Spinner(size="sm", color="light", spinner_style={"marginRight": "8px"}),
+            text,
+        ],
+        style={"color": COLORS["text_muted"], "fontSize": "0.85rem"},
+    )
+
+
+def cancel_button(button_id):
+    """Cancel button for a background job. Hidden until the job starts."""
+    return dbc.Button(
+        [html.I(className="bi bi-x-circle", style={"marginRight": "6px"}), "Cancel"],
+        id=button_id,
+        size="sm",
+        outline=True,
+        color="danger",
+        style=CANCEL_STYLE_HIDDEN,
+    )
+
+
+def progress_area(progress_id):
+    """Placeholder the job's set_progress() messages are written into."""
+    return html.Div(id=progress_id, style=PROGRESS_STYLE_HIDDEN)
+
+
+def running_controls(cancel_id, progress_id, *button_ids):
+    """`running=` spec for a background callback: reveal the cancel button and
+    progress line while the job runs, and disable the given trigger buttons.
+    """
+    running = [
+        (Output(cancel_id, "style"), CANCEL_STYLE_VISIBLE, CANCEL_STYLE_HIDDEN),
+        (Output(progress_id, "style"), PROGRESS_STYLE_VISIBLE, PROGRESS_STYLE_HIDDEN),
+    ]
+    for button_id in button_ids:
+        running.append((Output(button_id, "disabled"), True, False))
+    return running
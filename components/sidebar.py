@@ -21,6 +21,7 @@ PAGE_ICONS = {
     "Persona": "bi bi-person-bounding-box",
     "Drafts": "bi bi-pencil-square",
     "Setup": "bi bi-gear-fill",
+    "Usage": "bi bi-speedometer2",
 }
 
 
@@ -17,6 +17,53 @@ BRAND_COLOR = "#6C5CE7"
 # ── LLM ──
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = "claude-sonnet-4-20250514"
+ANTHROPIC_FAST_MODEL = os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-5-haiku-20241022")
+
+# Model and output budget per feature. Override per deployment with the
+# "model_routes" setting: {"triage": {"model": "...", "max_tokens": 512}, ...}
+MODEL_ROUTES = {
+    "chat": {"model": ANTHROPIC_MODEL, "max_tokens": 4096},
+    "chat_summary": {"model": ANTHROPIC_FAST_MODEL, "max_tokens": 1024},
+    "triage": {"model": ANTHROPIC_FAST_MODEL, "max_tokens": 1024},
+    "meeting_summary": {"model": ANTHROPIC_MODEL, "max_tokens": 2048},
+    "document_analysis": {"model": ANTHROPIC_MODEL, "max_tokens": 2048},
+    "document_search": {"model": ANTHROPIC_MODEL, "max_tokens": 2048},
+    "daily_priorities": {"model": ANTHROPIC_MODEL, "max_tokens": 1024},
+    "exec_plan": {"model": ANTHROPIC_MODEL, "max_tokens": 2048},
+    "profile_build": {"model": ANTHROPIC_MODEL, "max_tokens": 2048},
+    "persona_reply": {"model": ANTHROPIC_MODEL, "max_tokens": 1024},
+}
+
+# Shared HTTP connection pool for the Anthropic client (one per credential)
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "20"))
+ANTHROPIC_MAX_KEEPALIVE = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE", "10"))
+ANTHROPIC_KEEPALIVE_EXPIRY = float(os.getenv("ANTHROPIC_KEEPALIVE_EXPIRY", "60"))
+ANTHROPIC_TIMEOUT = float(os.getenv("ANTHROPIC_TIMEOUT", "120"))
+ANTHROPIC_CONNECT_TIMEOUT = float(os.getenv("ANTHROPIC_CONNECT_TIMEOUT", "10"))
+# Seconds to trust cached credentials before re-reading them from the DB
+ANTHROPIC_CREDENTIAL_TTL = float(os.getenv("ANTHROPIC_CREDENTIAL_TTL", "60"))
+
+# LLM request scheduler (services/llm_scheduler.py), limits per process
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "80000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))  # seconds
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))  # consecutive failures
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))  # seconds
+# A half-open trial call unsettled after this long is presumed lost and replaced
+LLM_BREAKER_TRIAL_TIMEOUT = float(os.getenv("LLM_BREAKER_TRIAL_TIMEOUT", "300"))  # seconds
+
+# Chat history: recent turns are sent verbatim within a token budget,
+# older turns are folded into a persisted rolling summary
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "8000"))
+CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "10"))
+CHAT_SUMMARY_BATCH_TOKENS = int(os.getenv("CHAT_SUMMARY_BATCH_TOKENS", "12000"))
+
+# Morning briefing pre-generation (daily priorities + executive plan), local time HH:MM
+BRIEFING_PREGEN_ENABLED = os.getenv("BRIEFING_PREGEN_ENABLED", "true").lower() == "true"
+BRIEFING_PREGEN_TIME = os.getenv("BRIEFING_PREGEN_TIME", "07:00")
 
 # ── Paths ──
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +72,57 @@ CACHE_DIR = os.path.join(BASE_DIR, "cache")
 PROMPTS_DIR = os.path.join(BASE_DIR, "prompts")
 UPLOADS_DIR = os.path.join(BASE_DIR, "data", "uploads")
 CHROMA_DIR = os.path.join(BASE_DIR, "data", "chroma")
-EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Vector backend: "chroma", or "numpy" (exact search over a memory-mapped .npy in VECTOR_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+VECTOR_DIR = os.path.join(BASE_DIR, "data", "vectors")
+# numpy backend only: "int8" searches per-vector-scaled int8 codes, then re-ranks the
+# top n_results * VECTOR_RERANK_FACTOR against the float32 vectors kept on disk
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+VECTOR_RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+# Seconds a collection's size stays cached (writes from this process refresh it)
+VECTOR_COUNT_TTL = int(os.getenv("VECTOR_COUNT_TTL", "30"))
+# Load the embedding model and open the persona/document collections on a
+# background thread at startup, so the first draft doesn't pay for it
+VECTOR_WARMUP_ENABLED = os.getenv("VECTOR_WARMUP_ENABLED", "true").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Local sentence-transformers encoding (services/vector_store.py).
+# EMBEDDING_BACKEND: torch, onnx or openvino; EMBEDDING_MODEL_FILE picks a
+# specific (e.g. quantized) export such as onnx/model_qint8_avx512.onnx.
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_MODEL_FILE = os.getenv("EMBEDDING_MODEL_FILE", "")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = library default
+# Backfills of at least EMBEDDING_POOL_MIN texts are encoded across a process pool
+EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", str(os.cpu_count() or 1)))
+EMBEDDING_POOL_MIN = int(os.getenv("EMBEDDING_POOL_MIN", "2000"))
+VECTOR_ADD_BATCH = int(os.getenv("VECTOR_ADD_BATCH", "500"))
+# Rows per page when syncing persona_samples into the vector collection
+PERSONA_SYNC_PAGE = int(os.getenv("PERSONA_SYNC_PAGE", "500"))
+# Hybrid (vector + BM25) retrieval: candidates per retriever, RRF constant,
+# word-shingle Jaccard above which two chunks count as duplicates, and the
+# number of past replies put into each draft prompt
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+HYBRID_DEDUP_THRESHOLD = float(os.getenv("HYBRID_DEDUP_THRESHOLD", "0.8"))
+PERSONA_REPLY_EXAMPLES = int(os.getenv("PERSONA_REPLY_EXAMPLES", "4"))
+# Concurrent Claude calls when drafting replies for a batch of emails
+PERSONA_DRAFT_CONCURRENCY = int(os.getenv("PERSONA_DRAFT_CONCURRENCY", "4"))
+# Document search: chunk size at indexing time and passages sent per query
+DOC_CHUNK_CHARS = int(os.getenv("DOC_CHUNK_CHARS", "1200"))
+DOC_SEARCH_TOP_K = int(os.getenv("DOC_SEARCH_TOP_K", "8"))
+# Bulk uploads: extraction worker processes and concurrent analysis calls
+DOC_EXTRACT_WORKERS = int(os.getenv("DOC_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+DOC_ANALYSIS_CONCURRENCY = int(os.getenv("DOC_ANALYSIS_CONCURRENCY", "3"))
+# Recorded inputs/outputs for offline model-route evaluation (services/model_eval.py)
+EVAL_FIXTURES_DIR = os.path.join(BASE_DIR, "data", "eval")
+MODEL_EVAL_RECORD = os.getenv("MODEL_EVAL_RECORD", "false").lower() == "true"
+
+# ── LLM Response Cache ──
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm_responses")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_SIZE_LIMIT = int(os.getenv("LLM_CACHE_SIZE_LIMIT", str(256 * 1024 * 1024)))  # bytes
 
 # ── Design System ──
 COLORS = {
@@ -2,6 +2,7 @@
 SQLite database layer — schema, init, and helper functions.
 """
 
+import re
 import sqlite3
 import json
 from datetime import datetime, date
@@ -26,6 +27,14 @@ CREATE TABLE IF NOT EXISTS messages (
     FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    conversation_id INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    covered_message_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS tasks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     title TEXT NOT NULL,
@@ -80,6 +89,23 @@ CREATE TABLE IF NOT EXISTS documents (
     uploaded_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
+-- Extracted text per unique file content, shared by every reader
+CREATE TABLE IF NOT EXISTS document_text (
+    content_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    page_offsets TEXT NOT NULL DEFAULT '[]',
+    extracted_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- float32 embedding vectors per (embedding model, text hash); survives rebuilds
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (model, content_hash)
+);
+
 CREATE TABLE IF NOT EXISTS clients (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
@@ -138,6 +164,7 @@ CREATE TABLE IF NOT EXISTS persona_samples (
     content TEXT NOT NULL,
     metadata TEXT DEFAULT '{}',
     embedded_at TEXT,
+    vector_version TEXT DEFAULT '',
     created_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
@@ -189,15 +216,141 @@ CREATE TABLE IF NOT EXISTS calendar_invites (
     created_at TEXT NOT NULL DEFAULT (datetime('now')),
     FOREIGN KEY (draft_id) REFERENCES email_drafts(id) ON DELETE SET NULL
 );
+
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feature TEXT NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    priority TEXT DEFAULT '',
+    prompt_version TEXT DEFAULT '',
+    attempt INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'ok',
+    error_class TEXT DEFAULT '',
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_creation_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    queue_ms REAL DEFAULT 0,
+    latency_ms REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_calls_created ON llm_calls(created_at);
+
+CREATE TABLE IF NOT EXISTS briefings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    briefing_date TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    UNIQUE (kind, briefing_date, fingerprint)
+);
+
+-- Change counters for cached AI context; bumped by the triggers below
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_versions (name) VALUES ('tasks'), ('meetings'), ('emails');
+
+CREATE TRIGGER IF NOT EXISTS tasks_insert_version AFTER INSERT ON tasks
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'tasks';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_update_version AFTER UPDATE ON tasks
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'tasks';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_delete_version AFTER DELETE ON tasks
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'tasks';
+END;
+
+CREATE TRIGGER IF NOT EXISTS meetings_insert_version AFTER INSERT ON meetings
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'meetings';
+END;
+
+CREATE TRIGGER IF NOT EXISTS meetings_update_version AFTER UPDATE ON meetings
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'meetings';
+END;
+
+CREATE TRIGGER IF NOT EXISTS meetings_delete_version AFTER DELETE ON meetings
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'meetings';
+END;
+
+CREATE TRIGGER IF NOT EXISTS emails_insert_version AFTER INSERT ON emails
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'emails';
+END;
+
+CREATE TRIGGER IF NOT EXISTS emails_update_version AFTER UPDATE ON emails
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'emails';
+END;
+
+CREATE TRIGGER IF NOT EXISTS emails_delete_version AFTER DELETE ON emails
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'emails';
+END;
+
+-- Edited samples must be re-embedded
+CREATE TRIGGER IF NOT EXISTS persona_samples_content_update
+AFTER UPDATE OF content, metadata, source_type ON persona_samples
+BEGIN
+    UPDATE persona_samples SET embedded_at = NULL, vector_version = '' WHERE id = NEW.id;
+END;
+
+-- Full-text (BM25) index over persona samples, kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS persona_samples_fts USING fts5(
+    content, content='persona_samples', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS persona_samples_fts_insert AFTER INSERT ON persona_samples
+BEGIN
+    INSERT INTO persona_samples_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS persona_samples_fts_delete AFTER DELETE ON persona_samples
+BEGIN
+    INSERT INTO persona_samples_fts (persona_samples_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS persona_samples_fts_update AFTER UPDATE OF content ON persona_samples
+BEGIN
+    INSERT INTO persona_samples_fts (persona_samples_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO persona_samples_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
 """
 
 
+# Columns added after a table was first created: (table, column, declaration)
+ADDED_COLUMNS = [
+    ("documents", "content_hash", "TEXT DEFAULT ''"),
+    ("persona_samples", "vector_version", "TEXT DEFAULT ''"),
+]
+
+
 def init_db():
     """Initialize the database schema."""
     import os
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     with get_db() as conn:
         conn.executescript(SCHEMA)
+        for table, column, decl in ADDED_COLUMNS:
+            existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        # Samples stored before the full-text index existed
+        indexed = conn.execute("SELECT COUNT(*) FROM persona_samples_fts_docsize").fetchone()[0]
+        if indexed != conn.execute("SELECT COUNT(*) FROM persona_samples").fetchone()[0]:
+            conn.execute("INSERT INTO persona_samples_fts (persona_samples_fts) VALUES ('rebuild')")
 
 
 @contextmanager
@@ -217,6 +370,14 @@ def get_db():
         conn.close()
 
 
+def get_data_versions(*names):
+    """Current change counters for the given tables, as a tuple in argument order."""
+    with get_db() as conn:
+        rows = conn.execute("SELECT name, version FROM data_versions").fetchall()
+        versions = {r["name"]: r["version"] for r in rows}
+        return tuple(versions.get(name, 0) for name in names)
+
+
 # ── Conversations ──
 
 def create_conversation(title="New Conversation"):
@@ -265,15 +426,39 @@ def save_message(conversation_id, role, content):
         )
 
 
-def get_messages(conversation_id):
+def get_messages(conversation_id, after_id=0):
+    """Messages in a conversation, optionally only those newer than after_id."""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT * FROM messages WHERE conversation_id = ? ORDER BY created_at ASC",
-            (conversation_id,),
+            "SELECT * FROM messages WHERE conversation_id = ? AND id > ? ORDER BY created_at ASC, id ASC",
+            (conversation_id, after_id),
         ).fetchall()
         return [dict(r) for r in rows]
 
 
+def get_conversation_summary(conversation_id):
+    """Rolling summary of older turns: {summary, covered_message_id} or None."""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM conversation_summaries WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def save_conversation_summary(conversation_id, summary, covered_message_id):
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO conversation_summaries (conversation_id, summary, covered_message_id)
+               VALUES (?, ?, ?)
+               ON CONFLICT(conversation_id) DO UPDATE SET
+                   summary = excluded.summary,
+                   covered_message_id = excluded.covered_message_id,
+                   updated_at = datetime('now')""",
+            (conversation_id, summary, covered_message_id),
+        )
+
+
 # ── Tasks ──
 
 def create_task(title, description="", priority="medium", due_date=None):
@@ -484,6 +669,34 @@ def get_document(doc_id):
         return dict(row) if row else None
 
 
+def set_document_hash(doc_id, content_hash):
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE documents SET content_hash = ? WHERE id = ?", (content_hash, doc_id)
+        )
+
+
+def get_document_text(content_hash):
+    """Cached extraction for a file hash: {text, page_offsets: [...]} or None."""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM document_text WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+    if not row:
+        return None
+    result = dict(row)
+    result["page_offsets"] = json.loads(result["page_offsets"] or "[]")
+    return result
+
+
+def save_document_text(content_hash, text, page_offsets=None):
+    with get_db() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO document_text (content_hash, text, page_offsets) VALUES (?, ?, ?)",
+            (content_hash, text, json.dumps(page_offsets or [])),
+        )
+
+
 def update_document_analysis(doc_id, ai_analysis):
     with get_db() as conn:
         conn.execute(
@@ -502,6 +715,27 @@ def save_setting(key, value):
         )
 
 
+def claim_setting(key, value, stale_after=None):
+    """Atomically set a setting unless it already holds `value`. Returns True
+    only for the caller that changed it — a once-only guard across processes.
+    With stale_after (seconds), a claim older than that can be taken over,
+    so a holder that died without releasing it doesn't block others forever.
+    """
+    condition = "settings.value IS NOT excluded.value"
+    params = [key, value]
+    if stale_after is not None:
+        condition += " OR settings.updated_at <= datetime('now', ?)"
+        params.append(f"-{int(stale_after)} seconds")
+    with get_db() as conn:
+        cur = conn.execute(
+            "INSERT INTO settings (key, value, updated_at) VALUES (?, ?, datetime('now')) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at "
+            f"WHERE {condition}",
+            params,
+        )
+        return cur.rowcount == 1
+
+
 def get_setting(key, default=None):
     with get_db() as conn:
         row = conn.execute(
@@ -809,25 +1043,100 @@ def get_persona_sample_count_by_source():
         return {row["source_type"]: row["cnt"] for row in rows}
 
 
-def mark_sample_embedded(sample_id):
+def get_samples_to_embed(vector_version, after_id=0, limit=500):
+    """One page of samples whose vector is missing or from another embedding
+    version, in id order.
+    """
     with get_db() as conn:
-        conn.execute(
-            "UPDATE persona_samples SET embedded_at = datetime('now') WHERE id = ?",
-            (sample_id,),
+        rows = conn.execute(
+            "SELECT * FROM persona_samples WHERE id > ? "
+            "AND (embedded_at IS NULL OR vector_version != ?) "
+            "ORDER BY id LIMIT ?",
+            (after_id, vector_version, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def mark_samples_embedded(sample_ids, vector_version):
+    with get_db() as conn:
+        conn.executemany(
+            "UPDATE persona_samples SET embedded_at = datetime('now'), vector_version = ? WHERE id = ?",
+            [(vector_version, sample_id) for sample_id in sample_ids],
         )
 
 
-def get_unembedded_samples():
+def get_persona_sample_sources(sample_ids):
+    """{id: source_type} for those of sample_ids that still exist."""
+    sample_ids = list(sample_ids)
+    found = {}
+    with get_db() as conn:
+        for i in range(0, len(sample_ids), 500):
+            batch = sample_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT id, source_type FROM persona_samples WHERE id IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            found.update((r["id"], r["source_type"]) for r in rows)
+    return found
+
+
+def clear_persona_samples():
+    with get_db() as conn:
+        conn.execute("DELETE FROM persona_samples")
+
+
+def search_persona_samples(query, limit=20, source_types=None, exclude_source_types=None):
+    """Full-text search over persona samples, best BM25 match first.
+    Query words are matched individually (any word), so punctuation is safe.
+    source_types / exclude_source_types: restrict to, or leave out, these
+    sources (None means no restriction; an empty source_types matches nothing).
+    """
+    terms = re.findall(r"\w+", query or "")[:32]
+    if not terms:
+        return []
+    match = " OR ".join(f'"{t}"' for t in terms)
+    source_filter, params = "", [match]
+    if source_types is not None:
+        if not source_types:
+            return []
+        source_filter += f" AND s.source_type IN ({','.join('?' * len(source_types))})"
+        params.extend(source_types)
+    if exclude_source_types:
+        source_filter += f" AND s.source_type NOT IN ({','.join('?' * len(exclude_source_types))})"
+        params.extend(exclude_source_types)
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT * FROM persona_samples WHERE embedded_at IS NULL ORDER BY created_at ASC"
+            "SELECT s.*, bm25(persona_samples_fts) AS rank FROM persona_samples_fts "
+            "JOIN persona_samples s ON s.id = persona_samples_fts.rowid "
+            f"WHERE persona_samples_fts MATCH ?{source_filter} ORDER BY rank LIMIT ?",
+            (*params, limit),
         ).fetchall()
         return [dict(r) for r in rows]
 
 
-def clear_persona_samples():
+def get_cached_embeddings(model, content_hashes):
+    """Stored vector blobs for the given hashes: {content_hash: bytes}."""
+    hashes = list(set(content_hashes))
+    found = {}
     with get_db() as conn:
-        conn.execute("DELETE FROM persona_samples")
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = conn.execute(
+                f"SELECT content_hash, vector FROM embedding_cache WHERE model = ? "
+                f"AND content_hash IN ({','.join('?' * len(batch))})",
+                (model, *batch),
+            ).fetchall()
+            found.update((r["content_hash"], r["vector"]) for r in rows)
+    return found
+
+
+def save_cached_embeddings(model, items):
+    """Store vectors: items is [(content_hash, blob)]."""
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (model, content_hash, vector) VALUES (?, ?, ?)",
+            [(model, h, blob) for h, blob in items],
+        )
 
 
 # ── Email Drafts ──
@@ -844,6 +1153,27 @@ def save_email_draft(email_id, recipient, subject, body, status="pending_review"
         return cur.lastrowid
 
 
+def save_email_drafts(drafts):
+    """Insert several drafts (dicts of save_email_draft's arguments) in one
+    transaction, skipping emails that already have a draft. Returns the number inserted.
+    """
+    with get_db() as conn:
+        before = conn.total_changes
+        conn.executemany(
+            """INSERT INTO email_drafts
+               (email_id, recipient, subject, body, status, confidence_score, category, reasoning, original_body)
+               SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+               WHERE NOT EXISTS (SELECT 1 FROM email_drafts WHERE email_id = ?)""",
+            [
+                (d["email_id"], d["recipient"], d["subject"], d["body"], d.get("status", "pending_review"),
+                 d.get("confidence_score", 0.0), d.get("category", ""), d.get("reasoning", ""),
+                 d.get("original_body", ""), d["email_id"])
+                for d in drafts
+            ],
+        )
+        return conn.total_changes - before
+
+
 def get_email_drafts(status=None, limit=50):
     with get_db() as conn:
         if status:
@@ -941,14 +1271,16 @@ def get_top_emailers(limit=5):
         return [{"sender": r["sender"], "count": r["cnt"]} for r in rows]
 
 
-def is_excluded(email_address):
+def is_excluded(email_address, exclusions=None):
     """Check if an email address matches any exclusion pattern.
     Supports exact match and @domain suffix match.
+    exclusions: rules from get_exclusions(), when checking many addresses.
     """
     if not email_address:
         return False
     email_lower = email_address.strip().lower()
-    exclusions = get_exclusions()
+    if exclusions is None:
+        exclusions = get_exclusions()
     for exc in exclusions:
         pattern = exc["pattern"]
         if pattern.startswith("@"):
@@ -983,3 +1315,93 @@ def get_calendar_invites(limit=50):
             (limit,),
         ).fetchall()
         return [dict(r) for r in rows]
+
+
+# ── LLM Call Telemetry ──
+
+LLM_CALL_FIELDS = (
+    "feature", "model", "priority", "prompt_version", "attempt", "status", "error_class",
+    "input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens",
+    "queue_ms", "latency_ms",
+)
+
+
+def log_llm_call(**fields):
+    """Insert one row into llm_calls. Unknown keys are ignored."""
+    values = {k: fields[k] for k in LLM_CALL_FIELDS if k in fields}
+    columns = ", ".join(values)
+    placeholders = ", ".join("?" for _ in values)
+    with get_db() as conn:
+        conn.execute(
+            f"INSERT INTO llm_calls ({columns}) VALUES ({placeholders})",
+            tuple(values.values()),
+        )
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_llm_call_stats(days=7):
+    """Per-day, per-feature call counts, error counts, p50/p95 latency and
+    token totals for the last `days` days, newest day first.
+    """
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT date(created_at) AS day, feature, status, latency_ms,
+                      input_tokens, output_tokens, cache_creation_tokens, cache_read_tokens
+               FROM llm_calls
+               WHERE created_at >= datetime('now', ?)
+               ORDER BY created_at""",
+            (f"-{int(days)} days",),
+        ).fetchall()
+
+    groups = {}
+    for r in rows:
+        g = groups.setdefault((r["day"], r["feature"]), {
+            "day": r["day"], "feature": r["feature"], "calls": 0, "errors": 0, "latencies": [],
+            "input_tokens": 0, "output_tokens": 0, "cache_creation_tokens": 0, "cache_read_tokens": 0,
+        })
+        g["calls"] += 1
+        if r["status"] != "ok":
+            g["errors"] += 1
+        g["latencies"].append(r["latency_ms"] or 0)
+        for key in ("input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens"):
+            g[key] += r[key] or 0
+
+    stats = []
+    for g in groups.values():
+        latencies = sorted(g.pop("latencies"))
+        g["p50_ms"] = _percentile(latencies, 50)
+        g["p95_ms"] = _percentile(latencies, 95)
+        stats.append(g)
+    stats.sort(key=lambda g: (g["day"], g["calls"]), reverse=True)
+    return stats
+
+
+# ── Briefings (daily priorities / executive plan) ──
+
+def save_briefing(kind, briefing_date, fingerprint, content):
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO briefings (kind, briefing_date, fingerprint, content)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(kind, briefing_date, fingerprint) DO UPDATE SET
+                   content = excluded.content,
+                   created_at = datetime('now')""",
+            (kind, briefing_date, fingerprint, content),
+        )
+
+
+def get_latest_briefing(kind, briefing_date):
+    """Most recently generated briefing of this kind for the date, or None."""
+    with get_db() as conn:
+        row = conn.execute(
+            """SELECT * FROM briefings WHERE kind = ? AND briefing_date = ?
+               ORDER BY created_at DESC, id DESC LIMIT 1""",
+            (kind, briefing_date),
+        ).fetchone()
+        return dict(row) if row else None
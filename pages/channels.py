@@ -10,6 +10,7 @@ from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from config import COLORS
 import db
+from components.job_controls import progress_status, cancel_button, progress_area, running_controls
 
 dash.register_page(__name__, path="/channels", name="Channels", order=10)
 
@@ -135,8 +136,10 @@ def layout():
                                                 f"{counts.get('gmail_sent', 0)} samples",
                                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
                                             ),
+                                            cancel_button("btn-gmail-cancel"),
                                         ],
                                     ),
+                                    progress_area("gmail-progress"),
                                     dcc.Loading(
                                         type="dot", color=COLORS["accent"],
                                         children=[html.Div(id="gmail-status", style={"marginTop": "8px"})],
@@ -194,8 +197,10 @@ def layout():
                                                 f"{counts.get('telegram', 0)} samples",
                                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
                                             ),
+                                            cancel_button("btn-telegram-cancel"),
                                         ],
                                     ),
+                                    progress_area("telegram-progress"),
                                     dcc.Loading(
                                         type="dot", color=COLORS["info"],
                                         children=[html.Div(id="telegram-status", style={"marginTop": "8px"})],
@@ -228,8 +233,10 @@ def layout():
                                                 f"{counts.get('slack', 0)} samples",
                                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
                                             ),
+                                            cancel_button("btn-slack-cancel"),
                                         ],
                                     ),
+                                    progress_area("slack-progress"),
                                     dcc.Loading(
                                         type="dot", color=COLORS["accent"],
                                         children=[html.Div(id="slack-status", style={"marginTop": "8px"})],
@@ -281,8 +288,10 @@ def layout():
                                                 f"{counts.get('whatsapp', 0)} samples",
                                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
                                             ),
+                                            cancel_button("btn-whatsapp-cancel"),
                                         ],
                                     ),
+                                    progress_area("whatsapp-progress"),
                                     dcc.Loading(
                                         type="dot", color=COLORS["success"],
                                         children=[html.Div(id="whatsapp-status", style={"marginTop": "8px"})],
@@ -328,8 +337,10 @@ def layout():
                                                 f"{counts.get('calendar', 0)} samples",
                                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
                                             ),
+                                            cancel_button("btn-calendar-cancel"),
                                         ],
                                     ),
+                                    progress_area("calendar-progress"),
                                     dcc.Loading(
                                         type="dot", color=COLORS["warning"],
                                         children=[html.Div(id="calendar-status", style={"marginTop": "8px"})],
@@ -394,12 +405,17 @@ def layout():
 @callback(
     Output("gmail-status", "children"),
     Input("btn-gmail-ingest", "n_clicks"),
+    background=True,
+    progress=Output("gmail-progress", "children"),
+    running=running_controls("btn-gmail-cancel", "gmail-progress"),
+    cancel=[Input("btn-gmail-cancel", "n_clicks")],
     prevent_initial_call=True,
 )
-def handle_gmail(n_clicks):
+def handle_gmail(set_progress, n_clicks):
     if not n_clicks:
         return no_update
     from services.channel_gmail import ingest
+    set_progress(progress_status("Fetching sent mail over IMAP..."))
     result = ingest()
     if result.get("error"):
         return _status_badge(f"Ingested {result['ingested']} chunks. Error: {result['error']}", "warning")
@@ -413,7 +429,6 @@ def handle_gmail(n_clicks):
     Input("btn-telegram-send-code", "n_clicks"),
     Input("btn-telegram-verify", "n_clicks"),
     Input("btn-telegram-test", "n_clicks"),
-    Input("btn-telegram-ingest", "n_clicks"),
     State("telegram-api-id", "value"),
     State("telegram-api-hash", "value"),
     State("telegram-phone", "value"),
@@ -421,7 +436,7 @@ def handle_gmail(n_clicks):
     State("telegram-auth-state", "data"),
     prevent_initial_call=True,
 )
-def handle_telegram(send_clicks, verify_clicks, test_clicks, ingest_clicks,
+def handle_telegram(send_clicks, verify_clicks, test_clicks,
                     api_id, api_hash, phone, code, auth_state):
     triggered = dash.ctx.triggered_id
     hide = {"display": "none"}
@@ -467,52 +482,81 @@ def handle_telegram(send_clicks, verify_clicks, test_clicks, ingest_clicks,
         color = "success" if ok else "warning"
         return _status_badge(msg, color), hide, "connected" if ok else auth_state
 
-    if triggered == "btn-telegram-ingest" and ingest_clicks:
-        from services.channel_telegram import ingest
-        result = ingest()
-        if result.get("error"):
-            return _status_badge(f"Ingested {result['ingested']}. Error: {result['error']}", "warning"), hide, auth_state
-        return _status_badge(f"Ingested {result['ingested']} message chunks.", "success"), hide, auth_state
-
     return no_update, hide, auth_state
 
 
+# Ingest runs as a background job; the auth steps above stay in the web process
+# because the pending Telethon client lives in module state between them.
+@callback(
+    Output("telegram-status", "children", allow_duplicate=True),
+    Input("btn-telegram-ingest", "n_clicks"),
+    background=True,
+    progress=Output("telegram-progress", "children"),
+    running=running_controls("btn-telegram-cancel", "telegram-progress", "btn-telegram-ingest"),
+    cancel=[Input("btn-telegram-cancel", "n_clicks")],
+    prevent_initial_call=True,
+)
+def ingest_telegram(set_progress, n_clicks):
+    if not n_clicks:
+        return no_update
+    from services.channel_telegram import ingest
+    set_progress(progress_status("Fetching Telegram messages..."))
+    result = ingest()
+    if result.get("error"):
+        return _status_badge(f"Ingested {result['ingested']}. Error: {result['error']}", "warning")
+    return _status_badge(f"Ingested {result['ingested']} message chunks.", "success")
+
+
 @callback(
     Output("slack-status", "children"),
     Input("btn-slack-test", "n_clicks"),
-    Input("btn-slack-ingest", "n_clicks"),
     State("slack-bot-token", "value"),
     prevent_initial_call=True,
 )
-def handle_slack(test_clicks, ingest_clicks, token):
-    triggered = dash.ctx.triggered_id
-
-    if triggered == "btn-slack-test" and test_clicks:
-        if token:
-            db.save_setting("slack_bot_token", str(token).strip())
-        from services.channel_slack import test_connection
-        ok, msg = test_connection()
-        return _status_badge(msg, "success" if ok else "danger")
+def test_slack(n_clicks, token):
+    if not n_clicks:
+        return no_update
+    if token:
+        db.save_setting("slack_bot_token", str(token).strip())
+    from services.channel_slack import test_connection
+    ok, msg = test_connection()
+    return _status_badge(msg, "success" if ok else "danger")
 
-    if triggered == "btn-slack-ingest" and ingest_clicks:
-        if token:
-            db.save_setting("slack_bot_token", str(token).strip())
-        from services.channel_slack import ingest
-        result = ingest()
-        if result.get("error"):
-            return _status_badge(f"Ingested {result['ingested']}. Error: {result['error']}", "warning")
-        return _status_badge(f"Ingested {result['ingested']} message chunks.", "success")
 
-    return no_update
+@callback(
+    Output("slack-status", "children", allow_duplicate=True),
+    Input("btn-slack-ingest", "n_clicks"),
+    State("slack-bot-token", "value"),
+    background=True,
+    progress=Output("slack-progress", "children"),
+    running=running_controls("btn-slack-cancel", "slack-progress", "btn-slack-ingest"),
+    cancel=[Input("btn-slack-cancel", "n_clicks")],
+    prevent_initial_call=True,
+)
+def ingest_slack(set_progress, n_clicks, token):
+    if not n_clicks:
+        return no_update
+    if token:
+        db.save_setting("slack_bot_token", str(token).strip())
+    from services.channel_slack import ingest
+    set_progress(progress_status("Fetching Slack channel history..."))
+    result = ingest()
+    if result.get("error"):
+        return _status_badge(f"Ingested {result['ingested']}. Error: {result['error']}", "warning")
+    return _status_badge(f"Ingested {result['ingested']} message chunks.", "success")
 
 
 @callback(
     Output("whatsapp-status", "children"),
     Input("whatsapp-upload", "contents"),
     State("whatsapp-upload", "filename"),
+    background=True,
+    progress=Output("whatsapp-progress", "children"),
+    running=running_controls("btn-whatsapp-cancel", "whatsapp-progress"),
+    cancel=[Input("btn-whatsapp-cancel", "n_clicks")],
     prevent_initial_call=True,
 )
-def handle_whatsapp(contents, filename):
+def handle_whatsapp(set_progress, contents, filename):
     if not contents:
         return no_update
 
@@ -523,6 +567,7 @@ def handle_whatsapp(contents, filename):
         return _status_badge("Failed to read file.", "danger")
 
     from services.channel_whatsapp import ingest
+    set_progress(progress_status(f"Ingesting {filename}..."))
     result = ingest(decoded)
     if result.get("error"):
         return _status_badge(result["error"], "warning")
@@ -533,9 +578,13 @@ def handle_whatsapp(contents, filename):
     Output("calendar-status", "children"),
     Input("calendar-upload", "contents"),
     State("calendar-upload", "filename"),
+    background=True,
+    progress=Output("calendar-progress", "children"),
+    running=running_controls("btn-calendar-cancel", "calendar-progress"),
+    cancel=[Input("btn-calendar-cancel", "n_clicks")],
     prevent_initial_call=True,
 )
-def handle_calendar(contents, filename):
+def handle_calendar(set_progress, contents, filename):
     if not contents:
         return no_update
 
@@ -546,6 +595,7 @@ def handle_calendar(contents, filename):
         return _status_badge("Failed to read file.", "danger")
 
     from services.channel_calendar import ingest
+    set_progress(progress_status(f"Ingesting {filename}..."))
     result = ingest(decoded)
     if result.get("error"):
         return _status_badge(result["error"], "warning")
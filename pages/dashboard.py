@@ -9,7 +9,11 @@ from datetime import date, datetime
 from config import COLORS, COMPANY_NAME
 import db
 from components.kpi_card import kpi_card
-from services.claude_client import generate_daily_priorities, generate_executive_plan
+from components.job_controls import (
+    progress_status, cancel_button, progress_area, running_controls,
+    PROGRESS_STYLE_VISIBLE, PROGRESS_STYLE_HIDDEN,
+)
+from services import briefings
 
 dash.register_page(__name__, path="/", name="Dashboard", order=1)
 
@@ -28,6 +32,7 @@ def _greeting():
 layout = html.Div(
     children=[
         dcc.Store(id="dashboard-refresh-trigger", data=0),
+        dcc.Store(id="priorities-stale", data=False),
         dcc.Store(id="digest-task-trigger", data=0),
 
         # Hero greeting
@@ -139,6 +144,7 @@ layout = html.Div(
                                     size="sm",
                                     style={"fontSize": "0.75rem", "background": COLORS["warning"], "border": "none", "color": "#1a1a2e", "fontWeight": "700"},
                                 ),
+                                cancel_button("btn-cancel-exec-plan"),
                                 dbc.Button(
                                     [html.I(className="bi bi-x-lg")],
                                     id="btn-dismiss-exec-plan",
@@ -152,6 +158,7 @@ layout = html.Div(
                         ),
                     ],
                 ),
+                progress_area("exec-plan-progress"),
                 dcc.Loading(
                     id="exec-plan-loading",
                     type="dot",
@@ -230,6 +237,7 @@ layout = html.Div(
                                                 ),
                                             ],
                                         ),
+                                        progress_area("priorities-progress"),
                                         html.Div(id="daily-priorities-content"),
                                     ],
                                 ),
@@ -603,29 +611,37 @@ def update_agenda(_):
 @callback(
     Output("exec-plan-content", "children"),
     Input("btn-generate-exec-plan", "n_clicks"),
+    background=True,
+    progress=Output("exec-plan-progress", "children"),
+    running=running_controls("btn-cancel-exec-plan", "exec-plan-progress", "btn-generate-exec-plan"),
+    cancel=[Input("btn-cancel-exec-plan", "n_clicks")],
     prevent_initial_call=True,
 )
-def generate_exec_plan(n_clicks):
+def generate_exec_plan(set_progress, n_clicks):
     if not n_clicks:
         return no_update
 
-    tasks = db.get_tasks()
-    active_tasks = [t for t in tasks if t["status"] not in ("completed", "cancelled")]
-    overdue_tasks = db.get_overdue_tasks()
-    meetings = db.get_todays_meetings()
-    emails = db.get_emails(10)
-
-    if not active_tasks and not meetings and not emails:
+    set_progress(progress_status("Drafting your executive plan..."))
+    plan = briefings.generate_briefing(briefings.EXEC_PLAN, force=True)
+    if plan is None:
         return html.P(
             "No data to build a plan from. Add tasks, log meetings, or scan emails first.",
             style={"color": COLORS["text_muted"], "fontSize": "0.9rem"},
         )
+    return _render_briefing(plan, True, "1.7")
 
-    plan = generate_executive_plan(active_tasks, meetings, emails, overdue_tasks)
-    return dcc.Markdown(
-        plan,
-        style={"color": COLORS["text_secondary"], "fontSize": "0.9rem", "lineHeight": "1.7"},
-    )
+
+@callback(
+    Output("exec-plan-content", "children", allow_duplicate=True),
+    Input("dashboard-refresh-trigger", "data"),
+    prevent_initial_call="initial_duplicate",
+)
+def load_exec_plan(_):
+    """Show today's stored plan (pre-generated in the morning or generated earlier)."""
+    plan, current, _has_data = briefings.get_briefing(briefings.EXEC_PLAN)
+    if plan is None:
+        return no_update
+    return _render_briefing(plan, current, "1.7")
 
 
 @callback(
@@ -672,28 +688,62 @@ def toggle_priorities(dismiss_clicks, show_clicks, is_open):
     return is_open, not is_open
 
 
+def _render_briefing(briefing, current, line_height="1.6"):
+    children = [
+        dcc.Markdown(
+            briefing["content"],
+            style={"color": COLORS["text_secondary"], "fontSize": "0.9rem", "lineHeight": line_height},
+        )
+    ]
+    if not current:
+        children.insert(0, html.P(
+            [html.I(className="bi bi-info-circle", style={"marginRight": "6px"}),
+             "Tasks, meetings or emails changed since this was generated."],
+            style={"color": COLORS["text_muted"], "fontSize": "0.75rem", "marginBottom": "8px"},
+        ))
+    return html.Div(children)
+
+
+_NO_PRIORITIES_DATA = "No data yet. Add tasks, log meetings, or process emails to get AI-generated priorities."
+
+
 @callback(
     Output("daily-priorities-content", "children"),
-    Input("btn-refresh-priorities", "n_clicks"),
+    Output("priorities-stale", "data"),
     Input("dashboard-refresh-trigger", "data"),
 )
-def update_priorities(*_):
-    tasks = db.get_tasks()
-    active_tasks = [t for t in tasks if t["status"] not in ("completed", "cancelled")]
-    meetings = db.get_todays_meetings()
-    emails = db.get_emails(5)
+def update_priorities(_):
+    """Serve the stored briefing instantly; flag a background refresh if inputs changed."""
+    briefing, current, has_data = briefings.get_briefing(briefings.DAILY_PRIORITIES)
+    if not has_data:
+        return html.P(_NO_PRIORITIES_DATA, style={"color": COLORS["text_muted"], "fontSize": "0.9rem"}), False
+    if briefing is None:
+        return None, True
+    return _render_briefing(briefing, current), not current
 
-    if not active_tasks and not meetings and not emails:
-        return html.P(
-            "No data yet. Add tasks, log meetings, or process emails to get AI-generated priorities.",
-            style={"color": COLORS["text_muted"], "fontSize": "0.9rem"},
-        )
 
-    briefing = generate_daily_priorities(active_tasks, meetings, emails)
-    return dcc.Markdown(
-        briefing,
-        style={"color": COLORS["text_secondary"], "fontSize": "0.9rem", "lineHeight": "1.6"},
-    )
+@callback(
+    Output("daily-priorities-content", "children", allow_duplicate=True),
+    Input("priorities-stale", "data"),
+    Input("btn-refresh-priorities", "n_clicks"),
+    background=True,
+    progress=Output("priorities-progress", "children"),
+    running=[
+        (Output("priorities-progress", "style"), PROGRESS_STYLE_VISIBLE, PROGRESS_STYLE_HIDDEN),
+        (Output("btn-refresh-priorities", "disabled"), True, False),
+    ],
+    prevent_initial_call=True,
+)
+def refresh_priorities(set_progress, stale, refresh_clicks):
+    """Regenerate in the background when the fingerprint changed or on request."""
+    forced = ctx.triggered_id == "btn-refresh-priorities"
+    if not forced and not stale:
+        return no_update
+    set_progress(progress_status("Updating priorities..."))
+    briefing = briefings.generate_briefing(briefings.DAILY_PRIORITIES, force=forced)
+    if briefing is None:
+        return html.P(_NO_PRIORITIES_DATA, style={"color": COLORS["text_muted"], "fontSize": "0.9rem"})
+    return _render_briefing(briefing, True)
 
 
 # ── Email digest with "Add to Tasks" ──
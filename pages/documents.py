@@ -5,13 +5,13 @@ Documents page — file upload, AI analysis, document management.
 import dash
 from dash import html, dcc, callback, Input, Output, State, no_update, ctx
 import dash_bootstrap_components as dbc
-import base64
 import os
 import json
-from datetime import datetime
 from config import COLORS, UPLOADS_DIR
 import db
-from services.claude_client import analyze_document, search_documents
+from components.job_controls import progress_status, cancel_button, progress_area, running_controls
+from services.claude_client import search_documents
+from services import document_index, document_pipeline, document_text
 
 dash.register_page(__name__, path="/documents", name="Documents", order=5)
 
@@ -24,20 +24,6 @@ def _file_ext(filename):
     return os.path.splitext(filename)[1].lower() if filename else ""
 
 
-def _extract_pdf_text(filepath):
-    """Extract text from a PDF file using pymupdf."""
-    try:
-        import fitz  # pymupdf
-        doc = fitz.open(filepath)
-        pages = []
-        for page in doc:
-            pages.append(page.get_text())
-        doc.close()
-        return "\n\n".join(pages)
-    except Exception as e:
-        return f"[PDF text extraction failed: {str(e)}]"
-
-
 def _format_size(size_bytes):
     if size_bytes < 1024:
         return f"{size_bytes} B"
@@ -75,13 +61,13 @@ layout = html.Div(
                 "borderLeft": f"4px solid {COLORS['accent']}",
             },
             children=[
-                html.H4("Upload Document", style={"color": COLORS["text_primary"], "marginBottom": "16px"}),
+                html.H4("Upload Documents", style={"color": COLORS["text_primary"], "marginBottom": "16px"}),
                 dcc.Upload(
                     id="doc-upload",
                     children=html.Div(
                         [
                             html.I(className="bi bi-cloud-arrow-up", style={"fontSize": "2rem", "color": COLORS["accent"], "marginBottom": "8px"}),
-                            html.P("Drag & drop a file here, or click to select", style={"color": COLORS["text_secondary"], "margin": "0 0 4px 0"}),
+                            html.P("Drag & drop files here, or click to select", style={"color": COLORS["text_secondary"], "margin": "0 0 4px 0"}),
                             html.P(
                                 "Supports: .txt, .md, .csv, .json, .pdf",
                                 style={"color": COLORS["text_muted"], "fontSize": "0.8rem", "margin": 0},
@@ -96,7 +82,14 @@ layout = html.Div(
                         "cursor": "pointer",
                         "background": COLORS["body_bg"],
                     },
-                    multiple=False,
+                    multiple=True,
+                ),
+                html.Div(
+                    style={"display": "flex", "alignItems": "center", "gap": "12px"},
+                    children=[
+                        progress_area("doc-upload-progress"),
+                        html.Div(cancel_button("doc-upload-cancel-btn"), style={"marginTop": "8px"}),
+                    ],
                 ),
                 html.Div(id="doc-upload-status", style={"marginTop": "16px"}),
             ],
@@ -164,79 +157,94 @@ layout = html.Div(
     Output("doc-list", "children", allow_duplicate=True),
     Input("doc-upload", "contents"),
     State("doc-upload", "filename"),
+    background=True,
+    progress=Output("doc-upload-progress", "children"),
+    running=running_controls("doc-upload-cancel-btn", "doc-upload-progress", "doc-upload"),
+    cancel=[Input("doc-upload-cancel-btn", "n_clicks")],
     prevent_initial_call=True,
 )
-def handle_upload(contents, filename):
-    if not contents or not filename:
+def handle_upload(set_progress, contents, filenames):
+    if not contents or not filenames:
         return no_update, no_update
-
-    ext = _file_ext(filename)
-    if ext not in ALLOWED_EXTENSIONS:
+    if isinstance(contents, str):
+        contents, filenames = [contents], [filenames]
+
+    files, rejected = [], []
+    for content, filename in zip(contents, filenames):
+        ext = _file_ext(filename)
+        if ext in ALLOWED_EXTENSIONS:
+            files.append((filename, content, ext))
+        else:
+            rejected.append(filename)
+
+    if not files:
         return html.P(
-            f"Unsupported file type: {ext}. Please upload .txt, .md, .csv, .json, or .pdf files.",
+            f"Unsupported file type: {', '.join(rejected)}. Please upload .txt, .md, .csv, .json, or .pdf files.",
             style={"color": COLORS["danger"], "fontSize": "0.9rem"},
         ), no_update
 
-    # Decode base64 content
-    try:
-        content_type, content_string = contents.split(",", 1)
-        decoded = base64.b64decode(content_string)
-    except Exception:
-        return html.P(
-            "Error decoding file. Please try again.",
-            style={"color": COLORS["danger"], "fontSize": "0.9rem"},
-        ), no_update
+    set_progress(progress_status(f"Processing {len(files)} file{'s' if len(files) != 1 else ''}..."))
+    states = document_pipeline.process_uploads(
+        files, on_progress=lambda states: set_progress(_render_file_progress(states))
+    )
+    return _render_upload_summary(states, rejected), _render_doc_list()
 
-    # Save file to disk
-    safe_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-    filepath = os.path.join(UPLOADS_DIR, safe_name)
-    with open(filepath, "wb") as f:
-        f.write(decoded)
 
-    file_size = len(decoded)
+_FILE_STATUS = {
+    document_pipeline.QUEUED: ("bi bi-hourglass", "text_muted", "Queued"),
+    document_pipeline.EXTRACTING: ("bi bi-file-earmark-text", "text_muted", "Extracting text"),
+    document_pipeline.INDEXING: ("bi bi-search", "info", "Indexing for search"),
+    document_pipeline.ANALYZING: ("bi bi-stars", "accent", "Analyzing with AI"),
+    document_pipeline.DONE: ("bi bi-check-circle", "success", "Uploaded & analyzed"),
+    document_pipeline.FAILED: ("bi bi-exclamation-triangle", "danger", "Failed"),
+}
 
-    # Save to database
-    doc_id = db.save_document(
-        filename=filename,
-        filepath=filepath,
-        file_type=ext,
-        file_size=file_size,
+
+def _file_status_row(state):
+    icon, color, label = _FILE_STATUS[state["status"]]
+    return html.Div(
+        style={"display": "flex", "alignItems": "center", "gap": "8px", "padding": "2px 0"},
+        children=[
+            html.I(className=icon, style={"color": COLORS[color]}),
+            html.Span(state["filename"], style={"color": COLORS["text_primary"], "fontSize": "0.85rem"}),
+            html.Span(
+                f"{label}: {state['error']}" if state["error"] else label,
+                style={"color": COLORS[color], "fontSize": "0.8rem"},
+            ),
+            html.Span(
+                _format_size(state["file_size"]) if state["file_size"] else "",
+                style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
+            ),
+        ],
     )
 
-    # Read text content for analysis
-    text_content = ""
-    if ext in (".txt", ".md", ".csv", ".json"):
-        try:
-            text_content = decoded.decode("utf-8", errors="replace")
-        except Exception:
-            text_content = "[Could not decode file content]"
-    elif ext == ".pdf":
-        text_content = _extract_pdf_text(filepath)
-        if not text_content.strip():
-            text_content = f"[PDF file: {filename}, {_format_size(file_size)}. No extractable text found.]"
-
-    # Run AI analysis
-    if text_content:
-        result = analyze_document(filename, text_content)
-        analysis_json = json.dumps(result, indent=2)
-        db.update_document_analysis(doc_id, analysis_json)
-
-    status = html.Div(
+
+def _render_file_progress(states):
+    finished = sum(s["status"] in (document_pipeline.DONE, document_pipeline.FAILED) for s in states)
+    return html.Div([
+        progress_status(f"{finished} of {len(states)} files processed"),
+        html.Div([_file_status_row(s) for s in states], style={"marginTop": "8px"}),
+    ])
+
+
+def _render_upload_summary(states, rejected=()):
+    failed = any(s["status"] == document_pipeline.FAILED for s in states) or rejected
+    rows = [_file_status_row(s) for s in states]
+    for filename in rejected:
+        rows.append(_file_status_row({
+            "filename": filename, "status": document_pipeline.FAILED, "file_size": 0,
+            "error": f"unsupported file type {_file_ext(filename) or '(none)'}",
+        }))
+    return html.Div(
         style={
             "background": COLORS["body_bg"],
             "borderRadius": "8px",
             "padding": "12px 16px",
-            "borderLeft": f"4px solid {COLORS['success']}",
+            "borderLeft": f"4px solid {COLORS['warning'] if failed else COLORS['success']}",
         },
-        children=[
-            html.Span("Uploaded & analyzed: ", style={"color": COLORS["success"], "fontSize": "0.9rem", "fontWeight": "600"}),
-            html.Span(filename, style={"color": COLORS["text_primary"], "fontSize": "0.9rem"}),
-            html.Span(f" ({_format_size(file_size)})", style={"color": COLORS["text_muted"], "fontSize": "0.85rem", "marginLeft": "8px"}),
-        ],
+        children=rows,
     )
 
-    return status, _render_doc_list()
-
 
 @callback(
     Output("doc-list", "children"),
@@ -278,27 +286,15 @@ def handle_search(n_clicks, query):
     if not docs:
         return html.P("No documents uploaded yet. Upload files first, then search.", style={"color": COLORS["warning"], "fontSize": "0.9rem"})
 
-    # Load content for each document
-    doc_data = []
-    for d in docs:
-        content = ""
-        if d.get("filepath") and os.path.exists(d["filepath"]):
-            ext = d.get("file_type", "")
-            if ext in (".txt", ".md", ".csv", ".json"):
-                try:
-                    with open(d["filepath"], "r", errors="replace") as f:
-                        content = f.read(50000)
-                except Exception:
-                    pass
-            elif ext == ".pdf":
-                content = _extract_pdf_text(d["filepath"])[:50000]
-        doc_data.append({
-            "filename": d["filename"],
-            "content": content,
-            "ai_analysis": d.get("ai_analysis", ""),
-        })
-
-    result = search_documents(query.strip(), doc_data)
+    # Retrieve only the best-matching passages (older documents are indexed
+    # by the startup backfill, new uploads by the upload pipeline)
+    try:
+        passages = document_index.search(query.strip())
+    except Exception as e:
+        return html.P(f"Search index unavailable: {e}", style={"color": COLORS["danger"], "fontSize": "0.9rem"})
+
+    result = search_documents(query.strip(), passages)
+    doc_count = len({p["doc_id"] for p in passages})
 
     return html.Div(
         style={
@@ -313,7 +309,11 @@ def handle_search(n_clicks, query):
                 children=[
                     html.I(className="bi bi-stars", style={"color": COLORS["info"]}),
                     html.Span("Search Results", style={"color": COLORS["info"], "fontSize": "0.85rem", "fontWeight": "600"}),
-                    html.Span(f"— {len(doc_data)} document{'s' if len(doc_data) != 1 else ''} scanned", style={"color": COLORS["text_muted"], "fontSize": "0.8rem"}),
+                    html.Span(
+                        f"— {len(passages)} passage{'s' if len(passages) != 1 else ''} from "
+                        f"{doc_count} document{'s' if doc_count != 1 else ''}",
+                        style={"color": COLORS["text_muted"], "fontSize": "0.8rem"},
+                    ),
                 ],
             ),
             dcc.Markdown(
@@ -540,43 +540,40 @@ def _render_doc_detail(doc):
             )
         )
 
-    # Raw content preview
+    # Raw content preview (from the stored extraction, PDFs included)
     if doc.get("filepath") and os.path.exists(doc["filepath"]):
-        ext = doc["file_type"]
-        if ext in (".txt", ".md", ".csv", ".json"):
-            try:
-                with open(doc["filepath"], "r", errors="replace") as f:
-                    raw_preview = f.read(5000)
-                if len(raw_preview) >= 5000:
-                    raw_preview += "\n\n[... truncated ...]"
-                children.append(
-                    html.Div(
-                        style={
-                            "background": COLORS["card_bg"],
-                            "borderRadius": "12px",
-                            "padding": "24px",
-                            "marginTop": "16px",
-                            "borderLeft": f"4px solid {COLORS['border']}",
-                        },
-                        children=[
-                            html.H4("Raw Content Preview", style={"color": COLORS["text_secondary"], "marginBottom": "12px"}),
-                            html.Pre(
-                                raw_preview,
-                                style={
-                                    "color": COLORS["text_secondary"],
-                                    "background": COLORS["body_bg"],
-                                    "padding": "16px",
-                                    "borderRadius": "8px",
-                                    "whiteSpace": "pre-wrap",
-                                    "fontSize": "0.8rem",
-                                    "maxHeight": "400px",
-                                    "overflowY": "auto",
-                                },
-                            ),
-                        ],
-                    )
+        try:
+            raw_preview = document_text.get_text(doc)[:5000]
+            if len(raw_preview) >= 5000:
+                raw_preview += "\n\n[... truncated ...]"
+            children.append(
+                html.Div(
+                    style={
+                        "background": COLORS["card_bg"],
+                        "borderRadius": "12px",
+                        "padding": "24px",
+                        "marginTop": "16px",
+                        "borderLeft": f"4px solid {COLORS['border']}",
+                    },
+                    children=[
+                        html.H4("Raw Content Preview", style={"color": COLORS["text_secondary"], "marginBottom": "12px"}),
+                        html.Pre(
+                            raw_preview,
+                            style={
+                                "color": COLORS["text_secondary"],
+                                "background": COLORS["body_bg"],
+                                "padding": "16px",
+                                "borderRadius": "8px",
+                                "whiteSpace": "pre-wrap",
+                                "fontSize": "0.8rem",
+                                "maxHeight": "400px",
+                                "overflowY": "auto",
+                            },
+                        ),
+                    ],
                 )
-            except Exception:
-                pass
+            )
+        except Exception:
+            pass
 
     return html.Div(children)
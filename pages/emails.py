@@ -8,6 +8,7 @@ import dash_bootstrap_components as dbc
 import json
 from config import COLORS
 import db
+from components.job_controls import progress_status, cancel_button, progress_area, running_controls
 from services.email_ingestion import scan_and_process_inbox
 
 dash.register_page(__name__, path="/emails", name="Emails", order=6)
@@ -78,11 +79,13 @@ layout = html.Div(
                             color="primary",
                             style={"background": COLORS["accent"], "border": "none"},
                         ),
+                        cancel_button("emails-scan-cancel-btn"),
                     ],
                 ),
             ],
         ),
-        # Scan result banner
+        # Scan progress + result banner
+        progress_area("emails-scan-progress"),
         html.Div(id="emails-scan-banner"),
         # Filter buttons
         html.Div(
@@ -120,9 +123,13 @@ def update_connection_status(*_):
     Output("emails-scan-banner", "children"),
     Output("emails-scan-result", "data"),
     Input("emails-scan-btn", "n_clicks"),
+    background=True,
+    progress=Output("emails-scan-progress", "children"),
+    running=running_controls("emails-scan-cancel-btn", "emails-scan-progress", "emails-scan-btn"),
+    cancel=[Input("emails-scan-cancel-btn", "n_clicks")],
     prevent_initial_call=True,
 )
-def scan_inbox(n_clicks):
+def scan_inbox(set_progress, n_clicks):
     if not n_clicks:
         return no_update, no_update
 
@@ -154,7 +161,10 @@ def scan_inbox(n_clicks):
             ],
         ), dash.no_update
 
-    summary = scan_and_process_inbox()
+    set_progress(progress_status("Fetching new emails..."))
+    summary = scan_and_process_inbox(
+        progress=lambda done, total: set_progress(progress_status(f"Processing email {done + 1} of {total}..."))
+    )
 
     if summary["fetched"] == 0:
         banner = html.Div(
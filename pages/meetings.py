@@ -10,6 +10,7 @@ import calendar
 from config import COLORS
 import db
 from services.claude_client import summarize_meeting
+from components.job_controls import cancel_button, progress_area, progress_status, running_controls
 
 dash.register_page(__name__, path="/meetings", name="Meetings", order=4)
 
@@ -201,6 +202,10 @@ layout = html.Div(children=[
         html.Div(id="day-meetings-list"),
 
         # Meeting detail panel
+        html.Div(style={"display": "flex", "alignItems": "center", "gap": "8px"}, children=[
+            progress_area("meeting-detail-progress"),
+            cancel_button("btn-cancel-meeting-detail"),
+        ]),
         html.Div(id="meeting-detail"),
     ]),
 ])
@@ -383,64 +388,81 @@ def save_meeting(n, title, meeting_date, notes):
     return "", "", datetime.now().timestamp()
 
 
-# 7. Meeting detail actions (view / summarize)
+# 7. Meeting detail actions: view is instant, summarize calls Claude as a background job
 @callback(
     Output("meeting-detail", "children"),
     Output("meetings-selected-id", "data"),
     Input({"type": "meeting-view-btn", "index": ALL}, "n_clicks"),
-    Input({"type": "meeting-summarize-btn", "index": ALL}, "n_clicks"),
     prevent_initial_call=True,
 )
-def meeting_detail_actions(view_clicks, summarize_clicks):
+def view_meeting(view_clicks):
     if not ctx.triggered_id:
         return no_update, no_update
 
     meeting_id = ctx.triggered_id["index"]
-    action_type = ctx.triggered_id["type"]
-
     meeting = db.get_meeting(meeting_id)
     if not meeting:
         return html.P("Meeting not found.", style={"color": COLORS["danger"]}), no_update
+    return _render_meeting_detail(meeting), meeting_id
 
-    # Handle summarize
-    if action_type == "meeting-summarize-btn":
-        if meeting["raw_notes"]:
-            result = summarize_meeting(meeting["raw_notes"])
-            summary_text = result.get("summary", "No summary generated.")
-            decisions = result.get("key_decisions", [])
-            action_items = result.get("action_items", [])
-
-            full_summary = f"**Summary:** {summary_text}\n\n"
-            if decisions:
-                full_summary += "**Key Decisions:**\n"
-                for d in decisions:
-                    full_summary += f"- {d}\n"
-                full_summary += "\n"
-            if action_items:
-                full_summary += "**Action Items:**\n"
-                for ai in action_items:
-                    owner = f" ({ai.get('owner', '')})" if ai.get("owner") else ""
-                    due = f" — due {ai['due_date']}" if ai.get("due_date") else ""
-                    full_summary += f"- {ai['description']}{owner}{due}\n"
-
-            db.update_meeting_summary(meeting_id, full_summary)
 
-            for ai in action_items:
-                task_id = db.create_task(
-                    title=ai["description"][:100],
-                    description=f"From meeting: {meeting['title']}\n{ai['description']}",
-                    priority="high",
-                    due_date=ai.get("due_date"),
-                )
-                db.save_action_item(
-                    meeting_id=meeting_id,
-                    description=ai["description"],
-                    owner=ai.get("owner", ""),
-                    due_date=ai.get("due_date"),
-                    task_id=task_id,
-                )
+@callback(
+    Output("meeting-detail", "children", allow_duplicate=True),
+    Output("meetings-selected-id", "data", allow_duplicate=True),
+    Input({"type": "meeting-summarize-btn", "index": ALL}, "n_clicks"),
+    background=True,
+    progress=Output("meeting-detail-progress", "children"),
+    running=running_controls("btn-cancel-meeting-detail", "meeting-detail-progress"),
+    cancel=[Input("btn-cancel-meeting-detail", "n_clicks")],
+    prevent_initial_call=True,
+)
+def summarize_meeting_notes(set_progress, summarize_clicks):
+    if not ctx.triggered_id or not any(summarize_clicks):
+        return no_update, no_update
 
-            meeting = db.get_meeting(meeting_id)
+    meeting_id = ctx.triggered_id["index"]
+    meeting = db.get_meeting(meeting_id)
+    if not meeting:
+        return html.P("Meeting not found.", style={"color": COLORS["danger"]}), no_update
+
+    if meeting["raw_notes"]:
+        set_progress(progress_status("Summarizing meeting notes..."))
+        result = summarize_meeting(meeting["raw_notes"])
+        summary_text = result.get("summary", "No summary generated.")
+        decisions = result.get("key_decisions", [])
+        action_items = result.get("action_items", [])
+
+        full_summary = f"**Summary:** {summary_text}\n\n"
+        if decisions:
+            full_summary += "**Key Decisions:**\n"
+            for d in decisions:
+                full_summary += f"- {d}\n"
+            full_summary += "\n"
+        if action_items:
+            full_summary += "**Action Items:**\n"
+            for ai in action_items:
+                owner = f" ({ai.get('owner', '')})" if ai.get("owner") else ""
+                due = f" — due {ai['due_date']}" if ai.get("due_date") else ""
+                full_summary += f"- {ai['description']}{owner}{due}\n"
+
+        db.update_meeting_summary(meeting_id, full_summary)
+
+        for ai in action_items:
+            task_id = db.create_task(
+                title=ai["description"][:100],
+                description=f"From meeting: {meeting['title']}\n{ai['description']}",
+                priority="high",
+                due_date=ai.get("due_date"),
+            )
+            db.save_action_item(
+                meeting_id=meeting_id,
+                description=ai["description"],
+                owner=ai.get("owner", ""),
+                due_date=ai.get("due_date"),
+                task_id=task_id,
+            )
+
+        meeting = db.get_meeting(meeting_id)
 
     return _render_meeting_detail(meeting), meeting_id
 
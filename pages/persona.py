@@ -10,6 +10,7 @@ import dash_bootstrap_components as dbc
 from config import COLORS
 import db
 from components.kpi_card import kpi_card
+from components.job_controls import progress_status, cancel_button, progress_area, running_controls
 
 dash.register_page(__name__, path="/persona", name="Persona", order=12)
 
@@ -22,8 +23,8 @@ def layout():
     profile = json.loads(profile_json) if profile_json else None
 
     try:
-        from services.vector_store import get_count
-        vector_count = get_count()
+        from services.persona_engine import get_vector_count
+        vector_count = get_vector_count()
     except Exception:
         vector_count = 0
 
@@ -110,15 +111,22 @@ def layout():
                                         style={"display": "flex", "justifyContent": "space-between", "alignItems": "center", "marginBottom": "16px"},
                                         children=[
                                             html.H4("Writing Style Profile", style={"color": COLORS["text_primary"], "margin": 0}),
-                                            dbc.Button(
-                                                [html.I(className="bi bi-arrow-clockwise", style={"marginRight": "6px"}), "Rebuild Profile"],
-                                                id="btn-rebuild-profile",
-                                                size="sm",
-                                                color="primary",
-                                                style={"background": COLORS["accent"], "border": "none"},
+                                            html.Div(
+                                                style={"display": "flex", "gap": "6px"},
+                                                children=[
+                                                    dbc.Button(
+                                                        [html.I(className="bi bi-arrow-clockwise", style={"marginRight": "6px"}), "Rebuild Profile"],
+                                                        id="btn-rebuild-profile",
+                                                        size="sm",
+                                                        color="primary",
+                                                        style={"background": COLORS["accent"], "border": "none"},
+                                                    ),
+                                                    cancel_button("btn-cancel-rebuild-profile"),
+                                                ],
                                             ),
                                         ],
                                     ),
+                                    progress_area("persona-profile-progress"),
                                     dcc.Loading(
                                         type="dot",
                                         color=COLORS["accent"],
@@ -218,8 +226,10 @@ def layout():
                                                 outline=True,
                                                 style={"width": "100%"},
                                             ),
+                                            cancel_button("btn-cancel-persona-action"),
                                         ],
                                     ),
+                                    progress_area("persona-action-progress"),
                                     dcc.Loading(
                                         type="dot",
                                         color=COLORS["success"],
@@ -240,23 +250,36 @@ def layout():
 
 @callback(
     Output("persona-profile-display", "children"),
-    Input("btn-rebuild-profile", "n_clicks"),
     Input("persona-kpi-row", "children"),
-    prevent_initial_call=False,
 )
-def display_or_rebuild_profile(rebuild_clicks, _):
-    triggered = dash.ctx.triggered_id
+def display_profile(_):
+    return _render_profile()
 
-    if triggered == "btn-rebuild-profile" and rebuild_clicks:
-        from services.persona_engine import rebuild_persona
-        result = rebuild_persona()
-        if result.get("profile", {}).get("error"):
-            return html.P(
-                f"Error: {result['profile']['error']}",
-                style={"color": COLORS["danger"], "fontSize": "0.9rem"},
-            )
 
-    # Display current profile
+@callback(
+    Output("persona-profile-display", "children", allow_duplicate=True),
+    Input("btn-rebuild-profile", "n_clicks"),
+    background=True,
+    progress=Output("persona-profile-progress", "children"),
+    running=running_controls("btn-cancel-rebuild-profile", "persona-profile-progress", "btn-rebuild-profile"),
+    cancel=[Input("btn-cancel-rebuild-profile", "n_clicks")],
+    prevent_initial_call=True,
+)
+def rebuild_profile(set_progress, rebuild_clicks):
+    if not rebuild_clicks:
+        return no_update
+    from services.persona_engine import rebuild_persona
+    result = rebuild_persona(progress=lambda message: set_progress(progress_status(message)))
+    if result.get("profile", {}).get("error"):
+        return html.P(
+            f"Error: {result['profile']['error']}",
+            style={"color": COLORS["danger"], "fontSize": "0.9rem"},
+        )
+    return _render_profile()
+
+
+def _render_profile():
+    """The stored persona profile as tone fields and pattern badges."""
     profile_json = db.get_setting("persona_profile")
     if not profile_json:
         return html.P(
@@ -337,28 +360,45 @@ def display_or_rebuild_profile(rebuild_clicks, _):
     Input("btn-ingest-docs", "n_clicks"),
     Input("btn-embed-samples", "n_clicks"),
     Input("btn-generate-drafts", "n_clicks"),
+    background=True,
+    progress=Output("persona-action-progress", "children"),
+    running=running_controls(
+        "btn-cancel-persona-action", "persona-action-progress",
+        "btn-ingest-emails", "btn-ingest-docs", "btn-embed-samples", "btn-generate-drafts",
+    ),
+    cancel=[Input("btn-cancel-persona-action", "n_clicks")],
     prevent_initial_call=True,
 )
-def handle_persona_actions(ingest_emails_clicks, ingest_docs_clicks, embed_clicks, drafts_clicks):
+def handle_persona_actions(set_progress, ingest_emails_clicks, ingest_docs_clicks, embed_clicks, drafts_clicks):
     triggered = dash.ctx.triggered_id
     from services import persona_engine
 
     if triggered == "btn-ingest-emails" and ingest_emails_clicks:
+        set_progress(progress_status("Ingesting sent emails..."))
         result = persona_engine.ingest_emails()
         if result.get("error"):
             return _status_badge(result["error"], "danger")
         return _status_badge(f"Ingested {result['ingested']} email chunks.", "success")
 
     if triggered == "btn-ingest-docs" and ingest_docs_clicks:
+        set_progress(progress_status("Ingesting documents..."))
         result = persona_engine.ingest_documents()
         return _status_badge(f"Ingested {result['ingested']} document chunks.", "success")
 
     if triggered == "btn-embed-samples" and embed_clicks:
-        result = persona_engine.embed_pending_samples()
-        return _status_badge(f"Embedded {result['embedded']} samples into vector store.", "success")
+        set_progress(progress_status("Syncing samples into vector store..."))
+        result = persona_engine.embed_pending_samples(
+            progress=lambda done: set_progress(progress_status(f"Embedded {done} samples..."))
+        )
+        return _status_badge(
+            f"Embedded {result['embedded']} samples, removed {result['removed']} stale vectors.", "success"
+        )
 
     if triggered == "btn-generate-drafts" and drafts_clicks:
-        result = persona_engine.process_new_emails_for_drafts()
+        set_progress(progress_status("Preparing draft generation..."))
+        result = persona_engine.process_new_emails_for_drafts(
+            progress=lambda done, total: set_progress(progress_status(f"Drafted {done} of {total} replies..."))
+        )
         if result.get("error"):
             return _status_badge(result["error"], "warning")
         return _status_badge(f"Generated {result['processed']} new drafts.", "success")
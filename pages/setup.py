@@ -359,6 +359,8 @@ def complete_setup(n_clicks, company_name, industry, api_key, imap_server, imap_
             db.save_setting("claude_refresh_token", key)
         elif key:
             db.save_setting("anthropic_api_key", key)
+        from services.claude_auth import invalidate_client
+        invalidate_client()
     db.save_setting("imap_server", imap_server or "imap.gmail.com")
     db.save_setting("imap_email", imap_email or "")
     db.save_setting("imap_password", imap_password or "")
@@ -433,7 +435,8 @@ def test_api_key(n_clicks, api_key):
     else:
         db.save_setting("anthropic_api_key", key)
 
-    from services.claude_auth import test_credentials
+    from services.claude_auth import test_credentials, invalidate_client
+    invalidate_client()
     success, message, token_type = test_credentials(key)
 
     type_labels = {
@@ -0,0 +1,294 @@
+"""
+Usage page — per-feature LLM call volume, latency (p50/p95) and token spend
+per day, from the llm_calls telemetry table, response-cache hit rates, the
+live scheduler queue, and the model routing table.
+"""
+
+import json
+import dash
+from dash import html, dcc, callback, Input, Output, State, no_update
+import dash_bootstrap_components as dbc
+from config import COLORS
+from components.kpi_card import kpi_card
+from services import model_router, llm_scheduler, llm_cache
+import db
+
+dash.register_page(__name__, path="/usage", name="Usage", order=15)
+
+RANGE_OPTIONS = [
+    {"label": "Today", "value": 1},
+    {"label": "Last 7 days", "value": 7},
+    {"label": "Last 30 days", "value": 30},
+]
+
+COLUMNS = [
+    ("Day", "day"),
+    ("Feature", "feature"),
+    ("Calls", "calls"),
+    ("Errors", "errors"),
+    ("p50", "p50_ms"),
+    ("p95", "p95_ms"),
+    ("Input tok", "input_tokens"),
+    ("Output tok", "output_tokens"),
+    ("Cache write", "cache_creation_tokens"),
+    ("Cache read", "cache_read_tokens"),
+    ("Resp. cache hits", "response_cache"),
+]
+
+CELL_STYLE = {
+    "padding": "8px 12px",
+    "borderBottom": f"1px solid {COLORS['border']}",
+    "fontSize": "0.85rem",
+    "whiteSpace": "nowrap",
+}
+
+
+def _fmt_ms(ms):
+    return f"{ms / 1000:.1f}s" if ms >= 1000 else f"{ms:.0f}ms"
+
+
+def _hit_rate(stats):
+    """Hit rate and lookup count from a feature's response-cache counters."""
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    if not lookups:
+        return "—"
+    return f"{stats['hits'] / lookups:.0%} of {lookups:,}"
+
+
+def _fmt_cell(key, value):
+    if key in ("p50_ms", "p95_ms"):
+        return _fmt_ms(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    return value
+
+
+def _stats_table(stats, cache_stats):
+    if not stats:
+        return html.P(
+            "No LLM calls recorded in this period.",
+            style={"color": COLORS["text_muted"], "fontStyle": "italic"},
+        )
+    header = html.Tr([
+        html.Th(label, style={**CELL_STYLE, "color": COLORS["text_muted"], "textTransform": "uppercase",
+                              "fontSize": "0.7rem", "letterSpacing": "1px"})
+        for label, _ in COLUMNS
+    ])
+    rows = []
+    for row in stats:
+        row = {**row, "response_cache": _hit_rate(cache_stats["features"].get(row["feature"], {}))}
+        cells = []
+        for _, key in COLUMNS:
+            color = COLORS["text_primary"]
+            if key == "errors" and row["errors"]:
+                color = COLORS["danger"]
+            elif key == "p95_ms" and row["p95_ms"] >= 20000:
+                color = COLORS["warning"]
+            cells.append(html.Td(_fmt_cell(key, row[key]), style={**CELL_STYLE, "color": color}))
+        rows.append(html.Tr(cells))
+    return html.Div(
+        style={"overflowX": "auto"},
+        children=[
+            html.Table([html.Thead(header), html.Tbody(rows)], style={"width": "100%", "borderCollapse": "collapse"}),
+            html.P(
+                "Cache write/read are Anthropic prompt-cache tokens. Resp. cache hits are lookups served from "
+                f"the local response cache ({cache_stats['entries']:,} entries, "
+                f"{cache_stats['size_bytes'] / 1e6:.1f} MB) by this process since it started, whatever the range.",
+                style={"color": COLORS["text_muted"], "fontSize": "0.8rem", "marginTop": "12px"},
+            ),
+        ],
+    )
+
+
+def _kpis(stats):
+    calls = sum(r["calls"] for r in stats)
+    errors = sum(r["errors"] for r in stats)
+    input_tokens = sum(r["input_tokens"] for r in stats)
+    output_tokens = sum(r["output_tokens"] for r in stats)
+    cache_read = sum(r["cache_read_tokens"] for r in stats)
+    worst = max(stats, key=lambda r: r["p95_ms"], default=None)
+    return [
+        kpi_card("LLM Calls", f"{calls:,}", f"{errors} errors", COLORS["accent"]),
+        kpi_card("Input Tokens", f"{input_tokens:,}", f"{cache_read:,} read from cache", COLORS["info"]),
+        kpi_card("Output Tokens", f"{output_tokens:,}", "", COLORS["success"]),
+        kpi_card(
+            "Slowest p95",
+            _fmt_ms(worst["p95_ms"]) if worst else "—",
+            f"{worst['feature']} on {worst['day']}" if worst else "",
+            COLORS["warning"],
+        ),
+    ]
+
+
+def _scheduler_view(metrics):
+    """Queue depth, circuit state and queue waits per priority class."""
+    circuit_color = COLORS["success"] if metrics["circuit"] == "closed" else COLORS["danger"]
+    summary = html.Div(
+        style={"display": "flex", "gap": "24px", "flexWrap": "wrap", "marginBottom": "12px", "fontSize": "0.85rem"},
+        children=[
+            html.Span(f"Queued: {metrics['queue_depth']} (max {metrics['max_queue_depth']})",
+                      style={"color": COLORS["text_secondary"]}),
+            html.Span(f"In flight: {metrics['in_flight']}", style={"color": COLORS["text_secondary"]}),
+            html.Span(f"Retries: {metrics['retries']:,} ({metrics['throttled']:,} throttled)",
+                      style={"color": COLORS["text_secondary"]}),
+            html.Span(f"Circuit: {metrics['circuit'].replace('_', '-')}", style={"color": circuit_color}),
+            html.Span(f"Rejected while open: {metrics['rejected_open_circuit']:,}",
+                      style={"color": COLORS["text_secondary"]}),
+        ],
+    )
+    header = html.Tr([
+        html.Th(label, style={**CELL_STYLE, "color": COLORS["text_muted"], "textTransform": "uppercase",
+                              "fontSize": "0.7rem", "letterSpacing": "1px"})
+        for label in ("Priority", "Admitted", "Avg wait", "Max wait")
+    ])
+    rows = [
+        html.Tr([
+            html.Td(name, style={**CELL_STYLE, "color": COLORS["text_primary"]}),
+            html.Td(f"{stats['count']:,}", style={**CELL_STYLE, "color": COLORS["text_secondary"]}),
+            html.Td(_fmt_ms(stats["avg_s"] * 1000), style={**CELL_STYLE, "color": COLORS["text_secondary"]}),
+            html.Td(_fmt_ms(stats["max_s"] * 1000), style={**CELL_STYLE, "color": COLORS["text_secondary"]}),
+        ])
+        for name, stats in metrics["wait"].items()
+    ]
+    return html.Div([
+        summary,
+        html.Table([html.Thead(header), html.Tbody(rows)], style={"width": "100%", "borderCollapse": "collapse"}),
+    ])
+
+
+def _scheduler_card():
+    return html.Div(
+        style={"background": COLORS["card_bg"], "borderRadius": "12px", "padding": "24px", "marginTop": "20px"},
+        children=[
+            html.H4("Request Scheduler", style={"color": COLORS["text_primary"], "marginBottom": "8px"}),
+            html.P(
+                "Live counters for this web process since it started. Background jobs run in "
+                "their own worker processes with their own queues and are not included.",
+                style={"color": COLORS["text_muted"], "fontSize": "0.85rem"},
+            ),
+            html.Div(id="usage-scheduler"),
+            dcc.Interval(id="usage-scheduler-interval", interval=10 * 1000),
+        ],
+    )
+
+
+def _routes_table(routes):
+    header = html.Tr([
+        html.Th(label, style={**CELL_STYLE, "color": COLORS["text_muted"], "textTransform": "uppercase",
+                              "fontSize": "0.7rem", "letterSpacing": "1px"})
+        for label in ("Feature", "Model", "Max tokens")
+    ])
+    rows = [
+        html.Tr([
+            html.Td(feature, style={**CELL_STYLE, "color": COLORS["text_primary"]}),
+            html.Td(route["model"], style={**CELL_STYLE, "color": COLORS["text_secondary"]}),
+            html.Td(f"{route['max_tokens']:,}", style={**CELL_STYLE, "color": COLORS["text_secondary"]}),
+        ])
+        for feature, route in routes.items()
+    ]
+    return html.Table([html.Thead(header), html.Tbody(rows)], style={"width": "100%", "borderCollapse": "collapse"})
+
+
+def _routing_card():
+    return html.Div(
+        style={"background": COLORS["card_bg"], "borderRadius": "12px", "padding": "24px", "marginTop": "20px"},
+        children=[
+            html.H4("Model Routing", style={"color": COLORS["text_primary"], "marginBottom": "8px"}),
+            html.P(
+                'Override the model or max_tokens per feature as JSON, e.g. '
+                '{"triage": {"model": "claude-3-5-haiku-20241022", "max_tokens": 512}}. '
+                "Compare candidates offline with: python -m services.model_eval <feature> --models ...",
+                style={"color": COLORS["text_muted"], "fontSize": "0.85rem"},
+            ),
+            html.Div(id="usage-routes-table", children=_routes_table(model_router.get_routes()),
+                     style={"marginBottom": "16px"}),
+            dbc.Textarea(
+                id="usage-routes-override",
+                value=db.get_setting("model_routes", ""),
+                placeholder="{}",
+                style={"fontFamily": "monospace", "fontSize": "0.85rem", "minHeight": "100px", "marginBottom": "12px"},
+            ),
+            dbc.Button("Save Overrides", id="btn-save-routes", color="primary", size="sm"),
+            html.Span(id="usage-routes-status", style={"marginLeft": "12px", "fontSize": "0.85rem"}),
+        ],
+    )
+
+
+def layout():
+    return html.Div(
+        children=[
+            html.Div(
+                style={"display": "flex", "justifyContent": "space-between", "alignItems": "center", "marginBottom": "24px"},
+                children=[
+                    html.Div([
+                        html.H2("LLM Usage", style={"color": COLORS["text_primary"], "margin": 0}),
+                        html.P(
+                            "Calls, latency and tokens per feature — find the flows worth optimizing or moving to a cheaper model.",
+                            style={"color": COLORS["text_muted"], "fontSize": "0.9rem", "margin": "4px 0 0 0"},
+                        ),
+                    ]),
+                    dcc.Dropdown(
+                        id="usage-range",
+                        options=RANGE_OPTIONS,
+                        value=7,
+                        clearable=False,
+                        style={"width": "180px"},
+                    ),
+                ],
+            ),
+            html.Div(id="usage-kpis", style={"display": "flex", "gap": "16px", "flexWrap": "wrap", "marginBottom": "24px"}),
+            html.Div(
+                style={"background": COLORS["card_bg"], "borderRadius": "12px", "padding": "24px"},
+                children=[
+                    html.H4("Per Feature, Per Day", style={"color": COLORS["text_primary"], "marginBottom": "16px"}),
+                    html.Div(id="usage-table"),
+                ],
+            ),
+            _scheduler_card(),
+            _routing_card(),
+        ]
+    )
+
+
+@callback(
+    Output("usage-kpis", "children"),
+    Output("usage-table", "children"),
+    Input("usage-range", "value"),
+)
+def update_usage(days):
+    stats = db.get_llm_call_stats(days or 7)
+    return _kpis(stats), _stats_table(stats, llm_cache.get_stats())
+
+
+@callback(
+    Output("usage-scheduler", "children"),
+    Input("usage-scheduler-interval", "n_intervals"),
+)
+def update_scheduler(_n):
+    return _scheduler_view(llm_scheduler.get_metrics())
+
+
+@callback(
+    Output("usage-routes-status", "children"),
+    Output("usage-routes-table", "children"),
+    Input("btn-save-routes", "n_clicks"),
+    State("usage-routes-override", "value"),
+    prevent_initial_call=True,
+)
+def save_route_overrides(n_clicks, value):
+    if not n_clicks:
+        return no_update, no_update
+    value = (value or "").strip()
+    if value:
+        try:
+            overrides = json.loads(value)
+        except json.JSONDecodeError as e:
+            return html.Span(f"Invalid JSON: {e}", style={"color": COLORS["danger"]}), no_update
+        if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+            return html.Span('Expected {"feature": {"model": ..., "max_tokens": ...}}',
+                             style={"color": COLORS["danger"]}), no_update
+    db.save_setting("model_routes", value)
+    return (
+        html.Span("Saved.", style={"color": COLORS["success"]}),
+        _routes_table(model_router.get_routes()),
+    )
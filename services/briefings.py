@@ -0,0 +1,134 @@
+"""
+Stored daily briefings — daily priorities and the executive plan are kept per
+date and input fingerprint, so the dashboard serves them instantly and only
+regenerates when the underlying tasks, meetings or emails actually change.
+
+A background thread pre-generates both before working hours.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+from config import BRIEFING_PREGEN_ENABLED, BRIEFING_PREGEN_TIME
+import db
+
+DAILY_PRIORITIES = "daily_priorities"
+EXEC_PLAN = "exec_plan"
+
+# Responses from claude_client that signal a failed generation — never stored
+_FAILURE_PREFIXES = ("API key not configured", "Could not generate")
+
+_generate_lock = threading.Lock()
+_fingerprint_lock = threading.Lock()
+_fingerprints = {}  # kind -> (date and data versions, fingerprint, has_data)
+_scheduler_started = False
+
+
+def _load_inputs(kind):
+    """The data each briefing is built from: (tasks, meetings, emails, overdue)."""
+    tasks = [t for t in db.get_tasks() if t["status"] not in ("completed", "cancelled")]
+    meetings = db.get_todays_meetings()
+    if kind == EXEC_PLAN:
+        return tasks, meetings, db.get_emails(10), db.get_overdue_tasks()
+    return tasks, meetings, db.get_emails(5), []
+
+
+def fingerprint(tasks, meetings, emails, overdue=()):
+    """Hash of the fields each briefing prompt actually uses.
+    Tasks have no updated_at column, so their prompt-visible fields stand in for it.
+    """
+    payload = [
+        [(t["id"], t["title"], t["priority"], t["status"], t.get("due_date")) for t in tasks],
+        [(m["id"], m["title"], m["date"], (m.get("raw_notes") or "")[:80]) for m in meetings],
+        [(e["id"], e.get("urgency"), e.get("processed_at")) for e in emails],
+        [t["id"] for t in overdue],
+    ]
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()[:16]
+
+
+def _current_fingerprint(kind):
+    """(fingerprint, has_data) of today's inputs, recomputed only when the date
+    or the trigger-maintained tasks/meetings/emails versions change.
+    """
+    key = (date.today().isoformat(), db.get_data_versions("tasks", "meetings", "emails"))
+    with _fingerprint_lock:
+        cached = _fingerprints.get(kind)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+    tasks, meetings, emails, overdue = _load_inputs(kind)
+    fp, has_data = fingerprint(tasks, meetings, emails, overdue), bool(tasks or meetings or emails)
+    with _fingerprint_lock:
+        _fingerprints[kind] = (key, fp, has_data)
+    return fp, has_data
+
+
+def get_briefing(kind):
+    """Return (briefing_row_or_None, is_current, has_data) for today.
+    is_current is False when the stored briefing was built from different inputs.
+    """
+    fp, has_data = _current_fingerprint(kind)
+    stored = db.get_latest_briefing(kind, date.today().isoformat())
+    current = stored is not None and stored["fingerprint"] == fp
+    return stored, current, has_data
+
+
+def generate_briefing(kind, force=False):
+    """Generate and store today's briefing unless an up-to-date one exists
+    (or force=True). Returns the briefing row, or None when there is no data.
+    Failed generations are returned but not stored.
+    """
+    from services.claude_client import generate_daily_priorities, generate_executive_plan
+
+    with _generate_lock:
+        tasks, meetings, emails, overdue = _load_inputs(kind)
+        if not (tasks or meetings or emails):
+            return None
+        today = date.today().isoformat()
+        fp = fingerprint(tasks, meetings, emails, overdue)
+
+        stored = db.get_latest_briefing(kind, today)
+        if not force and stored and stored["fingerprint"] == fp:
+            return stored
+
+        if kind == EXEC_PLAN:
+            content = generate_executive_plan(tasks, meetings, emails, overdue)
+        else:
+            content = generate_daily_priorities(tasks, meetings, emails)
+
+        if content.startswith(_FAILURE_PREFIXES):
+            return {"kind": kind, "briefing_date": today, "fingerprint": fp, "content": content, "created_at": None}
+        db.save_briefing(kind, today, fp, content)
+        return db.get_latest_briefing(kind, today)
+
+
+# ── Morning pre-generation ──
+
+def _next_run(now):
+    hour, minute = (int(x) for x in BRIEFING_PREGEN_TIME.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run if run > now else run + timedelta(days=1)
+
+
+def _scheduler_loop():
+    while True:
+        now = datetime.now()
+        time.sleep(max(1, (_next_run(now) - now).total_seconds()))
+        # Several workers may run this loop; the atomic claim keeps it to one run per day
+        if not db.claim_setting("briefing_pregen_date", date.today().isoformat()):
+            continue
+        for kind in (DAILY_PRIORITIES, EXEC_PLAN):
+            try:
+                generate_briefing(kind)
+            except Exception as e:
+                print(f"Briefing pre-generation failed for {kind}: {e}")
+
+
+def start_scheduler():
+    """Start the daily pre-generation thread once per process."""
+    global _scheduler_started
+    if _scheduler_started or not BRIEFING_PREGEN_ENABLED:
+        return
+    _scheduler_started = True
+    threading.Thread(target=_scheduler_loop, name="briefing-pregen", daemon=True).start()
@@ -99,6 +99,7 @@ def ingest() -> dict:
                         existing_hashes.add(content_hash)
 
                         subject = _decode_header_value(msg.get("Subject", ""))
+                        recipient = _decode_header_value(msg.get("To", ""))
 
                         chunks = _chunk_text(body)
                         for chunk in chunks:
@@ -106,6 +107,7 @@ def ingest() -> dict:
                                 continue
                             metadata = json.dumps({
                                 "subject": subject,
+                                "recipient": recipient,
                                 "folder": folder,
                                 "content_hash": content_hash,
                             })
@@ -0,0 +1,149 @@
+"""
+Chat history manager — keeps the most recent turns verbatim within a token
+budget and folds older turns into a rolling summary persisted per conversation.
+
+Folding runs on a background thread after the reply is saved, so a chat turn
+never waits on summary calls however long the conversation is.
+"""
+
+import threading
+import db
+from services import llm_scheduler, model_router
+from config import (
+    CHAT_HISTORY_TOKEN_BUDGET,
+    CHAT_HISTORY_MAX_TURNS,
+    CHAT_SUMMARY_BATCH_TOKENS,
+)
+
+# Conversations with a fold in progress, so two turns don't summarize the same batch
+_folding = set()
+_folding_lock = threading.Lock()
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between an executive and their AI assistant.
+Update the summary so it also covers the new turns below. Keep facts, decisions, names, dates, numbers,
+commitments and open questions the assistant may need later; drop pleasantries and repetition.
+Write concise bullet points, under 400 words. Respond with the updated summary only.
+
+## Current Summary
+{summary}
+
+## New Turns
+{turns}"""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) — good enough for budgeting."""
+    return len(text or "") // 4 + 1
+
+
+def _split_window(messages):
+    """Split messages into (older, recent). The recent window holds at most
+    CHAT_HISTORY_MAX_TURNS turns within CHAT_HISTORY_TOKEN_BUDGET, always keeps
+    the newest message, and starts on a user turn as the API requires.
+    """
+    max_messages = CHAT_HISTORY_MAX_TURNS * 2
+    used = 0
+    start = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        cost = estimate_tokens(messages[i]["content"])
+        if start < len(messages) and (used + cost > CHAT_HISTORY_TOKEN_BUDGET
+                                      or len(messages) - i > max_messages):
+            break
+        used += cost
+        start = i
+    while start < len(messages) - 1 and messages[start]["role"] != "user":
+        start += 1
+    return messages[:start], messages[start:]
+
+
+def _format_turns(messages):
+    limit = CHAT_SUMMARY_BATCH_TOKENS * 4
+    lines = []
+    for msg in messages:
+        speaker = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {msg['content'][:limit]}")
+    return "\n\n".join(lines)
+
+
+def _batches(messages):
+    """Group messages into chunks of roughly CHAT_SUMMARY_BATCH_TOKENS each."""
+    batch, used = [], 0
+    for msg in messages:
+        cost = estimate_tokens(msg["content"])
+        if batch and used + cost > CHAT_SUMMARY_BATCH_TOKENS:
+            yield batch
+            batch, used = [], 0
+        batch.append(msg)
+        used += cost
+    if batch:
+        yield batch
+
+
+def _pending(conversation_id):
+    """(summary, messages not yet covered by it) for a conversation."""
+    state = db.get_conversation_summary(conversation_id) or {}
+    pending = [
+        m for m in db.get_messages(conversation_id, after_id=state.get("covered_message_id", 0))
+        if m["role"] in ("user", "assistant")
+    ]
+    return state.get("summary", ""), pending
+
+
+def _fold(client, conversation_id, summary, older):
+    """Fold older messages into the summary batch by batch, persisting after
+    each one. Returns the latest summary; raises on failure, leaving the
+    remaining turns unsummarized for the next fold.
+    """
+    route = model_router.get_route("chat_summary")
+    for batch in _batches(older):
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary or "(none yet)",
+            turns=_format_turns(batch),
+        )
+        response = llm_scheduler.create(
+            client, "chat_summary",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
+            messages=[{"role": "user", "content": prompt}],
+        )
+        summary = response.content[0].text.strip()
+        db.save_conversation_summary(conversation_id, summary, batch[-1]["id"])
+    return summary
+
+
+def _background_fold(client, conversation_id):
+    try:
+        summary, pending = _pending(conversation_id)
+        older, _ = _split_window(pending)
+        if older:
+            _fold(client, conversation_id, summary, older)
+    except Exception as e:
+        print(f"Conversation summary fold failed for conversation {conversation_id}: {e}")
+    finally:
+        with _folding_lock:
+            _folding.discard(conversation_id)
+
+
+def start_fold(conversation_id, client):
+    """After a turn, fold whatever has left the recent window into the summary
+    on a background thread. No-op if a fold for this conversation is running.
+    """
+    with _folding_lock:
+        if conversation_id in _folding:
+            return
+        _folding.add(conversation_id)
+    threading.Thread(target=_background_fold, args=(client, conversation_id),
+                     name=f"chat-fold-{conversation_id}", daemon=True).start()
+
+
+def build_history(conversation_id):
+    """Return (summary, messages) for the next API call. Never calls the API.
+
+    Only messages newer than the persisted summary are loaded. Turns that
+    fall outside the recent window are left to start_fold(); until it catches
+    up they are covered by neither the summary nor the window.
+    """
+    summary, pending = _pending(conversation_id)
+    _, recent = _split_window(pending)
+    messages = [{"role": m["role"], "content": m["content"]} for m in recent]
+    return summary, messages
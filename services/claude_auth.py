@@ -6,6 +6,9 @@ API key format:    sk-ant-api03-...  (from console.anthropic.com)
 OAuth token format: sk-ant-oat01-... (from Claude Pro/Max subscription)
 Refresh token:     sk-ant-ort01-...
 
+Clients are shared process-wide: one Anthropic client (and its keep-alive
+connection pool) per credential, rebuilt only when the token changes.
+
 Usage:
     from services.claude_auth import get_claude_client
     client = get_claude_client()
@@ -13,9 +16,18 @@ Usage:
 
 import json
 import time
+import threading
 import httpx
-from anthropic import Anthropic
-from config import ANTHROPIC_API_KEY
+from anthropic import Anthropic, DefaultHttpxClient
+from config import (
+    ANTHROPIC_API_KEY,
+    ANTHROPIC_MAX_CONNECTIONS,
+    ANTHROPIC_MAX_KEEPALIVE,
+    ANTHROPIC_KEEPALIVE_EXPIRY,
+    ANTHROPIC_TIMEOUT,
+    ANTHROPIC_CONNECT_TIMEOUT,
+    ANTHROPIC_CREDENTIAL_TTL,
+)
 import db
 
 # OAuth refresh endpoint
@@ -28,6 +40,18 @@ _token_cache = {
     "expires_at": 0,
 }
 
+# Cache for stored credentials, so each call doesn't hit SQLite twice
+_credential_cache = {
+    "api_key": None,
+    "refresh_token": None,
+    "loaded_at": 0,
+}
+
+# Process-wide client registry: token -> Anthropic client
+_client_registry = {}
+# Guards the registry and both caches above (read and written from many threads)
+_registry_lock = threading.Lock()
+
 
 def _is_oauth_token(key):
     """Check if a key is a Claude Code OAuth token (not an API key)."""
@@ -40,12 +64,28 @@ def _is_refresh_token(key):
 
 
 def _get_stored_credentials():
-    """Get the stored API key or OAuth token from DB / env."""
+    """Get the stored API key or OAuth token from DB / env.
+    Cached for ANTHROPIC_CREDENTIAL_TTL seconds; invalidate_client() forces a re-read.
+    """
+    with _registry_lock:
+        if time.time() - _credential_cache["loaded_at"] < ANTHROPIC_CREDENTIAL_TTL:
+            return _credential_cache["api_key"], _credential_cache["refresh_token"]
+
     api_key = db.get_setting("anthropic_api_key") or ANTHROPIC_API_KEY
     refresh_token = db.get_setting("claude_refresh_token", "")
+    with _registry_lock:
+        _credential_cache.update(api_key=api_key, refresh_token=refresh_token, loaded_at=time.time())
     return api_key, refresh_token
 
 
+def invalidate_client():
+    """Drop cached credentials and clients. Call after saving new keys/tokens."""
+    with _registry_lock:
+        _credential_cache["loaded_at"] = 0
+        _token_cache.update(access_token=None, expires_at=0)
+        _client_registry.clear()
+
+
 def _refresh_oauth_token(refresh_token):
     """Use a refresh token to get a new access token."""
     try:
@@ -63,9 +103,9 @@ def _refresh_oauth_token(refresh_token):
             access_token = data.get("access_token", "")
             expires_in = data.get("expires_in", 28800)
 
-            # Cache the new token
-            _token_cache["access_token"] = access_token
-            _token_cache["expires_at"] = time.time() + expires_in - 300  # 5min buffer
+            # Cache the new token (5min buffer before expiry)
+            with _registry_lock:
+                _token_cache.update(access_token=access_token, expires_at=time.time() + expires_in - 300)
 
             # Save the new access token to DB
             db.save_setting("anthropic_api_key", access_token)
@@ -75,6 +115,10 @@ def _refresh_oauth_token(refresh_token):
             if new_refresh:
                 db.save_setting("claude_refresh_token", new_refresh)
 
+            # Stored credentials changed — re-read them on the next call
+            with _registry_lock:
+                _credential_cache["loaded_at"] = 0
+
             return access_token
         else:
             print(f"OAuth refresh failed: {response.status_code} {response.text[:200]}")
@@ -96,8 +140,10 @@ def _get_valid_token():
         return api_key, "api_key"
 
     # OAuth token — check if cached token is still valid
-    if _token_cache["access_token"] and time.time() < _token_cache["expires_at"]:
-        return _token_cache["access_token"], "oauth"
+    with _registry_lock:
+        cached_token, expires_at = _token_cache["access_token"], _token_cache["expires_at"]
+    if cached_token and time.time() < expires_at:
+        return cached_token, "oauth"
 
     # OAuth token — try to use the stored one first
     # If we have a refresh token, refresh proactively
@@ -110,23 +156,49 @@ def _get_valid_token():
     return api_key, "oauth"
 
 
+def _build_client(token, max_retries=0):
+    """Create an Anthropic client with a tuned keep-alive connection pool.
+    SDK retries are disabled by default; llm_scheduler owns retry and backoff.
+    """
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=ANTHROPIC_MAX_KEEPALIVE,
+            keepalive_expiry=ANTHROPIC_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(ANTHROPIC_TIMEOUT, connect=ANTHROPIC_CONNECT_TIMEOUT),
+    )
+    if _is_oauth_token(token):
+        # OAuth tokens use Bearer auth — create client with custom default headers
+        return Anthropic(
+            api_key=token,
+            default_headers={"Authorization": f"Bearer {token}"},
+            http_client=http_client,
+            max_retries=max_retries,
+        )
+    # Standard API key
+    return Anthropic(api_key=token, http_client=http_client, max_retries=max_retries)
+
+
 def get_claude_client():
-    """Get an Anthropic client configured for the stored auth method.
+    """Get the shared Anthropic client for the stored auth method.
+    The client is reused across calls and threads; a new one is built only
+    when the token changes (new key saved, or OAuth refresh rotated it).
     Returns None if no credentials are configured.
     """
     token, auth_type = _get_valid_token()
     if not token:
         return None
 
-    if auth_type == "oauth":
-        # OAuth tokens use Bearer auth — create client with custom default headers
-        return Anthropic(
-            api_key=token,
-            default_headers={"Authorization": f"Bearer {token}"},
-        )
-    else:
-        # Standard API key
-        return Anthropic(api_key=token)
+    with _registry_lock:
+        client = _client_registry.get(token)
+        if client is None:
+            # Token rotated — drop clients for stale tokens. They are not closed
+            # here because in-flight requests on other threads may still use them.
+            _client_registry.clear()
+            client = _build_client(token)
+            _client_registry[token] = client
+        return client
 
 
 def test_credentials(key_or_token):
@@ -151,21 +223,21 @@ def test_credentials(key_or_token):
     else:
         token_type = "api_key"
 
-    # Test the key/token
+    # Test the key/token directly (not via the scheduler, so an open circuit
+    # breaker can't mask a new key), but still log it to llm_calls
+    from services.llm_scheduler import record_call
+    model = "claude-sonnet-4-20250514"
+    started = time.monotonic()
     try:
-        if _is_oauth_token(key):
-            client = Anthropic(
-                api_key=key,
-                default_headers={"Authorization": f"Bearer {key}"},
+        # Throwaway client, closed afterwards; SDK retries ride out a transient 529
+        with _build_client(key, max_retries=2) as client:
+            response = client.messages.create(
+                model=model,
+                max_tokens=10,
+                messages=[{"role": "user", "content": "Say OK"}],
             )
-        else:
-            client = Anthropic(api_key=key)
-
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=10,
-            messages=[{"role": "user", "content": "Say OK"}],
-        )
+        record_call("test_credentials", model, started, response=response)
         return True, f"Connected successfully ({token_type}).", token_type
     except Exception as e:
+        record_call("test_credentials", model, started, error=e)
         return False, f"Test failed: {str(e)[:150]}", token_type
@@ -4,42 +4,71 @@ meeting summarization, email processing, daily priorities.
 """
 
 import json
-import os
+import threading
 from datetime import date
-from config import ANTHROPIC_MODEL, PROMPTS_DIR, COMPANY_NAME
+from config import COMPANY_NAME
 import db
+from services import llm_cache, llm_scheduler, model_router, model_eval, chat_history, prompt_registry
 
+# Rendered system prompt + context block, keyed by what they were built from
+_context_snapshot = {}
+_context_lock = threading.Lock()
 
-def _load_prompt(filename):
-    path = os.path.join(PROMPTS_DIR, filename)
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return f.read()
-    return ""
 
+def cached_block(text):
+    """Text content block marked as a prompt-cache breakpoint.
+    Everything up to and including this block is cached by the API.
+    """
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
 
-def _build_system_prompt():
-    """Build system prompt with dynamic context injected."""
-    base_prompt = _load_prompt("system_prompt.md")
-    today = date.today().isoformat()
-    task_summary = db.get_active_tasks_summary()
-    meeting_summary = db.get_meetings_summary()
-    email_summary = db.get_recent_emails_summary()
 
+def _build_system_prompt(history_summary=""):
+    """Build the system prompt as content blocks.
+    The static base prompt comes first and carries a cache breakpoint;
+    the context block goes last so it never invalidates the prefix (it is
+    memoized between data changes, so it carries a breakpoint too).
+    A conversation's rolling summary, when present, sits between the two
+    with its own breakpoint since it only changes when older turns are folded.
+    """
+    base_prompt, context_block = _get_context_snapshot()
+    blocks = []
+    if base_prompt:
+        blocks.append(cached_block(base_prompt))
+    if history_summary:
+        blocks.append(cached_block(f"## Earlier in This Conversation (Summary)\n{history_summary}"))
+    blocks.append(cached_block(context_block))
+    return blocks
+
+
+def _get_context_snapshot():
+    """Return (base_prompt, context_block), rebuilt only when the system prompt,
+    the date, or the tasks/meetings/emails tables have changed. Change detection
+    is one stat() plus one read of the trigger-maintained data_versions table.
+    """
+    template = prompt_registry.get("system_prompt.md")
+    version = template.version if template else None
+    key = (version, date.today().isoformat(), db.get_data_versions("tasks", "meetings", "emails"))
+
+    with _context_lock:
+        if _context_snapshot.get("key") == key:
+            return _context_snapshot["base_prompt"], _context_snapshot["context_block"]
+
+    today = key[1]
     context_block = f"""## Current Context (Auto-injected)
 - Date: {today}
 - Company: {COMPANY_NAME}
 - Active Tasks:
-{task_summary}
+{db.get_active_tasks_summary()}
 - Today's Meetings:
-{meeting_summary}
+{db.get_meetings_summary()}
 - Recent Emails:
-{email_summary}
-
----
-
+{db.get_recent_emails_summary()}
 """
-    return context_block + base_prompt
+    base_prompt = template.text if template else ""
+    with _context_lock:
+        _context_snapshot.update(key=key, version=version, base_prompt=base_prompt,
+                                 context_block=context_block)
+    return base_prompt, context_block
 
 
 def _get_client():
@@ -61,19 +90,21 @@ def chat(user_message, conversation_id):
         db.save_message(conversation_id, "assistant", fallback)
         return fallback
 
-    # Build message history
-    history = db.get_messages(conversation_id)
-    messages = []
-    for msg in history:
-        if msg["role"] in ("user", "assistant"):
-            messages.append({"role": msg["role"], "content": msg["content"]})
+    # Recent turns verbatim within the token budget; older ones come back as a summary
+    history_summary, messages = chat_history.build_history(conversation_id)
+
+    # Cache the conversation so far — the next turn reads it back as a prefix
+    if messages:
+        messages[-1] = {"role": messages[-1]["role"], "content": [cached_block(messages[-1]["content"])]}
 
-    system_prompt = _build_system_prompt()
+    system_prompt = _build_system_prompt(history_summary)
 
+    route = model_router.get_route("chat")
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=4096,
+        response = llm_scheduler.create(
+            client, "chat", prompt_version=_context_snapshot.get("version"),
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             system=system_prompt,
             messages=messages,
         )
@@ -82,20 +113,23 @@ def chat(user_message, conversation_id):
         assistant_text = f"Error communicating with Claude: {str(e)}"
 
     db.save_message(conversation_id, "assistant", assistant_text)
+    # Turns that just left the recent window are summarized off the request path
+    chat_history.start_fold(conversation_id, client)
 
     # Auto-title the conversation from the first exchange
     conv = db.get_conversation(conversation_id)
-    if conv and conv["title"] == "New Conversation" and len(messages) <= 2:
+    if conv and conv["title"] == "New Conversation" and not history_summary and len(messages) <= 2:
         title = user_message[:60] + ("..." if len(user_message) > 60 else "")
         db.update_conversation_title(conversation_id, title)
 
     return assistant_text
 
 
-def summarize_meeting(raw_notes):
+def summarize_meeting(raw_notes, bypass_cache=False):
     """
     Summarize meeting notes and extract action items.
     Returns dict: {summary, action_items: [{description, owner, due_date}]}
+    Identical notes are served from the response cache unless bypass_cache=True.
     """
     client = _get_client()
     if not client:
@@ -118,17 +152,27 @@ Respond with valid JSON only, no markdown fencing:
   ]
 }}"""
 
+    route = model_router.get_route("meeting_summary")
+    cache_key = llm_cache.make_key(route["model"], "meeting_summary", None, prompt)
+    cached = llm_cache.get("meeting_summary", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return cached
+
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
+        response = llm_scheduler.create(
+            client, "meeting_summary",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         text = response.content[0].text.strip()
         # Try to parse JSON, handle potential markdown fencing
         if text.startswith("```"):
             text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-        return json.loads(text)
+        result = json.loads(text)
+        llm_cache.put(cache_key, result)
+        model_eval.record_fixture("meeting_summary", {"raw_notes": raw_notes}, result, route["model"])
+        return result
     except (json.JSONDecodeError, Exception) as e:
         return {
             "summary": f"Could not parse AI response: {str(e)}",
@@ -137,10 +181,11 @@ Respond with valid JSON only, no markdown fencing:
         }
 
 
-def process_email(sender, subject, body):
+def process_email(sender, subject, body, bypass_cache=False):
     """
     Triage and summarize an email.
     Returns dict: {urgency, summary, action_items, should_create_task, suggested_task_title}
+    Identical emails are served from the response cache unless bypass_cache=True.
     """
     client = _get_client()
     if not client:
@@ -152,7 +197,9 @@ def process_email(sender, subject, body):
             "suggested_task_title": None,
         }
 
-    email_prompt = _load_prompt("email_processing_prompt.md")
+    template = prompt_registry.get("email_processing_prompt.md")
+    email_prompt = template.text if template else ""
+    prompt_version = template.version if template else None
 
     prompt = f"""{email_prompt}
 
@@ -163,16 +210,28 @@ def process_email(sender, subject, body):
 **Body:**
 {body}"""
 
+    route = model_router.get_route("triage")
+    cache_key = llm_cache.make_key(
+        route["model"], "triage", prompt_version, sender, subject, body
+    )
+    cached = llm_cache.get("triage", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return cached
+
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=1024,
+        response = llm_scheduler.create(
+            client, "triage", prompt_version=prompt_version,
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         text = response.content[0].text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-        return json.loads(text)
+        result = json.loads(text)
+        llm_cache.put(cache_key, result)
+        model_eval.record_fixture("triage", {"sender": sender, "subject": subject, "body": body}, result, route["model"])
+        return result
     except (json.JSONDecodeError, Exception):
         return {
             "urgency": "routine",
@@ -183,10 +242,11 @@ def process_email(sender, subject, body):
         }
 
 
-def analyze_document(filename, content):
+def analyze_document(filename, content, bypass_cache=False):
     """
     Analyze a document and extract key insights.
     Returns dict: {summary, key_insights, entities, action_items}
+    Re-uploads of the same file are served from the response cache unless bypass_cache=True.
     """
     client = _get_client()
     if not client:
@@ -217,16 +277,26 @@ Respond with valid JSON only, no markdown fencing:
   "action_items": ["Any action items or next steps implied by the document"]
 }}"""
 
+    route = model_router.get_route("document_analysis")
+    cache_key = llm_cache.make_key(route["model"], "document_analysis", None, prompt)
+    cached = llm_cache.get("document_analysis", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return cached
+
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
+        response = llm_scheduler.create(
+            client, "document_analysis",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         text = response.content[0].text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-        return json.loads(text)
+        result = json.loads(text)
+        llm_cache.put(cache_key, result)
+        model_eval.record_fixture("document_analysis", {"filename": filename, "content": content}, result, route["model"])
+        return result
     except (json.JSONDecodeError, Exception) as e:
         return {
             "summary": f"Could not analyze document: {str(e)}",
@@ -236,10 +306,10 @@ Respond with valid JSON only, no markdown fencing:
         }
 
 
-def search_documents(query, documents):
+def search_documents(query, passages):
     """
-    Search across uploaded documents using AI to find relevant data.
-    documents: list of dicts with filename, content, ai_analysis fields.
+    Answer a query from the passages retrieved for it by document_index.search.
+    passages: list of dicts with filename, chunk_index, text fields.
     Returns a markdown string with the answer and source references.
     """
     client = _get_client()
@@ -247,12 +317,9 @@ def search_documents(query, documents):
         return "API key not configured. Add your Anthropic API key in Setup to enable document search."
 
     doc_context = ""
-    for i, doc in enumerate(documents, 1):
-        doc_context += f"\n--- Document {i}: {doc['filename']} ---\n"
-        if doc.get("content"):
-            doc_context += doc["content"][:30000] + "\n"
-        if doc.get("ai_analysis"):
-            doc_context += f"\nPrior AI Analysis: {doc['ai_analysis'][:5000]}\n"
+    for i, passage in enumerate(passages, 1):
+        doc_context += f"\n--- [{i}] {passage['filename']} (part {passage['chunk_index'] + 1}) ---\n"
+        doc_context += passage["text"] + "\n"
 
     if not doc_context.strip():
         return "No document content available to search."
@@ -262,21 +329,24 @@ def search_documents(query, documents):
 ## User Query
 {query}
 
-## Available Documents
+## Relevant Passages
+These are the passages from the user's documents that best match the query, numbered for citation.
 {doc_context}
 
 ## Instructions
-- Search through ALL provided documents to answer the query
-- Be specific — quote relevant data, numbers, names, dates directly from the documents
-- Cite which document each piece of information comes from (by filename)
-- If the information isn't found in any document, say so clearly
+- Answer the query using only the passages above
+- Be specific — quote relevant data, numbers, names, dates directly from the passages
+- Cite each piece of information with its passage number and filename, e.g. [2] report.pdf
+- If the information isn't found in the passages, say so clearly
 - Format your response in clear markdown with headers if needed
 - Keep the response concise and focused on what was asked"""
 
+    route = model_router.get_route("document_search")
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
+        response = llm_scheduler.create(
+            client, "document_search",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         return response.content[0].text
@@ -325,10 +395,12 @@ Provide:
 
 Keep it concise and actionable. Use markdown formatting."""
 
+    route = model_router.get_route("daily_priorities")
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=1024,
+        response = llm_scheduler.create(
+            client, "daily_priorities",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         return response.content[0].text
@@ -408,10 +480,12 @@ Build a concrete, time-blocked executive plan. Structure it as:
 
 Be specific — reference actual task names, meeting titles, and email subjects. No generic advice. Use markdown formatting with bold for emphasis. Keep it actionable and tight."""
 
+    route = model_router.get_route("exec_plan")
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
+        response = llm_scheduler.create(
+            client, "exec_plan",
+            model=route["model"],
+            max_tokens=route["max_tokens"],
             messages=[{"role": "user", "content": prompt}],
         )
         return response.content[0].text
@@ -0,0 +1,112 @@
+"""
+Document search index — uploaded documents are chunked and embedded into the
+document_chunks vector collection, and search retrieves only the top-k
+passages (with their source) instead of sending whole files to the model.
+"""
+
+import threading
+from datetime import date
+from config import DOC_CHUNK_CHARS, DOC_SEARCH_TOP_K
+from services import vector_store
+from services.persona_engine import _chunk_text
+
+COLLECTION = vector_store.DOCUMENTS_COLLECTION
+BACKFILL_CLAIM_SECONDS = 3600
+
+
+def split_text(text):
+    """Paragraph-aligned chunks; paragraphs longer than DOC_CHUNK_CHARS are hard-split."""
+    chunks = []
+    for chunk in _chunk_text(text, max_chars=DOC_CHUNK_CHARS):
+        for i in range(0, len(chunk), DOC_CHUNK_CHARS):
+            piece = chunk[i:i + DOC_CHUNK_CHARS].strip()
+            if len(piece) >= 20:
+                chunks.append(piece)
+    return chunks
+
+
+def index_document(doc_id, filename, text, chunks=None):
+    """(Re)index one document. Returns the number of chunks stored.
+    Pass chunks to reuse a split already made (e.g. in an extraction worker).
+    """
+    vector_store.delete_where({"doc_id": doc_id}, collection=COLLECTION)
+    if chunks is None:
+        chunks = split_text(text or "")
+    if not chunks:
+        return 0
+    ids = [f"doc{doc_id}-{i}" for i in range(len(chunks))]
+    metadatas = [
+        {"doc_id": doc_id, "filename": filename, "chunk_index": i}
+        for i in range(len(chunks))
+    ]
+    vector_store.add_documents(ids, chunks, metadatas, collection=COLLECTION)
+    return len(chunks)
+
+
+def indexed_doc_ids():
+    """Ids of documents that already have chunks in the index."""
+    return {m["doc_id"] for m in vector_store.get_metadatas({"chunk_index": 0}, collection=COLLECTION)}
+
+
+def index_missing(documents, load_text):
+    """Index documents uploaded before the index existed.
+    load_text(doc) returns the document's text. Returns the number indexed.
+    Documents without usable text stay unindexed and are tried again next run.
+    """
+    done = indexed_doc_ids()
+    indexed = 0
+    for doc in documents:
+        if doc["id"] in done:
+            continue
+        text = load_text(doc)
+        if text and index_document(doc["id"], doc["filename"], text):
+            indexed += 1
+    return indexed
+
+
+def _backfill(today):
+    import db
+    from services import document_text
+    try:
+        indexed = index_missing(db.get_documents(), document_text.get_text)
+        db.save_setting("document_index_backfilled", today)
+        if indexed:
+            print(f"Document index backfill: {indexed} documents indexed")
+    except Exception as e:
+        print(f"Document index backfill failed: {e}")
+    finally:
+        db.save_setting("document_index_backfill_claim", "")
+
+
+def start_backfill():
+    """Index pre-existing documents on a background thread at startup. New
+    uploads are indexed by the upload pipeline, so this only catches older
+    documents. It runs until one pass succeeds each day; a claim keeps other
+    processes from running it at the same time and lapses after
+    BACKFILL_CLAIM_SECONDS if its holder dies.
+    """
+    import db
+    today = date.today().isoformat()
+    if db.get_setting("document_index_backfilled") == today:
+        return
+    if db.claim_setting("document_index_backfill_claim", today, stale_after=BACKFILL_CLAIM_SECONDS):
+        threading.Thread(target=_backfill, args=(today,), name="document-index-backfill", daemon=True).start()
+
+
+def search(query, k=DOC_SEARCH_TOP_K):
+    """Top-k passages for a query, best first:
+    [{doc_id, filename, chunk_index, text, distance}].
+    """
+    results = vector_store.query(query, n_results=k, collection=COLLECTION)
+    passages = []
+    for text, meta, distance in zip(
+        results["documents"][0], results["metadatas"][0], results["distances"][0]
+    ):
+        passages.append({
+            "doc_id": meta.get("doc_id"),
+            "filename": meta.get("filename", ""),
+            "chunk_index": meta.get("chunk_index", 0),
+            "text": text,
+            "distance": distance,
+        })
+    return passages
@@ -0,0 +1,164 @@
+"""
+Bulk document upload pipeline.
+
+Stage 1 (process pool): base64-decode, save, hash, extract and chunk each
+file — PyMuPDF is CPU-bound, so this runs across DOC_EXTRACT_WORKERS processes.
+Stage 2 (this process): store the document row and extracted text, embed the
+chunks for search.
+Stage 3 (bounded thread pool): LLM analysis, at most DOC_ANALYSIS_CONCURRENCY
+files at a time (the LLM scheduler still applies its own rate limits).
+
+Progress is reported per file through an on_progress(states) callback.
+"""
+
+import base64
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from config import UPLOADS_DIR, DOC_EXTRACT_WORKERS, DOC_ANALYSIS_CONCURRENCY
+
+QUEUED = "queued"
+EXTRACTING = "extracting"
+INDEXING = "indexing"
+ANALYZING = "analyzing"
+DONE = "done"
+FAILED = "failed"
+
+
+def _save_unique(filename, data):
+    """Write `data` under a timestamped name nobody else holds. The "xb" open
+    is what reserves the name, so parallel workers never overwrite each other.
+    Returns the path.
+    """
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(UPLOADS_DIR, f"{stamp}_{filename}")
+    n = 1
+    while True:
+        try:
+            with open(filepath, "xb") as f:
+                f.write(data)
+            return filepath
+        except FileExistsError:
+            filepath = os.path.join(UPLOADS_DIR, f"{stamp}_{n}_{filename}")
+            n += 1
+
+
+def prepare_upload(filename, contents, ext):
+    """Worker-process stage for one file. Returns a dict with filepath, file_size,
+    the text record {content_hash, text, page_offsets}, search chunks, whether
+    the text was already cached and any extraction error (the file is kept).
+    """
+    import db
+    from services import document_text, document_index
+
+    _, content_string = contents.split(",", 1)
+    data = base64.b64decode(content_string)
+
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    filepath = _save_unique(filename, data)
+
+    digest = document_text.content_hash(data)
+    record = db.get_document_text(digest)
+    cached = record is not None
+    error = ""
+    if not cached:
+        try:
+            text, offsets = document_text.extract(data, ext)
+        except Exception as e:
+            text, offsets, error = "", [], str(e)
+        record = {"content_hash": digest, "text": text, "page_offsets": offsets}
+
+    return {
+        "filepath": filepath,
+        "file_size": len(data),
+        "record": record,
+        "cached": cached,
+        "error": error,
+        "chunks": document_index.split_text(record["text"]),
+    }
+
+
+def process_uploads(files, on_progress=None):
+    """Run uploaded files ([(filename, contents, ext)]) through the pipeline.
+    Returns one state dict per file: filename, status, file_size, doc_id, error.
+    """
+    import db
+    from services import document_text, document_index
+    from services.claude_client import analyze_document
+
+    states = [
+        {"filename": name, "status": QUEUED, "file_size": 0, "doc_id": None, "error": ""}
+        for name, _, _ in files
+    ]
+    lock = threading.Lock()
+
+    def update(i, **fields):
+        with lock:
+            states[i].update(fields)
+            if on_progress:
+                on_progress([dict(s) for s in states])
+
+    def analyze(i, doc_id, filename, text):
+        update(i, status=ANALYZING)
+        try:
+            result = analyze_document(filename, text)
+            db.update_document_analysis(doc_id, json.dumps(result, indent=2))
+            update(i, status=DONE)
+        except Exception as e:
+            update(i, status=FAILED, error=f"Analysis failed: {e}")
+
+    if not files:
+        return states
+
+    workers = max(1, min(DOC_EXTRACT_WORKERS, len(files)))
+    with ProcessPoolExecutor(max_workers=workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=max(1, DOC_ANALYSIS_CONCURRENCY)) as analysis_pool:
+        futures = {}
+        for i, (filename, contents, ext) in enumerate(files):
+            futures[extract_pool.submit(prepare_upload, filename, contents, ext)] = i
+            update(i, status=EXTRACTING)
+
+        analyses = []
+        for future in as_completed(futures):
+            i = futures[future]
+            filename, _, ext = files[i]
+            try:
+                prepared = future.result()
+            except Exception as e:
+                update(i, status=FAILED, error=f"Extraction failed: {e}")
+                continue
+
+            update(i, status=INDEXING, file_size=prepared["file_size"])
+            doc_id = db.save_document(
+                filename=filename,
+                filepath=prepared["filepath"],
+                file_type=ext,
+                file_size=prepared["file_size"],
+            )
+            record = prepared["record"]
+            if prepared["cached"]:
+                db.set_document_hash(doc_id, record["content_hash"])
+            elif not prepared["error"]:
+                document_text.save(doc_id, record)
+            update(i, doc_id=doc_id)
+
+            text = record["text"]
+            if prepared["error"]:
+                text = f"[Text extraction failed: {prepared['error']}]"
+            elif ext == ".pdf" and not text.strip():
+                text = f"[PDF file: {filename}. No extractable text found.]"
+            elif prepared["chunks"]:
+                # Placeholders above go to the analysis only, never into search
+                try:
+                    document_index.index_document(doc_id, filename, text, chunks=prepared["chunks"])
+                except Exception as e:
+                    print(f"Document indexing failed for {filename}: {e}")
+
+            analyses.append(analysis_pool.submit(analyze, i, doc_id, filename, text))
+
+        for future in analyses:
+            future.result()
+
+    return states
@@ -0,0 +1,99 @@
+"""
+Extracted text for uploaded documents — extracted once per unique file content
+and stored in the document_text table (keyed by SHA-256 of the file bytes,
+with page start offsets for PDFs). Every reader goes through get_text().
+"""
+
+import hashlib
+import os
+import db
+
+TEXT_TYPES = (".txt", ".md", ".csv", ".json")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_hash(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def extract(data, file_type):
+    """Extract text from raw file bytes. Returns (text, page_offsets);
+    page_offsets[i] is the character offset where page i starts (PDFs only).
+    """
+    file_type = (file_type or "").lower()
+    if not file_type.startswith("."):
+        file_type = f".{file_type}"
+    if file_type in TEXT_TYPES:
+        return data.decode("utf-8", errors="replace"), []
+    if file_type == ".pdf":
+        import fitz  # pymupdf
+        pdf = fitz.open(stream=data, filetype="pdf")
+        pages, offsets, pos = [], [], 0
+        for page in pdf:
+            text = page.get_text()
+            offsets.append(pos)
+            pages.append(text)
+            pos += len(text) + 2
+        pdf.close()
+        return "\n\n".join(pages), offsets
+    return "", []
+
+
+def store(doc_id, data, file_type):
+    """Extract (or reuse) text for freshly uploaded bytes and link it to the document.
+    Returns the cached record {content_hash, text, page_offsets}.
+    """
+    digest = content_hash(data)
+    record = db.get_document_text(digest)
+    if record is None:
+        text, offsets = extract(data, file_type)
+        record = {"content_hash": digest, "text": text, "page_offsets": offsets}
+        return save(doc_id, record)
+    db.set_document_hash(doc_id, digest)
+    return record
+
+
+def save(doc_id, record):
+    """Store an extraction made elsewhere (e.g. in a worker process) and link it."""
+    db.save_document_text(record["content_hash"], record["text"], record["page_offsets"])
+    db.set_document_hash(doc_id, record["content_hash"])
+    return record
+
+
+def get_record(doc):
+    """Cached text record for a documents row, extracting on first access.
+    Returns None if the file is missing or can't be extracted.
+    """
+    digest = doc.get("content_hash") or ""
+    if digest:
+        record = db.get_document_text(digest)
+        if record is not None:
+            return record
+
+    filepath = doc.get("filepath", "")
+    if not filepath or not os.path.exists(filepath):
+        return None
+    try:
+        digest = _file_hash(filepath)
+        record = db.get_document_text(digest)
+        if record is None:
+            with open(filepath, "rb") as f:
+                return store(doc["id"], f.read(), doc.get("file_type", ""))
+        db.set_document_hash(doc["id"], digest)
+        return record
+    except Exception as e:
+        print(f"Text extraction failed for {doc.get('filename', filepath)}: {e}")
+        return None
+
+
+def get_text(doc):
+    """Extracted text for a documents row ("" if unavailable)."""
+    record = get_record(doc)
+    return record["text"] if record else ""
@@ -239,10 +239,11 @@ def _is_robot_sender(sender):
     return any(pat in sender_lower for pat in _IGNORED_SENDER_PATTERNS)
 
 
-def scan_and_process_inbox():
+def scan_and_process_inbox(progress=None):
     """
     Fetch new emails from IMAP and process each through AI pipeline.
     Skips automated/robot senders.
+    progress: optional callable(done, total) invoked after each email.
     Returns summary dict: {fetched, processed, tasks_created, errors, skipped, results}.
     """
     emails = check_inbox()
@@ -256,7 +257,9 @@ def scan_and_process_inbox():
     errors = 0
     results = []
 
-    for em in emails:
+    for i, em in enumerate(emails):
+        if progress:
+            progress(i, fetched)
         try:
             result = process_incoming_email(em["sender"], em["subject"], em["body"])
             if result.get("created_task_id"):
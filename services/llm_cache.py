@@ -0,0 +1,118 @@
+"""
+Content-addressed LLM response cache — diskcache-backed, TTL + LRU bounded.
+
+Keys are a SHA-256 of (model, feature, prompt template version, input), so an
+identical request returns the stored response instead of a new paid call.
+Editing a template or switching model changes the key automatically.
+"""
+
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+from config import LLM_CACHE_ENABLED, LLM_CACHE_DIR, LLM_CACHE_TTL, LLM_CACHE_SIZE_LIMIT
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Per-feature hit/miss counters since process start
+_stats = {}
+_stats_lock = threading.Lock()
+
+# Set by disabled() on threads that must neither read nor write the cache
+_local = threading.local()
+
+
+def _get_cache():
+    """Lazy-init the on-disk cache. Returns None if caching is unavailable."""
+    global _cache
+    if not LLM_CACHE_ENABLED or diskcache is None:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = diskcache.Cache(
+                    LLM_CACHE_DIR,
+                    size_limit=LLM_CACHE_SIZE_LIMIT,
+                    eviction_policy="least-recently-used",
+                )
+    return _cache
+
+
+def _count(feature, field):
+    with _stats_lock:
+        stats = _stats.setdefault(feature, {"hits": 0, "misses": 0, "bypassed": 0})
+        stats[field] += 1
+
+
+def make_key(model, feature, version, *inputs):
+    """Build the cache key for a call from its model, feature, template version
+    (prompt_registry.PromptTemplate.version) and inputs.
+    """
+    payload = json.dumps([model, feature, version, list(inputs)], sort_keys=True, default=str)
+    return f"{feature}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def get(feature, key, bypass=False):
+    """Return the cached response for key, or None on a miss.
+    With bypass=True the lookup is skipped (the caller will overwrite the entry).
+    """
+    cache = _get_cache()
+    if cache is None:
+        return None
+    if bypass or getattr(_local, "disabled", False):
+        _count(feature, "bypassed")
+        return None
+    try:
+        value = cache.get(key)
+    except Exception:
+        value = None
+    _count(feature, "hits" if value is not None else "misses")
+    return value
+
+
+def put(key, value):
+    """Store a response under key with the configured TTL."""
+    cache = _get_cache()
+    if cache is None or value is None or getattr(_local, "disabled", False):
+        return
+    try:
+        cache.set(key, value, expire=LLM_CACHE_TTL)
+    except Exception as e:
+        print(f"LLM cache write error: {e}")
+
+
+@contextmanager
+def disabled():
+    """Skip cache lookups and writes on this thread, e.g. while the evaluation
+    harness replays fixtures through a candidate route."""
+    previous = getattr(_local, "disabled", False)
+    _local.disabled = True
+    try:
+        yield
+    finally:
+        _local.disabled = previous
+
+
+def get_stats():
+    """Return per-feature hit/miss/bypass counters plus cache size on disk."""
+    with _stats_lock:
+        features = {feature: dict(stats) for feature, stats in _stats.items()}
+    cache = _get_cache()
+    return {
+        "enabled": cache is not None,
+        "entries": len(cache) if cache is not None else 0,
+        "size_bytes": cache.volume() if cache is not None else 0,
+        "features": features,
+    }
+
+
+def clear():
+    """Remove every cached response."""
+    cache = _get_cache()
+    if cache is not None:
+        cache.clear()
@@ -0,0 +1,334 @@
+"""
+Central scheduler for Claude API calls — request/token-per-minute buckets,
+priority classes, retries with jittered backoff, and a circuit breaker.
+
+Every messages.create() goes through create(). Interactive work (chat) is
+admitted ahead of user-triggered jobs, which go ahead of background work
+(inbox triage, draft generation). Limits are per process; background
+callbacks run in their own worker processes with their own buckets.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+import db
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+from config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_BREAKER_THRESHOLD,
+    LLM_BREAKER_COOLDOWN,
+    LLM_BREAKER_TRIAL_TIMEOUT,
+)
+
+INTERACTIVE = 0
+USER = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", USER: "user", BACKGROUND: "background"}
+
+# Priority class per feature; unknown features are treated as user jobs
+FEATURE_PRIORITY = {
+    "chat": INTERACTIVE,
+    "chat_summary": INTERACTIVE,
+    "document_search": INTERACTIVE,
+    "meeting_summary": USER,
+    "document_analysis": USER,
+    "daily_priorities": USER,
+    "exec_plan": USER,
+    "profile_build": USER,
+    "triage": BACKGROUND,
+    "persona_reply": BACKGROUND,
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# Rate limited / overloaded: the API is up and asked us to slow down, so these
+# pause every caller (_paused_until) but never count toward the circuit breaker
+THROTTLE_STATUS = {429, 529}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `per_minute` units."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def adjust(self, delta):
+        """Correct an earlier estimate once the real usage is known."""
+        self.level = min(self.capacity, self.level - delta)
+
+
+_cond = threading.Condition()
+_queue = []  # heap of (priority, seq)
+_seq = itertools.count()
+_in_flight = 0
+_paused_until = 0.0  # set from retry-after on 429/529 so every caller backs off
+_requests = TokenBucket(LLM_REQUESTS_PER_MINUTE)
+_tokens = TokenBucket(LLM_TOKENS_PER_MINUTE)
+
+_breaker = {"state": "closed", "failures": 0, "opened_at": 0.0, "trial_started": 0.0}
+
+_metrics = {
+    "calls": 0,
+    "errors": 0,
+    "retries": 0,
+    "throttled": 0,
+    "rejected_open_circuit": 0,
+    "max_queue_depth": 0,
+    "wait": {name: {"count": 0, "total_s": 0.0, "max_s": 0.0} for name in PRIORITY_NAMES.values()},
+}
+
+
+def estimate_tokens(kwargs):
+    """Rough input + output token estimate for a messages.create() call."""
+    chars = len(str(kwargs.get("system", ""))) + len(str(kwargs.get("messages", "")))
+    return chars // 4 + kwargs.get("max_tokens", 1024)
+
+
+def _acquire(priority, cost):
+    """Block until this request is at the head of the queue and both buckets
+    (and the concurrency limit) allow it through. Returns seconds waited.
+    """
+    global _in_flight
+    entry = (priority, next(_seq))
+    start = time.monotonic()
+    with _cond:
+        heapq.heappush(_queue, entry)
+        _metrics["max_queue_depth"] = max(_metrics["max_queue_depth"], len(_queue))
+        while True:
+            now = time.monotonic()
+            if _queue[0] == entry and _in_flight < LLM_MAX_CONCURRENCY:
+                wait = max(
+                    _paused_until - now,
+                    _requests.wait_time(1, now),
+                    _tokens.wait_time(cost, now),
+                )
+                if wait <= 0:
+                    break
+                _cond.wait(timeout=wait)
+            else:
+                _cond.wait(timeout=1.0)
+        heapq.heappop(_queue)
+        _requests.take(1)
+        _tokens.take(min(cost, _tokens.capacity))
+        _in_flight += 1
+        _cond.notify_all()
+    return time.monotonic() - start
+
+
+def _release(actual_tokens=None, estimated=0):
+    global _in_flight
+    with _cond:
+        _in_flight -= 1
+        if actual_tokens is not None:
+            _tokens.adjust(actual_tokens - min(estimated, _tokens.capacity))
+        _cond.notify_all()
+
+
+def _record_wait(priority, waited):
+    with _cond:
+        stats = _metrics["wait"][PRIORITY_NAMES[priority]]
+        stats["count"] += 1
+        stats["total_s"] += waited
+        stats["max_s"] = max(stats["max_s"], waited)
+
+
+def _check_breaker():
+    """Raise CircuitOpenError while open; after the cooldown let a single
+    trial call through (half-open) and keep rejecting others until it settles.
+    A trial that hasn't settled within LLM_BREAKER_TRIAL_TIMEOUT is presumed
+    lost and the next caller becomes the trial. Returns the trial's token
+    (its start time) when this call is the trial, else None.
+    """
+    with _cond:
+        state = _breaker["state"]
+        now = time.monotonic()
+        if (state == "open" and now - _breaker["opened_at"] >= LLM_BREAKER_COOLDOWN) or \
+                (state == "half_open" and now - _breaker["trial_started"] >= LLM_BREAKER_TRIAL_TIMEOUT):
+            _breaker.update(state="half_open", trial_started=now)
+            return now
+        if state in ("open", "half_open"):
+            _metrics["rejected_open_circuit"] += 1
+            raise CircuitOpenError("Claude API temporarily unavailable — too many recent failures.")
+        return None
+
+
+def _breaker_success():
+    with _cond:
+        _breaker.update(state="closed", failures=0)
+
+
+def _breaker_failure():
+    with _cond:
+        _breaker["failures"] += 1
+        if _breaker["state"] == "half_open" or _breaker["failures"] >= LLM_BREAKER_THRESHOLD:
+            _breaker.update(state="open", opened_at=time.monotonic())
+            print(f"LLM circuit breaker opened after {_breaker['failures']} failures")
+
+
+def _settle_trial(trial):
+    """Re-open the breaker if the half-open trial ended without closing or
+    re-opening it (throttled out of retries, or any other exit)."""
+    with _cond:
+        if _breaker["state"] == "half_open" and _breaker["trial_started"] == trial:
+            _breaker.update(state="open", opened_at=time.monotonic())
+            print("LLM circuit breaker re-opened: half-open trial did not succeed")
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's retry-after if given,
+    otherwise exponential backoff with full jitter.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _is_retryable(error):
+    if anthropic is None:
+        return False
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    return False
+
+
+def record_call(feature, model, started, response=None, error=None, priority=USER,
+                prompt_version=None, attempt=1, queue_s=0.0):
+    """Write one llm_calls telemetry row. `started` is the time.monotonic()
+    at which the request was sent. Calls are non-streaming, so no time to
+    first token is recorded. Never raises.
+    """
+    usage = getattr(response, "usage", None)
+    try:
+        db.log_llm_call(
+            feature=feature,
+            model=model or "",
+            priority=PRIORITY_NAMES.get(priority, ""),
+            prompt_version=prompt_version or "",
+            attempt=attempt,
+            status="ok" if error is None else "error",
+            error_class=type(error).__name__ if error is not None else "",
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_creation_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            queue_ms=queue_s * 1000,
+            latency_ms=(time.monotonic() - started) * 1000,
+        )
+    except Exception as e:
+        print(f"LLM telemetry write error: {e}")
+
+
+def create(client, feature, prompt_version=None, **kwargs):
+    """client.messages.create(**kwargs) under the scheduler's limits.
+    Retries transient failures (429/529/5xx/connection errors) and raises the
+    last error once retries are exhausted, so callers keep their own fallbacks.
+    Only 5xx and connection errors count toward the circuit breaker.
+    Every attempt is logged to llm_calls.
+    """
+    global _paused_until
+    priority = FEATURE_PRIORITY.get(feature, USER)
+    cost = estimate_tokens(kwargs)
+    model = kwargs.get("model")
+
+    # Only new requests are rejected; one already retrying ends with its own error
+    trial = _check_breaker()
+    try:
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            waited = _acquire(priority, cost)
+            _record_wait(priority, waited)
+            started = time.monotonic()
+            try:
+                response = client.messages.create(**kwargs)
+            except Exception as e:
+                _release()
+                record_call(feature, model, started, error=e, priority=priority,
+                            prompt_version=prompt_version, attempt=attempt + 1, queue_s=waited)
+                retryable = _is_retryable(e)
+                with _cond:
+                    _metrics["errors"] += 1
+                if not retryable:
+                    # The API answered (e.g. a 400) — it is reachable, so don't trip the breaker
+                    _breaker_success()
+                    raise
+                status = getattr(e, "status_code", None)
+                throttled = status in THROTTLE_STATUS
+                if status is None or (status >= 500 and not throttled):  # connection error or 5xx
+                    _breaker_failure()
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(e, attempt)
+                with _cond:
+                    _metrics["retries"] += 1
+                    if throttled:
+                        _metrics["throttled"] += 1
+                        _paused_until = max(_paused_until, time.monotonic() + delay)
+                time.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage", None)
+            actual = None
+            if usage is not None:
+                actual = (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0)
+            _release(actual, cost)
+            record_call(feature, model, started, response=response, priority=priority,
+                        prompt_version=prompt_version, attempt=attempt + 1, queue_s=waited)
+            _breaker_success()
+            with _cond:
+                _metrics["calls"] += 1
+            return response
+    finally:
+        if trial is not None:
+            _settle_trial(trial)
+
+
+def get_metrics():
+    """Snapshot of queue depth, in-flight calls, waits per priority and breaker state."""
+    with _cond:
+        snapshot = {key: value for key, value in _metrics.items() if key != "wait"}
+        snapshot["wait"] = {
+            name: {**stats, "avg_s": stats["total_s"] / stats["count"] if stats["count"] else 0.0}
+            for name, stats in _metrics["wait"].items()
+        }
+        snapshot["queue_depth"] = len(_queue)
+        snapshot["in_flight"] = _in_flight
+        snapshot["circuit"] = _breaker["state"]
+        return snapshot
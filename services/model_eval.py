@@ -0,0 +1,206 @@
+"""
+Offline model-route evaluation — replay recorded fixtures through alternative
+models and compare output agreement and latency.
+
+Fixtures are recorded from live traffic when MODEL_EVAL_RECORD=true: each
+successful triage, meeting summary and document analysis appends its inputs
+and parsed output to EVAL_FIXTURES_DIR/<feature>.jsonl. The recorded output
+is the reference each candidate route is scored against.
+
+Replays neither read nor write the production response cache, and record
+fixtures only when run with --record.
+
+Run: python -m services.model_eval triage --models claude-3-5-haiku-20241022 claude-sonnet-4-20250514
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import EVAL_FIXTURES_DIR, MODEL_EVAL_RECORD
+
+_write_lock = threading.Lock()
+
+# Per-thread recording switch; replays set it (off unless asked) in _replaying()
+_local = threading.local()
+
+
+def _fixture_path(feature):
+    return os.path.join(EVAL_FIXTURES_DIR, f"{feature}.jsonl")
+
+
+def record_fixture(feature, inputs, output, model):
+    """Append one recorded call to the feature's fixture file (if recording is on)."""
+    if not getattr(_local, "record", MODEL_EVAL_RECORD):
+        return
+    line = json.dumps({
+        "inputs": inputs,
+        "output": output,
+        "model": model,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }, default=str)
+    try:
+        os.makedirs(EVAL_FIXTURES_DIR, exist_ok=True)
+        with _write_lock, open(_fixture_path(feature), "a") as f:
+            f.write(line + "\n")
+    except Exception as e:
+        print(f"Eval fixture write error: {e}")
+
+
+def load_fixtures(feature, limit=None):
+    path = _fixture_path(feature)
+    if not os.path.exists(path):
+        return []
+    fixtures = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                fixtures.append(json.loads(line))
+    return fixtures[-limit:] if limit else fixtures
+
+
+# ── Scoring (reference output vs candidate output, 0.0–1.0) ──
+
+def _count_similarity(a, b):
+    a, b = len(a or []), len(b or [])
+    if a == b:
+        return 1.0
+    return min(a, b) / max(a, b)
+
+
+def _overlap(a, b):
+    a = {str(x).lower().strip() for x in (a or [])}
+    b = {str(x).lower().strip() for x in (b or [])}
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _score_triage(ref, out):
+    if out.get("summary") == "Could not process email.":
+        return 0.0
+    score = 0.5 * (out.get("urgency") == ref.get("urgency"))
+    score += 0.3 * (bool(out.get("should_create_task")) == bool(ref.get("should_create_task")))
+    score += 0.2 * _count_similarity(ref.get("action_items"), out.get("action_items"))
+    return score
+
+
+def _score_meeting_summary(ref, out):
+    if str(out.get("summary", "")).startswith("Could not parse"):
+        return 0.0
+    return (
+        0.4
+        + 0.3 * _count_similarity(ref.get("action_items"), out.get("action_items"))
+        + 0.3 * _count_similarity(ref.get("key_decisions"), out.get("key_decisions"))
+    )
+
+
+def _score_document_analysis(ref, out):
+    if str(out.get("summary", "")).startswith("Could not analyze"):
+        return 0.0
+    return (
+        0.4
+        + 0.3 * _overlap(ref.get("entities"), out.get("entities"))
+        + 0.3 * _count_similarity(ref.get("key_insights"), out.get("key_insights"))
+    )
+
+
+def _runners():
+    from services import claude_client
+    return {
+        "triage": (
+            lambda i: claude_client.process_email(i["sender"], i["subject"], i["body"]),
+            _score_triage,
+        ),
+        "meeting_summary": (
+            lambda i: claude_client.summarize_meeting(i["raw_notes"]),
+            _score_meeting_summary,
+        ),
+        "document_analysis": (
+            lambda i: claude_client.analyze_document(i["filename"], i["content"]),
+            _score_document_analysis,
+        ),
+    }
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+
+@contextmanager
+def _replaying(record):
+    """Run calls on this thread outside the response cache, recording fixtures
+    only if `record` is set."""
+    from services import llm_cache
+    previous = getattr(_local, "record", None)
+    _local.record = record
+    try:
+        with llm_cache.disabled():
+            yield
+    finally:
+        if previous is None:
+            del _local.record
+        else:
+            _local.record = previous
+
+
+def run_eval(feature, routes, limit=None, record=False):
+    """Replay fixtures for `feature` through each route ({"model", "max_tokens"}).
+    Returns one result dict per route: model, cases, mean score, p50/p95 latency.
+    With record=True each candidate's outputs are appended as new fixtures.
+    """
+    from services import model_router
+
+    runners = _runners()
+    if feature not in runners:
+        raise ValueError(f"No evaluation runner for feature '{feature}'. Choose from {sorted(runners)}")
+    run, score = runners[feature]
+    fixtures = load_fixtures(feature, limit)
+
+    results = []
+    for route in routes:
+        scores, latencies = [], []
+        with model_router.using(feature, **route), _replaying(record):
+            for fixture in fixtures:
+                start = time.monotonic()
+                output = run(fixture["inputs"])
+                latencies.append(time.monotonic() - start)
+                scores.append(score(fixture["output"], output))
+        results.append({
+            "model": route.get("model"),
+            "max_tokens": route.get("max_tokens"),
+            "cases": len(fixtures),
+            "score": sum(scores) / len(scores) if scores else 0.0,
+            "p50_s": _percentile(latencies, 50),
+            "p95_s": _percentile(latencies, 95),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model routes on recorded fixtures.")
+    parser.add_argument("feature", help="triage, meeting_summary or document_analysis")
+    parser.add_argument("--models", nargs="+", required=True, help="Models to compare")
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None, help="Use only the most recent N fixtures")
+    parser.add_argument("--record", action="store_true", help="Append candidate outputs as new fixtures")
+    args = parser.parse_args()
+
+    import db
+    db.init_db()
+    routes = [{"model": m, "max_tokens": args.max_tokens} for m in args.models]
+    results = run_eval(args.feature, routes, args.limit, record=args.record)
+
+    print(f"{'model':40} {'cases':>6} {'score':>6} {'p50':>7} {'p95':>7}")
+    for r in results:
+        print(f"{r['model']:40} {r['cases']:>6} {r['score']:>6.2f} {r['p50_s']:>6.1f}s {r['p95_s']:>6.1f}s")
+
+
+if __name__ == "__main__":
+    main()
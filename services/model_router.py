@@ -0,0 +1,59 @@
+"""
+Per-feature model routing — which model and max_tokens each LLM feature uses.
+
+Defaults come from config.MODEL_ROUTES, overridden by the "model_routes"
+setting (JSON), and finally by a thread-local override used by the offline
+evaluation harness to replay fixtures against alternative routes.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from config import ANTHROPIC_MODEL, MODEL_ROUTES
+import db
+
+DEFAULT_ROUTE = {"model": ANTHROPIC_MODEL, "max_tokens": 2048}
+
+_local = threading.local()
+
+
+def _setting_overrides():
+    raw = db.get_setting("model_routes", "")
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        return overrides if isinstance(overrides, dict) else {}
+    except Exception:
+        return {}
+
+
+def get_route(feature):
+    """Return {"model", "max_tokens"} for a feature."""
+    route = dict(MODEL_ROUTES.get(feature, DEFAULT_ROUTE))
+    override = _setting_overrides().get(feature)
+    if isinstance(override, dict):
+        route.update({k: v for k, v in override.items() if k in ("model", "max_tokens") and v})
+    route.update(getattr(_local, "overrides", {}).get(feature, {}))
+    return route
+
+
+def get_routes():
+    """Effective route for every known feature (for display)."""
+    return {feature: get_route(feature) for feature in MODEL_ROUTES}
+
+
+@contextmanager
+def using(feature, **route):
+    """Temporarily route `feature` to a different model/max_tokens on this thread."""
+    overrides = getattr(_local, "overrides", {})
+    previous = overrides.get(feature)
+    overrides[feature] = {k: v for k, v in route.items() if k in ("model", "max_tokens") and v}
+    _local.overrides = overrides
+    try:
+        yield
+    finally:
+        if previous is None:
+            overrides.pop(feature, None)
+        else:
+            overrides[feature] = previous
@@ -0,0 +1,418 @@
+"""
+NumPy vector index — exact cosine search over normalized float32 vectors kept
+in a memory-mapped .npy file, with ids, documents and metadata in a SQLite
+sidecar. A zero-dependency alternative to Chroma (VECTOR_BACKEND=numpy) for
+corpora small enough that brute-force top-k is fast.
+
+Rows are dense: deleting moves the last row into the freed slot, so row i of
+vectors.npy always belongs to the sidecar item with row = i. A delete commits
+the new row assignments together with the pending copies (the moves table)
+before touching the arrays; the copies are then applied, and re-applied by
+the next lock holder if that was interrupted. The file is allocated with
+spare capacity and doubled (copied and swapped in) when full.
+Writers serialize on the sidecar's write lock, which also makes them safe
+across processes.
+
+Optional int8 storage (VECTOR_QUANTIZATION=int8) keeps a per-vector-scaled
+int8 copy alongside, a quarter of the float32 size, which is what queries
+scan; the float32 rows are only read back to re-rank the shortlist.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INITIAL_CAPACITY = 1024
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS items (
+        row INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        document TEXT,
+        metadata TEXT NOT NULL DEFAULT '{}'
+    )
+    """,
+    # Array rows still to be copied (src -> dst) after a committed delete
+    """
+    CREATE TABLE IF NOT EXISTS moves (
+        dst INTEGER PRIMARY KEY,
+        src INTEGER NOT NULL
+    )
+    """,
+)
+
+# Metadata fields used in where filters get an expression index in the sidecar
+INDEXED_FIELDS = ("source_type", "contact", "domain", "doc_id")
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _field(key):
+    """SQL expression for a metadata field (matches the expression indexes)."""
+    if not re.fullmatch(r"\w+", key):
+        raise ValueError(f"Unsupported metadata key: {key!r}")
+    return f"json_extract(metadata, '$.{key}')"
+
+
+def _where_sql(where):
+    """Translate a Chroma-style metadata filter into (sql, params)."""
+    if not where:
+        return "1", []
+    clauses, params = [], []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_sql(w) for w in value]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            params.extend(p for _, part_params in parts for p in part_params)
+            continue
+        column = _field(key)
+        op, operand = next(iter(value.items())) if isinstance(value, dict) else ("$eq", value)
+        if op in ("$in", "$nin"):
+            marks = ",".join("?" * len(operand))
+            clauses.append(f"{column} {'IN' if op == '$in' else 'NOT IN'} ({marks})")
+            params.extend(operand)
+        elif op in _OPERATORS:
+            clauses.append(f"{column} {_OPERATORS[op]} ?")
+            params.append(operand)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return " AND ".join(clauses), params
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors):
+    """Scalar int8 codes with one scale per vector: vector ~= codes * scale."""
+    scales = np.maximum(np.abs(vectors).max(axis=1) / 127.0, 1e-12).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def _top_k(scores, k):
+    """Indices and scores of the k best rows per column, best first."""
+    if k < scores.shape[0]:
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+    else:
+        top = np.tile(np.arange(scores.shape[0])[:, None], (1, scores.shape[1]))
+    top_scores = np.take_along_axis(scores, top, axis=0)
+    order = np.argsort(-top_scores, axis=0)
+    return np.take_along_axis(top, order, axis=0), np.take_along_axis(top_scores, order, axis=0)
+
+
+def drop(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class NumpyCollection:
+    """One collection stored under `directory` (vectors.npy + items.db).
+
+    With quantization="int8", codes.npy / scales.npy hold an int8 copy of every
+    vector that is scanned instead of vectors.npy; only the top
+    n_results * rerank candidates are re-scored in full precision, so the float32
+    file stays on disk rather than resident. The codes are kept up to date by
+    every writer once they exist, and built from vectors.npy on first open.
+    """
+
+    def __init__(self, directory, quantization="none", rerank=4):
+        if np is None:
+            raise ImportError("numpy is not installed. Run: pip install numpy")
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unsupported vector quantization: {quantization!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.quantization = quantization
+        self.rerank = max(1, rerank)
+        self.paths = {name: os.path.join(directory, f"{name}.npy") for name in ("vectors", "codes", "scales")}
+        self.db_path = os.path.join(directory, "items.db")
+        self._lock = threading.Lock()
+        self._maps = {}  # name -> (file key, memmap)
+        with self._db(write=True) as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._settle(conn)
+            for field in INDEXED_FIELDS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS items_{field} ON items ({_field(field)})")
+            if quantization == "int8" and not os.path.exists(self.paths["codes"]):
+                self._build_codes(conn)
+
+    @contextmanager
+    def _db(self, write=False):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _map(self, name="vectors"):
+        """A memmap by name, re-opened if another process grew the file."""
+        path = self.paths[name]
+        if not os.path.exists(path):
+            self._maps.pop(name, None)
+            return None
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_size)
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, np.load(path, mmap_mode="r+"))
+            self._maps[name] = cached
+        return cached[1]
+
+    def _stored(self):
+        """Names of the arrays writers must keep in sync."""
+        if self.quantization == "int8" or os.path.exists(self.paths["codes"]):
+            return ("vectors", "codes", "scales")
+        return ("vectors",)
+
+    def _allocate(self, name, capacity, dim, source=None, count=0):
+        """Write a fresh `capacity`-row file for `name`, copying `count` rows from source."""
+        dtype, shape = {
+            "vectors": (np.float32, (capacity, dim)),
+            "codes": (np.int8, (capacity, dim)),
+            "scales": (np.float32, (capacity,)),
+        }[name]
+        tmp_path = self.paths[name] + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+        if source is not None and count:
+            grown[:count] = source[:count]
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self.paths[name])
+
+    def _build_codes(self, conn, block=16384):
+        """Quantize the existing vectors (called with the write lock held).
+        codes.npy is swapped in last, so an interrupted build is simply redone.
+        """
+        vectors = self._map()
+        if vectors is None:
+            return
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        capacity, dim = vectors.shape
+        self._allocate("scales", capacity, dim)
+        scales = self._map("scales")
+        tmp_path = self.paths["codes"] + ".tmp"
+        codes = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.int8, shape=(capacity, dim))
+        for i in range(0, count, block):
+            codes[i:i + block], scales[i:i + block] = _quantize(vectors[i:i + block])
+        codes.flush()
+        scales.flush()
+        del codes
+        os.replace(tmp_path, self.paths["codes"])
+
+    def _reserve(self, count, needed, dim):
+        """Ensure capacity for `needed` rows in every stored array, copying the
+        first `count` rows into larger files. Returns {name: memmap}.
+        """
+        arrays = {name: self._map(name) for name in self._stored()}
+        current = arrays["vectors"].shape[0] if arrays["vectors"] is not None else 0
+        capacity = current if current >= needed else max(INITIAL_CAPACITY, needed, 2 * current)
+        for name, array in arrays.items():
+            if array is None or array.shape[0] < capacity:
+                self._allocate(name, capacity, dim, source=array, count=count)
+                arrays[name] = self._map(name)
+        return arrays
+
+    def _settle(self, conn):
+        """Apply the array copies of a committed delete (called with the write
+        lock held, before anything else touches the arrays). Sources all lie
+        past the live rows and are never written before this runs, so an
+        interrupted copy is simply redone.
+        """
+        moves = conn.execute("SELECT dst, src FROM moves").fetchall()
+        if not moves:
+            return
+        dst = np.array([m["dst"] for m in moves], dtype=np.int64)
+        src = np.array([m["src"] for m in moves], dtype=np.int64)
+        for array in (self._map(name) for name in self._stored()):
+            if array is not None:
+                array[dst] = array[src]
+                array.flush()
+        conn.execute("DELETE FROM moves")
+
+    def _rows_for(self, conn, ids):
+        found = {}
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT row, id FROM items WHERE id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update((r["id"], r["row"]) for r in rows)
+        return found
+
+    # ── Writes ──
+
+    def upsert(self, ids, documents, embeddings, metadatas=None):
+        """Insert or replace items; existing ids keep their row."""
+        if not ids:
+            return
+        vectors = _normalize(embeddings)
+        metadatas = metadatas or [{}] * len(ids)
+        latest = {item_id: i for i, item_id in enumerate(ids)}  # last occurrence wins
+        with self._lock, self._db(write=True) as conn:
+            self._settle(conn)
+            count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            rows = self._rows_for(conn, latest)
+            next_row = count
+            for item_id in latest:
+                if item_id not in rows:
+                    rows[item_id] = next_row
+                    next_row += 1
+            arrays = self._reserve(count, next_row, vectors.shape[1])
+            order = list(latest)
+            targets = [rows[i] for i in order]
+            values = vectors[[latest[i] for i in order]]
+            arrays["vectors"][targets] = values
+            if "codes" in arrays:
+                arrays["codes"][targets], arrays["scales"][targets] = _quantize(values)
+            for array in arrays.values():
+                array.flush()
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (rows[i], i, documents[latest[i]], json.dumps(metadatas[latest[i]] or {}))
+                    for i in order
+                ],
+            )
+
+    add = upsert
+
+    def delete_ids(self, ids):
+        if not ids:
+            return
+        with self._lock:
+            with self._db(write=True) as conn:
+                self._settle(conn)
+                count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+                moves = {}  # dst -> the moved item's original row
+                # Highest rows first, so the row moved into a gap is never one being deleted
+                for row in sorted(self._rows_for(conn, ids).values(), reverse=True):
+                    last = count - 1
+                    conn.execute("DELETE FROM items WHERE row = ?", (row,))
+                    if row != last:
+                        conn.execute("UPDATE items SET row = ? WHERE row = ?", (row, last))
+                        moves[row] = moves.pop(last, last)
+                    count -= 1
+                conn.executemany("INSERT INTO moves (dst, src) VALUES (?, ?)", moves.items())
+            # The new rows are committed; copy the arrays to match
+            with self._db(write=True) as conn:
+                self._settle(conn)
+
+    def delete_where(self, where):
+        sql, params = _where_sql(where)
+        with self._db() as conn:
+            ids = [r["id"] for r in conn.execute(f"SELECT id FROM items WHERE {sql}", params)]
+        self.delete_ids(ids)
+
+    # ── Reads ──
+
+    def count(self):
+        with self._db() as conn:
+            return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def get_ids(self, limit, offset=0):
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT id FROM items ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [r["id"] for r in rows]
+
+    def get_metadatas(self, where=None):
+        sql, params = _where_sql(where)
+        with self._db() as conn:
+            rows = conn.execute(f"SELECT metadata FROM items WHERE {sql} ORDER BY row", params).fetchall()
+        return [json.loads(r["metadata"]) for r in rows]
+
+    def query(self, embedding, n_results=5, where=None):
+        """Top-k by cosine similarity, optionally pre-filtered on metadata.
+        Returns Chroma's result shape (distance = 1 - cosine similarity).
+        """
+        return self.query_many([embedding], n_results, where)
+
+    def _approximate_scores(self, codes, scales, count, candidates, queries, block=16384):
+        """Cosine scores from the int8 codes, dequantized a block at a time."""
+        total = count if candidates is None else len(candidates)
+        scores = np.empty((total, len(queries)), dtype=np.float32)
+        for i in range(0, total, block):
+            rows = slice(i, min(i + block, total)) if candidates is None else candidates[i:i + block]
+            scores[i:i + block] = (codes[rows].astype(np.float32) @ queries.T) * scales[rows][:, None]
+        return scores
+
+    def query_many(self, embeddings, n_results=5, where=None):
+        """query() for several embeddings in one matrix product; one result
+        list per embedding, in Chroma's shape.
+
+        Runs under the write lock, like the writers, so no delete can move
+        rows between reading the sidecar and scoring the arrays.
+        """
+        queries = _normalize(embeddings)
+        empty = {key: [[] for _ in range(len(queries))] for key in ("ids", "documents", "metadatas", "distances")}
+        with self._lock, self._db(write=True) as conn:
+            self._settle(conn)
+            count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            candidates = None
+            if where:
+                sql, params = _where_sql(where)
+                candidates = np.fromiter(
+                    (r["row"] for r in conn.execute(f"SELECT row FROM items WHERE {sql}", params)),
+                    dtype=np.int64,
+                )
+            mapped = self._map()
+            codes, scales = (self._map("codes"), self._map("scales")) if self.quantization == "int8" else (None, None)
+            if mapped is None or count == 0 or (candidates is not None and candidates.size == 0):
+                return empty
+
+            if codes is None or scales is None:
+                matrix = mapped[:count] if candidates is None else mapped[candidates]
+                top, top_scores = _top_k(matrix @ queries.T, n_results)  # scores: (rows, queries)
+                rows = top if candidates is None else candidates[top]
+            else:
+                approximate = self._approximate_scores(codes, scales, count, candidates, queries)
+                shortlist, _ = _top_k(approximate, n_results * self.rerank)
+                if candidates is not None:
+                    shortlist = candidates[shortlist]
+                # Re-rank the shortlist in full precision, reading only those rows from disk
+                unique = np.unique(shortlist)
+                exact = mapped[unique] @ queries.T
+                exact = exact[np.searchsorted(unique, shortlist), np.arange(queries.shape[0])[None, :]]
+                top, top_scores = _top_k(exact, n_results)
+                rows = np.take_along_axis(shortlist, top, axis=0)
+
+            wanted = sorted({int(r) for r in rows.ravel()})
+            items = {}
+            for i in range(0, len(wanted), 500):
+                batch = wanted[i:i + 500]
+                for r in conn.execute(
+                    f"SELECT * FROM items WHERE row IN ({','.join('?' * len(batch))})", batch
+                ):
+                    items[r["row"]] = r
+
+        result = empty
+        for j in range(rows.shape[1]):
+            for row, score in zip(rows[:, j], top_scores[:, j]):
+                item = items[int(row)]
+                result["ids"][j].append(item["id"])
+                result["documents"][j].append(item["document"])
+                result["metadatas"][j].append(json.loads(item["metadata"]))
+                result["distances"][j].append(float(1.0 - score))
+        return result
@@ -5,24 +5,18 @@ Enforces read-only mode, exclusion rules, and automation levels.
 """
 
 import json
-import os
 import re
 import hashlib
-from datetime import datetime
-from config import PROMPTS_DIR, ANTHROPIC_MODEL
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
 import db
+from config import PERSONA_SYNC_PAGE, PERSONA_REPLY_EXAMPLES, PERSONA_DRAFT_CONCURRENCY
+from services import prompt_registry, llm_scheduler, model_router
 
 
 # ── Helpers ──
 
-def _load_prompt(filename):
-    path = os.path.join(PROMPTS_DIR, filename)
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return f.read()
-    return ""
-
-
 def _get_claude_client():
     from services.claude_auth import get_claude_client
     return get_claude_client()
@@ -92,6 +86,8 @@ def ingest_emails():
         for chunk in chunks:
             if len(chunk) < 20:
                 continue
+            # The emails table keeps no To: address, so IMAP samples carry no
+            # recipient and only reach drafts through the partition-wide tiers
             metadata = json.dumps({
                 "email_id": email_data.get("id"),
                 "subject": email_data.get("subject", ""),
@@ -106,26 +102,30 @@ def ingest_emails():
 
 def ingest_documents():
     """Ingest uploaded documents as persona training data."""
+    from services import document_text
+
     documents = db.get_documents()
-    ingested = 0
 
+    # Files already ingested, by content hash; samples from before hashes were
+    # recorded fall back to their doc_id
+    existing_hashes, legacy_doc_ids = set(), set()
+    for s in db.get_persona_samples(source_type="document", limit=50000):
+        meta = json.loads(s.get("metadata", "{}"))
+        if meta.get("content_hash"):
+            existing_hashes.add(meta["content_hash"])
+        elif meta.get("doc_id") is not None:
+            legacy_doc_ids.add(meta["doc_id"])
+
+    ingested = 0
     for doc in documents:
-        filepath = doc.get("filepath", "")
-        if not os.path.exists(filepath):
+        if doc.get("id") in legacy_doc_ids:
             continue
-
-        try:
-            if doc.get("file_type", "").lower() == "pdf":
-                import fitz
-                pdf_doc = fitz.open(filepath)
-                text = "\n".join(page.get_text() for page in pdf_doc)
-                pdf_doc.close()
-            else:
-                with open(filepath, "r", errors="replace") as f:
-                    text = f.read()
-        except Exception:
+        record = document_text.get_record(doc)
+        if record is None or record["content_hash"] in existing_hashes:
             continue
+        existing_hashes.add(record["content_hash"])
 
+        text = record["text"]
         if not text.strip() or len(text) < 20:
             continue
 
@@ -136,6 +136,7 @@ def ingest_documents():
             metadata = json.dumps({
                 "doc_id": doc.get("id"),
                 "filename": doc.get("filename", ""),
+                "content_hash": record["content_hash"],
             })
             db.save_persona_sample(chunk, source_type="document", metadata=metadata)
             ingested += 1
@@ -161,34 +162,163 @@ def ingest_chat_export(text):
 
 
 # ── Embedding ──
+#
+# Samples are embedded into one collection per partition (email-style, chat,
+# calendar, documents), so retrieval for a reply searches only comparable
+# writing. Each vector carries contact/domain metadata for filtered search.
+
+SOURCE_PARTITIONS = {
+    "email": "email",
+    "gmail_sent": "email",
+    "slack": "chat",
+    "telegram": "chat",
+    "whatsapp": "chat",
+    "chat": "chat",
+    "calendar": "calendar",
+    "document": "document",
+}
+PARTITIONS = ("email", "chat", "document", "calendar", "other")
+
+# Layout marker in vector_version: bumping it re-syncs every sample
+VECTOR_LAYOUT = "partitioned-1"
+
+# Shared mail providers — a common domain says nothing about the contact
+FREEMAIL_DOMAINS = {"gmail.com", "googlemail.com", "outlook.com", "hotmail.com", "live.com", "yahoo.com", "icloud.com", "me.com", "proton.me", "protonmail.com"}
+
+
+def _partition(source_type):
+    return SOURCE_PARTITIONS.get(source_type, "other")
+
 
-def embed_pending_samples():
-    """Embed all unembedded persona samples into ChromaDB."""
+def _partition_collection(partition):
     from services import vector_store
-    samples = db.get_unembedded_samples()
-    if not samples:
-        return {"embedded": 0}
+    return f"{vector_store.PERSONA_COLLECTION}_{partition}"
 
-    ids = [f"sample_{s['id']}" for s in samples]
-    documents = [s["content"] for s in samples]
-    metadatas = []
-    for s in samples:
-        meta = json.loads(s.get("metadata", "{}"))
-        meta["source_type"] = s["source_type"]
-        metadatas.append({k: str(v) for k, v in meta.items()})
 
-    vector_store.add_documents(ids, documents, metadatas)
+def _contact_fields(address):
+    """{"contact", "domain"} for an address like 'Name <a@b.com>, c@d.com' (first one)."""
+    contact = _extract_sender_email((address or "").split(",")[0])
+    domain = contact.rpartition("@")[2] if "@" in contact else ""
+    return {"contact": contact if domain else "", "domain": domain}
+
 
-    for s in samples:
-        db.mark_sample_embedded(s["id"])
+def vector_collections():
+    """Names of the persona partition collections."""
+    return [_partition_collection(p) for p in PARTITIONS]
 
-    return {"embedded": len(samples)}
+
+def get_vector_count():
+    """Vectors across all persona partitions."""
+    from services import vector_store
+    return sum(vector_store.get_count(name) for name in vector_collections())
+
+
+def _sample_id(vector_id):
+    """persona_samples id for a vector id ("sample_<id>"), or None."""
+    prefix, _, number = vector_id.partition("_")
+    return int(number) if prefix == "sample" and number.isdigit() else None
+
+
+def _delete_orphan_vectors(page_size):
+    """Delete vectors whose sample no longer exists (or moved to another
+    partition), one page at a time.
+    """
+    from services import vector_store
+    removed = 0
+    for partition in PARTITIONS:
+        collection = _partition_collection(partition)
+        offset = 0
+        while True:
+            ids = vector_store.get_ids(limit=page_size, offset=offset, collection=collection)
+            if not ids:
+                break
+            sources = db.get_persona_sample_sources(
+                n for n in (_sample_id(i) for i in ids) if n is not None
+            )
+            orphans = [
+                i for i in ids
+                if _sample_id(i) not in sources or _partition(sources[_sample_id(i)]) != partition
+            ]
+            vector_store.delete_ids(orphans, collection=collection)
+            removed += len(orphans)
+            offset += len(ids) - len(orphans)
+    return removed
+
+
+def _vector_version():
+    from services import vector_store
+    return f"{vector_store.embedding_version()}|{VECTOR_LAYOUT}"
+
+
+def embed_pending_samples(page_size=PERSONA_SYNC_PAGE, progress=None):
+    """Reconcile persona_samples with the partitioned vector collections:
+    upsert samples that are new, edited or embedded by another embedding
+    version or layout, page by page, then delete vectors of removed samples.
+
+    Each page is upserted before it is marked, so an interrupted sync simply
+    redoes its last page on the next run. progress: optional callable(done).
+    """
+    from services import vector_store
+    version = _vector_version()
+    embedded = after_id = 0
+    while True:
+        samples = db.get_samples_to_embed(version, after_id, page_size)
+        if not samples:
+            break
+        by_partition = {}
+        for s in samples:
+            meta = json.loads(s.get("metadata", "{}"))
+            meta["source_type"] = s["source_type"]
+            meta.update(_contact_fields(meta.get("recipient", "")))
+            ids, documents, metadatas = by_partition.setdefault(_partition(s["source_type"]), ([], [], []))
+            ids.append(f"sample_{s['id']}")
+            documents.append(s["content"])
+            metadatas.append({k: str(v) for k, v in meta.items()})
+
+        for partition, (ids, documents, metadatas) in by_partition.items():
+            vector_store.upsert_documents(ids, documents, metadatas, collection=_partition_collection(partition))
+        db.mark_samples_embedded([s["id"] for s in samples], version)
+        embedded += len(samples)
+        after_id = samples[-1]["id"]
+        if progress:
+            progress(embedded)
+
+    # The single pre-partitioning collection is superseded once everything is re-synced
+    if db.get_setting("persona_vectors_layout") != VECTOR_LAYOUT:
+        vector_store.delete_collection(vector_store.PERSONA_COLLECTION)
+        db.save_setting("persona_vectors_layout", VECTOR_LAYOUT)
+
+    return {"embedded": embedded, "removed": _delete_orphan_vectors(page_size)}
+
+
+def _background_sync():
+    try:
+        result = embed_pending_samples()
+        print(f"Persona vector sync: {result['embedded']} embedded, {result['removed']} removed")
+    except Exception as e:
+        print(f"Persona vector sync failed: {e}")
+
+
+def start_vector_sync():
+    """At startup, sync on a background thread if any sample still needs
+    embedding, e.g. after an upgrade changed VECTOR_LAYOUT or the embedding
+    model changed. One process per day claims it, so workers don't all embed.
+    """
+    version = _vector_version()
+    if not db.get_samples_to_embed(version, 0, 1):
+        return
+    if not db.claim_setting("persona_vector_sync", f"{version}|{date.today().isoformat()}"):
+        return
+    threading.Thread(target=_background_sync, name="persona-vector-sync", daemon=True).start()
 
 
 # ── Profile Building ──
 
-def build_persona_profile():
-    """Sample emails and call Claude to extract a writing style fingerprint."""
+def build_persona_profile(bypass_cache=False):
+    """Sample emails and call Claude to extract a writing style fingerprint.
+    The sample is seeded from the pool's content, so an unchanged corpus yields
+    the same prompt and is served from the response cache unless bypass_cache=True.
+    """
     client = _get_claude_client()
     if not client:
         return {"error": "No API key configured"}
@@ -199,27 +329,46 @@ def build_persona_profile():
 
     import random
     sample_pool = samples[:200]
-    selected = random.sample(sample_pool, min(50, len(sample_pool)))
+    pool_hash = hashlib.md5("\n".join(s["content"] for s in sample_pool).encode()).hexdigest()
+    selected = random.Random(pool_hash).sample(sample_pool, min(50, len(sample_pool)))
 
     corpus = "\n\n---\n\n".join(s["content"] for s in selected)
 
-    prompt_template = _load_prompt("persona_analysis_prompt.md")
-    if not prompt_template:
+    template = prompt_registry.get("persona_analysis_prompt.md")
+    if not template:
         return {"error": "Persona analysis prompt not found"}
 
-    prompt = prompt_template.replace("{corpus}", corpus)
+    from services.claude_client import cached_block
+    from services import llm_cache
+
+    # Static analysis instructions are the cached prefix; the sampled corpus varies
+    content = [
+        cached_block(template.text),
+        {"type": "text", "text": f"## Corpus\n\n{corpus}"},
+    ]
+
+    route = model_router.get_route("profile_build")
+    cache_key = llm_cache.make_key(
+        route["model"], "profile_build", template.version, corpus
+    )
+    profile = llm_cache.get("profile_build", cache_key, bypass=bypass_cache)
+    if profile is not None:
+        db.save_setting("persona_profile", json.dumps(profile))
+        return {"success": True, "profile": profile}
 
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}],
+        response = llm_scheduler.create(
+            client, "profile_build", prompt_version=template.version,
+            model=route["model"],
+            max_tokens=route["max_tokens"],
+            messages=[{"role": "user", "content": content}],
         )
         raw = response.content[0].text.strip()
 
         json_match = re.search(r"\{[\s\S]*\}", raw)
         if json_match:
             profile = json.loads(json_match.group())
+            llm_cache.put(cache_key, profile)
         else:
             profile = {"raw_analysis": raw}
 
@@ -234,38 +383,87 @@ def build_persona_profile():
 ROUTINE_CATEGORIES = {"meeting_confirmation", "acknowledgment", "scheduling"}
 
 
-def generate_reply_draft(incoming_email_id):
-    """RAG pipeline: query similar past responses → load persona profile →
-    call Claude → score confidence → save draft.
-    Enforces read-only mode, exclusion rules, and automation levels.
+def _lexical_samples(partition=None):
+    """BM25 retriever over persona_samples (optionally one partition's sources),
+    returning (vector id, content, metadata) as hybrid_query expects.
     """
-    # Check read-only mode
-    if db.get_setting("read_only_mode", "false") == "true":
-        return None
+    sources = exclude = None
+    if partition == "other":
+        # "other" holds every source not mapped to a partition
+        exclude = list(SOURCE_PARTITIONS)
+    elif partition:
+        sources = [src for src, p in SOURCE_PARTITIONS.items() if p == partition]
+
+    def retrieve(query_text, k):
+        try:
+            rows = db.search_persona_samples(
+                query_text, limit=k, source_types=sources, exclude_source_types=exclude
+            )
+        except Exception as e:
+            print(f"Persona full-text search failed: {e}")
+            return []
+        return [(f"sample_{r['id']}", r["content"], {"source_type": r["source_type"]}) for r in rows]
 
-    client = _get_claude_client()
-    if not client:
-        return None
+    return retrieve
 
-    # Load the incoming email
-    emails = db.get_emails(limit=500)
-    email_data = next((e for e in emails if e["id"] == incoming_email_id), None)
-    if not email_data:
-        return None
 
-    # Check exclusion rules
-    sender = email_data.get("sender", "")
-    sender_email = _extract_sender_email(sender)
-    if db.is_excluded(sender_email):
-        return None
+def _reply_query_text(email_data):
+    return f"{email_data.get('subject', '')} {email_data.get('body', '')[:500]}"
 
-    # Check if draft already exists for this email
-    existing_drafts = db.get_email_drafts(limit=500)
-    if any(d.get("email_id") == incoming_email_id for d in existing_drafts):
-        return None
 
-    subject = email_data.get("subject", "")
-    body = email_data.get("body", "")
+def _retrieve_examples(emails, n_results=PERSONA_REPLY_EXAMPLES):
+    """Similar past communications for each email, narrowest first:
+    replies to the same contact, then to the same company domain (samples
+    with a recorded recipient, i.e. from the Gmail channel), then any
+    email-style sample (vector + exact-term BM25 matches), and only if still
+    short, the other partitions. Each step is one batched search per group.
+    """
+    from services import vector_store
+    texts = [_reply_query_text(e) for e in emails]
+    fields = [_contact_fields(e.get("sender", "")) for e in emails]
+    results = [[] for _ in emails]
+
+    def fill(indices, partition, where=None, lexical=None):
+        need = [i for i in indices if len(results[i]) < n_results]
+        if not need:
+            return
+        found = vector_store.hybrid_query_many(
+            [texts[i] for i in need], n_results=n_results, lexical=lexical, where=where,
+            collection=_partition_collection(partition),
+        )
+        for i, hits in zip(need, found):
+            seen = {r["id"] for r in results[i]}
+            results[i].extend(h for h in hits if h["id"] not in seen)
+            del results[i][n_results:]
+
+    for key in ("contact", "domain"):
+        groups = {}
+        for i, f in enumerate(fields):
+            if f[key] and not (key == "domain" and f[key] in FREEMAIL_DOMAINS):
+                groups.setdefault(f[key], []).append(i)
+        for value, indices in groups.items():
+            fill(indices, "email", where={key: value})
+
+    everyone = range(len(emails))
+    fill(everyone, "email", lexical=_lexical_samples("email"))
+    for partition in PARTITIONS[1:]:
+        fill(everyone, partition, lexical=_lexical_samples(partition))
+    return results
+
+
+def _known_senders():
+    return {e.get("sender", "").lower() for e in db.get_emails(limit=200)}
+
+
+def _draft_context():
+    """Everything drafting needs that doesn't depend on the email: client,
+    template and stable prompt prefix, model route, automation settings,
+    exclusion rules and known senders. None if drafting isn't possible
+    (no client, persona profile or prompt template).
+    """
+    client = _get_claude_client()
+    if not client:
+        return None
 
     # Load persona profile
     profile_json = db.get_setting("persona_profile")
@@ -276,26 +474,18 @@ def generate_reply_draft(incoming_email_id):
     except Exception:
         return None
 
-    # RAG: query similar communications
-    from services import vector_store
-    query_text = f"{subject} {body[:500]}"
-    similar = vector_store.query(query_text, n_results=5)
-
-    similar_examples = ""
-    if similar.get("documents") and similar["documents"][0]:
-        examples = similar["documents"][0]
-        similar_examples = "\n\n---\n\n".join(examples)
-
-    # Load and fill prompt template
-    prompt_template = _load_prompt("persona_reply_prompt.md")
-    if not prompt_template:
+    template = prompt_registry.get("persona_reply_prompt.md")
+    if not template:
         return None
 
-    prompt = prompt_template.replace("{persona_profile}", json.dumps(persona_profile, indent=2))
-    prompt = prompt.replace("{similar_examples}", similar_examples or "No similar examples found.")
-    prompt = prompt.replace("{sender}", sender)
-    prompt = prompt.replace("{subject}", subject)
-    prompt = prompt.replace("{body}", body[:3000])
+    # Stable prefix: template, persona profile, instructions and goals.
+    # These only change when the user edits them, so they are cached.
+    try:
+        prompt = template.render(persona_profile=json.dumps(persona_profile, indent=2))
+    except KeyError as e:
+        # An edited template with an unknown placeholder disables drafting until it is fixed
+        print(f"Persona reply prompt error: {e}")
+        return None
 
     # Inject persona instructions and goals if configured
     extra_context = ""
@@ -324,11 +514,53 @@ def generate_reply_draft(incoming_email_id):
     if extra_context:
         prompt += extra_context
 
+    return {
+        "client": client,
+        "template": template,
+        "prompt": prompt,
+        "route": model_router.get_route("persona_reply"),
+        "level": db.get_setting("automation_level", "manual"),
+        "threshold": float(db.get_setting("persona_confidence_threshold", "0.85")),
+        "exclusions": db.get_exclusions(),
+        "known_senders": _known_senders(),
+    }
+
+
+def _compose_draft(context, email_data, similar):
+    """Call Claude for one email and score the reply. Returns the draft as
+    save_email_draft keyword arguments, or None. Safe to run on worker threads.
+    """
+    from services.claude_client import cached_block
+
+    sender = email_data.get("sender", "")
+    subject = email_data.get("subject", "")
+    body = email_data.get("body", "")
+    similar_examples = "\n\n---\n\n".join(r["document"] for r in similar)
+
+    # Volatile suffix: retrieved examples and the email being answered
+    email_section = f"""## Similar Past Communications
+
+These are examples of how this person has communicated in similar contexts:
+
+{similar_examples or "No similar examples found."}
+
+## Incoming Email to Reply To
+
+**From:** {sender}
+**Subject:** {subject}
+**Body:**
+{body[:3000]}"""
+
+    template, route = context["template"], context["route"]
     try:
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}],
+        response = llm_scheduler.create(
+            context["client"], "persona_reply", prompt_version=template.version,
+            model=route["model"],
+            max_tokens=route["max_tokens"],
+            messages=[{
+                "role": "user",
+                "content": [cached_block(context["prompt"]), {"type": "text", "text": email_section}],
+            }],
         )
         raw = response.content[0].text.strip()
 
@@ -347,13 +579,11 @@ def generate_reply_draft(incoming_email_id):
 
         # Score confidence
         confidence = _score_confidence(
-            email_data, reply_body, category, similar, sender
+            email_data, reply_body, category, similar, sender, context["known_senders"]
         )
 
         # Determine status based on automation level
-        level = db.get_setting("automation_level", "manual")
-        threshold = float(db.get_setting("persona_confidence_threshold", "0.85"))
-
+        level, threshold = context["level"], context["threshold"]
         if level == "full_auto" and confidence >= threshold:
             status = "auto_approved"
         elif level == "semi_auto" and category in ROUTINE_CATEGORIES and confidence >= threshold:
@@ -361,28 +591,65 @@ def generate_reply_draft(incoming_email_id):
         else:
             status = "pending_review"
 
-        # Save draft
-        draft_id = db.save_email_draft(
-            email_id=incoming_email_id,
-            recipient=sender,
-            subject=f"Re: {subject}" if not subject.startswith("Re:") else subject,
-            body=reply_body,
-            status=status,
-            confidence_score=confidence,
-            category=category,
-            reasoning=reasoning,
-            original_body=body[:5000],
-        )
-
-        return draft_id
+        return {
+            "email_id": email_data["id"],
+            "recipient": sender,
+            "subject": f"Re: {subject}" if not subject.startswith("Re:") else subject,
+            "body": reply_body,
+            "status": status,
+            "confidence_score": confidence,
+            "category": category,
+            "reasoning": reasoning,
+            "original_body": body[:5000],
+        }
 
     except Exception as e:
-        print(f"Error generating draft for email {incoming_email_id}: {e}")
+        print(f"Error generating draft for email {email_data['id']}: {e}")
+        return None
+
+
+def generate_reply_draft(incoming_email_id, similar=None):
+    """RAG pipeline: query similar past responses → load persona profile →
+    call Claude → score confidence → save draft.
+    Enforces read-only mode, exclusion rules, and automation levels.
+    similar: examples already retrieved for this email.
+    """
+    # Check read-only mode
+    if db.get_setting("read_only_mode", "false") == "true":
+        return None
+
+    # Load the incoming email
+    emails = db.get_emails(limit=500)
+    email_data = next((e for e in emails if e["id"] == incoming_email_id), None)
+    if not email_data:
+        return None
+
+    # Check exclusion rules
+    sender_email = _extract_sender_email(email_data.get("sender", ""))
+    if db.is_excluded(sender_email):
         return None
 
+    # Check if draft already exists for this email
+    existing_drafts = db.get_email_drafts(limit=500)
+    if any(d.get("email_id") == incoming_email_id for d in existing_drafts):
+        return None
+
+    context = _draft_context()
+    if context is None:
+        return None
+
+    # RAG: similar past communications
+    if similar is None:
+        similar = _retrieve_examples([email_data])[0]
+
+    draft = _compose_draft(context, email_data, similar)
+    return db.save_email_draft(**draft) if draft else None
 
-def _score_confidence(email_data, reply_body, category, similar_results, sender):
-    """Rule-based confidence scoring. Returns float 0.0-1.0."""
+
+def _score_confidence(email_data, reply_body, category, similar_results, sender, known_senders=None):
+    """Rule-based confidence scoring. Returns float 0.0-1.0.
+    known_senders: lowercased senders of recent emails (loaded if not given).
+    """
     score = 0.5
 
     subject = email_data.get("subject", "").lower()
@@ -396,10 +663,9 @@ def _score_confidence(email_data, reply_body, category, similar_results, sender)
     if any(pat in subject or pat in body for pat in ack_patterns):
         score += 0.3
 
-    if similar_results.get("distances") and similar_results["distances"][0]:
-        best_distance = min(similar_results["distances"][0])
-        if best_distance < 0.3:
-            score += 0.1
+    distances = [r["distance"] for r in similar_results if r.get("distance") is not None]
+    if distances and min(distances) < 0.3:
+        score += 0.1
 
     commitment_patterns = [
         r"\$\d+", r"\d+%", "deadline", "commit", "promise", "guarantee",
@@ -410,8 +676,8 @@ def _score_confidence(email_data, reply_body, category, similar_results, sender)
             score -= 0.3
             break
 
-    all_emails = db.get_emails(limit=200)
-    known_senders = {e.get("sender", "").lower() for e in all_emails}
+    if known_senders is None:
+        known_senders = _known_senders()
     sender_lower = sender.lower()
     sender_seen = any(sender_lower in s for s in known_senders)
     if not sender_seen:
@@ -425,9 +691,13 @@ def _score_confidence(email_data, reply_body, category, similar_results, sender)
 
 # ── Batch Processing ──
 
-def process_new_emails_for_drafts():
-    """Generate drafts for all unprocessed emails.
+def process_new_emails_for_drafts(progress=None):
+    """Generate drafts for all unprocessed emails as a staged pipeline:
+    shared context loaded once, one batched retrieval, Claude calls over a
+    bounded thread pool (PERSONA_DRAFT_CONCURRENCY; the LLM scheduler still
+    applies its rate limits), then one bulk insert.
     Enforces read-only mode.
+    progress: optional callable(done, total) invoked as drafts complete.
     """
     # Check read-only mode
     if db.get_setting("read_only_mode", "false") == "true":
@@ -437,37 +707,71 @@ def process_new_emails_for_drafts():
     if not profile_json:
         return {"processed": 0, "error": "No persona profile. Build profile first."}
 
+    # Stage 1: everything shared by the batch
+    context = _draft_context()
+    if context is None:
+        return {"processed": 0, "error": "Drafting unavailable. Check the API key and the persona reply prompt."}
+
     all_emails = db.get_emails(limit=100)
     existing_drafts = db.get_email_drafts(limit=500)
     drafted_email_ids = {d.get("email_id") for d in existing_drafts}
 
     user_email = db.get_setting("imap_email", "").lower()
-    processed = 0
 
+    pending = []
     for email_data in all_emails:
         if email_data["id"] in drafted_email_ids:
             continue
         sender = _extract_sender_email(email_data.get("sender", ""))
         if user_email and user_email in sender:
             continue
-
-        draft_id = generate_reply_draft(email_data["id"])
-        if draft_id:
-            processed += 1
-
-    return {"processed": processed}
+        if db.is_excluded(sender, context["exclusions"]):
+            continue
+        pending.append(email_data)
+    if not pending:
+        return {"processed": 0}
+
+    # Stage 2: retrieval for every pending email in one vectorized pass
+    examples = _retrieve_examples(pending)
+
+    # Stage 3: Claude calls, a bounded number in flight
+    if progress:
+        progress(0, len(pending))
+    drafts = [None] * len(pending)
+    with ThreadPoolExecutor(max_workers=max(1, PERSONA_DRAFT_CONCURRENCY)) as pool:
+        futures = {
+            pool.submit(_compose_draft, context, email_data, similar): i
+            for i, (email_data, similar) in enumerate(zip(pending, examples))
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            drafts[futures[future]] = future.result()
+            if progress:
+                progress(done, len(pending))
+
+    # Stage 4: one transaction for the whole batch
+    return {"processed": db.save_email_drafts([d for d in drafts if d])}
 
 
 # ── Rebuild ──
 
-def rebuild_persona():
-    """Full rebuild: clear ChromaDB, re-ingest all, rebuild profile."""
-    from services import vector_store
-    vector_store.delete_collection()
+def rebuild_persona(progress=None):
+    """Full rebuild: re-ingest all samples, sync the vector collection
+    (vectors of the old samples are removed, unchanged text reuses the
+    embedding cache), rebuild profile.
+    progress: optional callable(message) invoked at the start of each stage.
+    """
+    if progress:
+        progress("Clearing existing samples...")
     db.clear_persona_samples()
 
+    if progress:
+        progress("Ingesting sent emails...")
     ingest_result = ingest_emails()
+    if progress:
+        progress("Embedding samples...")
     embed_result = embed_pending_samples()
+    if progress:
+        progress("Building style profile...")
     profile_result = build_persona_profile()
 
     return {
@@ -0,0 +1,107 @@
+"""
+Prompt template registry — loads every file in PROMPTS_DIR once, precompiles
+placeholders, and hot-reloads a template only when its file's mtime changes.
+
+Each template carries a short content-hash version used in LLM cache keys and
+call logs, so editing a prompt is visible everywhere it is used.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from config import PROMPTS_DIR
+
+# {name} placeholders; JSON examples in the prompts ({"key": ...}) never match
+PLACEHOLDER_RE = re.compile(r"\{([a-z_][a-z0-9_]*)\}")
+
+# Placeholders each template must contain — checked by validate() at startup
+REQUIRED_PLACEHOLDERS = {
+    "system_prompt.md": set(),
+    "email_processing_prompt.md": set(),
+    "persona_analysis_prompt.md": set(),
+    "persona_reply_prompt.md": {"persona_profile"},
+}
+
+_templates = {}
+_lock = threading.Lock()
+
+
+class PromptTemplate:
+    """A parsed prompt file: literal segments interleaved with placeholders."""
+
+    def __init__(self, name, text, mtime):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        self.version = hashlib.sha256(text.encode()).hexdigest()[:12]
+        self._segments = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            self._segments.append((False, text[pos:match.start()]))
+            self._segments.append((True, match.group(1)))
+            pos = match.end()
+        self._segments.append((False, text[pos:]))
+        self.placeholders = frozenset(value for is_field, value in self._segments if is_field)
+
+    def render(self, **values):
+        """Fill placeholders in one pass. Raises KeyError for a missing value."""
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise KeyError(f"{self.name}: missing values for {sorted(missing)}")
+        return "".join(str(values[v]) if is_field else v for is_field, v in self._segments)
+
+
+def _load(name, mtime):
+    with open(os.path.join(PROMPTS_DIR, name), "r") as f:
+        return PromptTemplate(name, f.read(), mtime)
+
+
+def get(name):
+    """Return the PromptTemplate for a file in PROMPTS_DIR, or None if missing.
+    Costs one stat() per call; the file is re-read only when its mtime changes.
+    """
+    try:
+        mtime = os.path.getmtime(os.path.join(PROMPTS_DIR, name))
+    except OSError:
+        with _lock:
+            _templates.pop(name, None)
+        return None
+
+    template = _templates.get(name)
+    if template is not None and template.mtime == mtime:
+        return template
+
+    with _lock:
+        template = _templates.get(name)
+        if template is None or template.mtime != mtime:
+            template = _load(name, mtime)
+            _templates[name] = template
+    return template
+
+
+def load_all():
+    """Load (or refresh) every template in PROMPTS_DIR. Returns {name: template}."""
+    if os.path.isdir(PROMPTS_DIR):
+        for name in sorted(os.listdir(PROMPTS_DIR)):
+            if os.path.isfile(os.path.join(PROMPTS_DIR, name)):
+                get(name)
+    with _lock:
+        return dict(_templates)
+
+
+def validate():
+    """Check that every known template exists and has its required placeholders.
+    Returns a list of problem strings (empty when everything is fine).
+    """
+    load_all()
+    problems = []
+    for name, required in REQUIRED_PLACEHOLDERS.items():
+        template = get(name)
+        if template is None:
+            problems.append(f"{name}: file not found in {PROMPTS_DIR}")
+            continue
+        missing = required - template.placeholders
+        if missing:
+            problems.append(f"{name}: missing placeholders {sorted(missing)}")
+    return problems
@@ -0,0 +1,346 @@
+"""
+Offline retrieval evaluation for persona drafts — recall@k, MRR, latency and
+prompt size of the retrieval stage of generate_reply_draft
+(persona_engine._retrieve_examples) on a corpus of (incoming email, gold past
+reply) pairs.
+
+A corpus is JSONL. Pair lines: {"email": {"sender", "subject", "body"},
+"reply": "...", "source_type": "gmail_sent", "recipient": "..."}; lines
+without "email" are distractors, past writing that answers none of the
+emails. Replies are stored the way production stores that source: only
+gmail_sent samples carry a recipient (IMAP "email" samples have none), so
+contact/domain retrieval is exercised only as often as it is live. Build one with:
+
+  python -m services.retrieval_eval synth --pairs 300 --distractors 3 --gmail-share 0.5
+  python -m services.retrieval_eval export
+
+export pairs sent replies in the live database with the received email they
+answer (same subject) and replaces addresses and phone numbers; names in
+bodies are kept, so review it before sharing.
+
+  python -m services.retrieval_eval run data/eval/retrieval_synthetic.jsonl --backends numpy chroma
+
+Each backend runs in its own spawned process against a scratch database and
+vector directory, so the live persona store is never touched. Replies are
+chunked with _chunk_text and synced with embed_pending_samples, as in
+production, so changes to either show up in the numbers.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import time
+from config import EVAL_FIXTURES_DIR, PERSONA_REPLY_EXAMPLES
+
+
+# ── Corpora ──
+
+_ME = "Alex"
+_FIRST_NAMES = ["Dana", "Priya", "Marco", "Lena", "Tom", "Yuki", "Omar", "Sofia", "Ben", "Chloe",
+                "Ravi", "Ines", "Jonas", "Mei", "Luca", "Amara", "Felix", "Nora", "Sam", "Hana"]
+_COMPANIES = ["acme", "globex", "initech", "umbrella", "hooli", "vandelay", "wonka", "stark",
+              "wayne", "tyrell", "soylent", "cyberdyne", "gmail"]
+_DETAILS = ["Falcon", "Harbor", "Juniper", "Atlas", "Cobalt", "Meridian", "Orchid", "Summit",
+            "Quartz", "Beacon", "Willow", "Zephyr", "Granite", "Lumen", "Sierra", "Tundra"]
+
+# (subject, incoming body, reply); {detail} is what tells pairs on one topic apart
+_TOPICS = [
+    ("Invoice {detail}",
+     "Hi {me}, could you confirm when invoice {detail} will be paid? Our finance team is closing the month.",
+     "Thanks {first} — invoice {detail} is approved and goes out with Friday's payment run."),
+    ("Meeting about {detail}",
+     "Hi {me}, can we move our {detail} meeting? Something came up on my side this week.",
+     "No problem {first}, let's move the {detail} meeting. Send me two slots that work and I'll confirm."),
+    ("Contract renewal: {detail}",
+     "Hi {me}, the {detail} contract expires next month. Do you want to renew on the same terms?",
+     "Hi {first}, yes, please renew {detail} on the same terms, and flag any price change before signing."),
+    ("Candidate for {detail}",
+     "Hi {me}, we have a strong candidate for the {detail} role. Are you free to interview this week?",
+     "Great news {first}. I can interview for {detail} on Thursday afternoon; please send the CV beforehand."),
+    ("Demo of {detail}",
+     "Hi {me}, would your team like a demo of {detail}? It takes about 30 minutes.",
+     "Thanks {first}, a {detail} demo would be useful. Let's aim for next week with the ops leads."),
+    ("Budget for {detail}",
+     "Hi {me}, we need sign-off on the {detail} budget before planning starts.",
+     "{first}, the {detail} budget looks fine. I've signed off, go ahead with planning."),
+    ("Trip to the {detail} site",
+     "Hi {me}, are you joining the visit to the {detail} site next month? I need to book hotels.",
+     "Hi {first}, count me in for the {detail} visit. Please book the hotel closest to the site."),
+]
+
+
+def synthetic_corpus(pairs=300, distractors=3, seed=0, gmail_share=0.5):
+    """Deterministic (email, gold reply) pairs. Distractors reuse a pair's
+    topic with other details and contacts, so lexical overlap alone can't
+    find the gold reply. A `gmail_share` fraction of replies are Gmail
+    channel samples with a recipient; the rest are IMAP samples without one.
+    """
+    rng = random.Random(seed)
+    contacts = [(first, f"{first.lower()}@{company}.com") for first in _FIRST_NAMES for company in _COMPANIES]
+
+    def detail():
+        return f"{rng.choice(_DETAILS)} {rng.randint(100, 999)}"
+
+    def source(address):
+        if rng.random() < gmail_share:
+            return {"source_type": "gmail_sent", "recipient": address}
+        return {"source_type": "email"}
+
+    lines = []
+    for _ in range(pairs):
+        subject, body, reply = rng.choice(_TOPICS)
+        first, address = rng.choice(contacts)
+        d = detail()
+        lines.append({
+            "email": {
+                "sender": f"{first} <{address}>",
+                "subject": subject.format(detail=d),
+                "body": body.format(me=_ME, detail=d),
+            },
+            "reply": f"{reply.format(first=first, detail=d)}\n\nBest,\n{_ME}",
+            **source(address),
+        })
+        for _ in range(distractors):
+            first, address = rng.choice(contacts)
+            lines.append({
+                "reply": f"{reply.format(first=first, detail=detail())}\n\nBest,\n{_ME}",
+                **source(address),
+            })
+    rng.shuffle(lines)
+    return lines
+
+
+_ADDRESS = re.compile(r"([\w.+-]+)@([\w-]+(?:\.[\w-]+)+)")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+
+def _normalize_subject(subject):
+    return re.sub(r"^((re|fwd?|aw|wg)\s*:\s*)+", "", (subject or "").strip(), flags=re.I).lower()
+
+
+def _anonymizer():
+    """Replace addresses consistently (contactN@companyN.example; shared mail
+    providers are kept so domain filtering behaves the same) and phone numbers.
+    """
+    from services.persona_engine import FREEMAIL_DOMAINS
+    people, companies = {}, {}
+
+    def address(match):
+        original = match.group(0).lower()
+        domain = match.group(2).lower()
+        if domain not in FREEMAIL_DOMAINS:
+            domain = companies.setdefault(domain, f"company{len(companies) + 1}.example")
+        return people.setdefault(original, f"contact{len(people) + 1}@{domain}")
+
+    def anonymize(text):
+        return _PHONE.sub("[phone]", _ADDRESS.sub(address, text or ""))
+
+    return anonymize
+
+
+def export_corpus(limit=500):
+    """Anonymized pairs from the live database: each sent reply (persona
+    samples regrouped by content_hash) with the received email it answers.
+    """
+    import db
+    from services.persona_engine import _extract_sender_email, _partition
+
+    user = db.get_setting("imap_email", "").lower()
+    replies = {}
+    for s in sorted(db.get_persona_samples(limit=50000), key=lambda s: s["id"]):
+        if _partition(s["source_type"]) != "email":
+            continue
+        meta = json.loads(s.get("metadata") or "{}")
+        reply = replies.setdefault(meta.get("content_hash") or s["id"], {
+            "subject": meta.get("subject", ""), "recipient": meta.get("recipient", ""),
+            "source_type": s["source_type"], "chunks": [],
+        })
+        reply["chunks"].append(s["content"])
+
+    received = {}
+    for e in db.get_emails(limit=limit * 10):
+        sender = _extract_sender_email(e.get("sender", ""))
+        if not user or user not in sender:
+            received.setdefault(_normalize_subject(e.get("subject")), []).append(e)
+
+    anonymize = _anonymizer()
+    lines = []
+    for reply in replies.values():
+        candidates = received.get(_normalize_subject(reply["subject"])) if reply["subject"] else None
+        if not candidates:
+            continue
+        recipient = _extract_sender_email(reply["recipient"].split(",")[0])
+        email = next(
+            (e for e in candidates if recipient and _extract_sender_email(e["sender"]) == recipient),
+            candidates[0],
+        )
+        lines.append({
+            "email": {
+                "sender": anonymize(_extract_sender_email(email["sender"])),
+                "subject": anonymize(email["subject"]),
+                "body": anonymize(email["body"]),
+            },
+            "reply": anonymize("\n\n".join(reply["chunks"])),
+            "source_type": reply["source_type"],
+            "recipient": anonymize(recipient),
+        })
+        if len(lines) >= limit:
+            break
+    return lines
+
+
+def write_corpus(lines, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+
+
+def load_corpus(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ── Evaluation ──
+
+def _run_backend(corpus, backend, workdir, n_results, ks):
+    """Run in a fresh process: index the corpus into a scratch database and
+    `backend`, then time retrieval for every pair.
+    """
+    import db
+    from services import vector_store, persona_engine
+    from services.chat_history import estimate_tokens
+    from services.model_eval import _percentile
+
+    # Module-level paths are read at call time, so this redirects everything
+    db.DB_PATH = os.path.join(workdir, "eval.db")  # shared, so the embedding cache carries over
+    vector_store.VECTOR_BACKEND = backend
+    vector_store.VECTOR_DIR = os.path.join(workdir, "vectors")
+    vector_store.CHROMA_DIR = os.path.join(workdir, "chroma")
+    db.init_db()
+    db.clear_persona_samples()
+
+    cases = []
+    for line in corpus:
+        email = line.get("email")
+        recipient = line.get("recipient", "")
+        source_type = line.get("source_type") or ("gmail_sent" if recipient else "email")
+        # Same metadata as the live ingestion path for this source
+        metadata = {"subject": (email or {}).get("subject", "")}
+        if source_type == "gmail_sent":
+            metadata["recipient"] = recipient
+        metadata = json.dumps(metadata)
+        gold = set()
+        for chunk in persona_engine._chunk_text(line["reply"]):
+            if len(chunk) >= 20:  # same floor as ingestion
+                sample_id = db.save_persona_sample(chunk, source_type, metadata)
+                gold.add(f"sample_{sample_id}")
+        if email and gold:
+            cases.append((email, gold))
+    if not cases:
+        raise ValueError("Corpus has no (email, reply) pairs")
+
+    start = time.monotonic()
+    persona_engine.embed_pending_samples()
+    index_s = time.monotonic() - start
+
+    persona_engine._retrieve_examples([cases[0][0]], n_results)  # model load, collection open
+    ranks, latencies, tokens = [], [], []
+    for email, gold in cases:
+        start = time.perf_counter()
+        found = persona_engine._retrieve_examples([email], n_results)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranks.append(next((i + 1 for i, r in enumerate(found) if r["id"] in gold), None))
+        tokens.append(estimate_tokens("\n\n---\n\n".join(r["document"] for r in found)))
+
+    start = time.perf_counter()
+    persona_engine._retrieve_examples([email for email, _ in cases], n_results)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(cases)
+
+    return {
+        "backend": backend,
+        "cases": len(cases),
+        "index_s": index_s,
+        "recall": {k: sum(1 for r in ranks if r and r <= k) / len(cases) for k in ks},
+        "mrr": sum(1 / r for r in ranks if r) / len(cases),
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "batch_ms": batch_ms,
+        "example_tokens": sum(tokens) / len(tokens),
+    }
+
+
+def run_eval(corpus_path, backends=("numpy", "chroma"), n_results=PERSONA_REPLY_EXAMPLES, ks=(1, 3)):
+    """Evaluate retrieval on each backend, one spawned process per backend.
+    Returns one result dict per backend that could be loaded.
+    """
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    corpus = load_corpus(corpus_path)
+    ks = sorted({k for k in ks if k <= n_results} | {n_results})
+    workdir = tempfile.mkdtemp(prefix="retrieval-eval-")
+    results = []
+    try:
+        for backend in backends:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                try:
+                    results.append(pool.submit(_run_backend, corpus, backend, workdir, n_results, ks).result())
+                except ImportError as e:
+                    print(f"Skipping {backend}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate persona reply retrieval offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    synth = commands.add_parser("synth", help="Write a synthetic corpus")
+    synth.add_argument("--pairs", type=int, default=300)
+    synth.add_argument("--distractors", type=int, default=3, help="Distractor replies per pair")
+    synth.add_argument("--gmail-share", type=float, default=0.5,
+                       help="Fraction of replies stored as Gmail samples with a recipient")
+    synth.add_argument("--seed", type=int, default=0)
+    synth.add_argument("--out", default=os.path.join(EVAL_FIXTURES_DIR, "retrieval_synthetic.jsonl"))
+    export = commands.add_parser("export", help="Write an anonymized corpus from the live database")
+    export.add_argument("--limit", type=int, default=500)
+    export.add_argument("--out", default=os.path.join(EVAL_FIXTURES_DIR, "retrieval_anonymized.jsonl"))
+    run = commands.add_parser("run", help="Evaluate a corpus")
+    run.add_argument("corpus")
+    run.add_argument("--backends", nargs="+", default=["numpy", "chroma"])
+    run.add_argument("--n-results", type=int, default=PERSONA_REPLY_EXAMPLES, help="Examples per draft")
+    run.add_argument("--k", type=int, nargs="+", default=[1, 3], help="Report recall@k for these k")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        lines = synthetic_corpus(args.pairs, args.distractors, args.seed, args.gmail_share)
+        write_corpus(lines, args.out)
+        print(f"Wrote {len(lines)} lines to {args.out}")
+        return
+    if args.command == "export":
+        import db
+        db.init_db()
+        lines = export_corpus(args.limit)
+        write_corpus(lines, args.out)
+        print(f"Wrote {len(lines)} pairs to {args.out}")
+        return
+
+    results = run_eval(args.corpus, args.backends, args.n_results, args.k)
+    ks = sorted(results[0]["recall"]) if results else []
+    print(f"{'backend':8} {'cases':>6} {'index':>7} "
+          + " ".join(f"{f'R@{k}':>6}" for k in ks)
+          + f" {'MRR':>6} {'p50':>8} {'p99':>8} {'batch':>8} {'tokens':>7}")
+    for r in results:
+        print(f"{r['backend']:8} {r['cases']:>6} {r['index_s']:>6.1f}s "
+              + " ".join(f"{r['recall'][k]:>6.3f}" for k in ks)
+              + f" {r['mrr']:>6.3f} {r['p50_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms "
+              f"{r['batch_ms']:>6.1f}ms {r['example_tokens']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,629 @@
 """
-ChromaDB vector store wrapper — persistent client, embed, query, delete.
+Vector store — persistent collections, embed, query, delete.
+Holds the persona_communications collection and the document_chunks
+collection used for document search. Collections live in Chroma, or with
+VECTOR_BACKEND=numpy in the dependency-free memory-mapped index
+(services/numpy_vectors.py); chromadb and sentence-transformers are only
+imported when first used, keeping app startup light.
+
+Embeddings are computed locally with sentence-transformers (EMBEDDING_MODEL)
+rather than Chroma's built-in default, so batch size, thread count, backend
+(torch / ONNX / OpenVINO, optionally a quantized export) and multi-process
+encoding for large backfills are all configurable. Vectors are cached in the
+embedding_cache table by (model, text hash), so re-adding unchanged text —
+e.g. after a persona rebuild — never re-encodes it.
+
+Benchmarks:
+  python -m services.vector_store --bench 2000 --batch-sizes 16 32 64
+  python -m services.vector_store --bench-backends 50000 --queries 200
+  python -m services.vector_store --bench-quantization 100000 --queries 200
 """
 
+import argparse
+import hashlib
 import os
-try:
-    import chromadb
-except ImportError:
-    chromadb = None
-from config import CHROMA_DIR, EMBEDDING_MODEL
+import re
+import threading
+import time
+from array import array
+from config import (
+    CHROMA_DIR, VECTOR_BACKEND, VECTOR_DIR, VECTOR_ADD_BATCH, VECTOR_COUNT_TTL,
+    VECTOR_QUANTIZATION, VECTOR_RERANK_FACTOR, VECTOR_WARMUP_ENABLED,
+    HYBRID_CANDIDATES, RRF_K, HYBRID_DEDUP_THRESHOLD,
+    EMBEDDING_MODEL, EMBEDDING_DEVICE, EMBEDDING_BACKEND, EMBEDDING_MODEL_FILE,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, EMBEDDING_POOL_WORKERS, EMBEDDING_POOL_MIN,
+)
+
+PERSONA_COLLECTION = "persona_communications"
+DOCUMENTS_COLLECTION = "document_chunks"
 
 _client = None
-_collection = None
+_collections = {}
+_counts = {}  # collection name -> (count, checked_at); dropped on local writes
+_collections_lock = threading.RLock()  # guards _client and _collections creation
+_model = None
+_model_lock = threading.Lock()
+_warmup = {"state": "disabled", "seconds": None, "collections": []}
+_warmup_lock = threading.Lock()
+
+
+# ── Embedding ──
+
+def _get_model():
+    """Lazy-load the sentence-transformers model (once per process)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError("sentence-transformers is not installed. Run: pip install sentence-transformers")
+            if EMBEDDING_THREADS:
+                import torch
+                torch.set_num_threads(EMBEDDING_THREADS)
+            kwargs = {"device": EMBEDDING_DEVICE}
+            if EMBEDDING_BACKEND != "torch":
+                kwargs["backend"] = EMBEDDING_BACKEND
+                if EMBEDDING_MODEL_FILE:
+                    kwargs["model_kwargs"] = {"file_name": EMBEDDING_MODEL_FILE}
+            _model = SentenceTransformer(EMBEDDING_MODEL, **kwargs)
+    return _model
+
+
+def embedding_version():
+    """Identity of the vectors' producer (model, backend, export file); vectors
+    from a different version are not comparable and must be recomputed.
+    """
+    return "|".join(p for p in (EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_MODEL_FILE) if p)
+
+
+def _encode(texts, batch_size):
+    """Run the model. Lists of EMBEDDING_POOL_MIN or more are spread over a process pool."""
+    model = _get_model()
+    if len(texts) >= EMBEDDING_POOL_MIN and EMBEDDING_POOL_WORKERS > 1:
+        pool = model.start_multi_process_pool(target_devices=[EMBEDDING_DEVICE] * EMBEDDING_POOL_WORKERS)
+        try:
+            vectors = model.encode_multi_process(
+                texts, pool, batch_size=batch_size, normalize_embeddings=True
+            )
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        vectors = model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+    return vectors.tolist()
+
+
+def embed(texts, batch_size=EMBEDDING_BATCH_SIZE, cache=True):
+    """Embed a list of texts (normalized vectors, as lists of floats).
+    With cache=True, only texts missing from the embedding cache are encoded.
+    """
+    if not texts:
+        return []
+    if not cache:
+        return _encode(texts, batch_size)
+
+    import db
+    model_key = embedding_version()
+    hashes = [hashlib.sha256(t.encode()).hexdigest() for t in texts]
+    blobs = db.get_cached_embeddings(model_key, hashes)
+
+    missing = {}
+    for h, text in zip(hashes, texts):
+        if h not in blobs:
+            missing.setdefault(h, text)
+    if missing:
+        vectors = _encode(list(missing.values()), batch_size)
+        new = [(h, array("f", v).tobytes()) for h, v in zip(missing, vectors)]
+        db.save_cached_embeddings(model_key, new)
+        blobs.update(new)
+
+    result = []
+    for h in hashes:
+        vector = array("f")
+        vector.frombytes(blobs[h])
+        result.append(vector.tolist())
+    return result
+
+
+class LocalEmbeddingFunction:
+    """Chroma embedding function backed by embed(); used for query texts,
+    which are not worth caching.
+    """
+
+    def __call__(self, input):
+        return embed(list(input), cache=False)
+
+
+# ── Collections ──
+#
+# A collection is a backend object with add/upsert(ids, documents, embeddings,
+# metadatas), query(embedding, n_results, where), get_metadatas(where),
+# get_ids(limit, offset), delete_ids(ids), delete_where(where) and count().
+# VECTOR_BACKEND picks Chroma (default) or the NumPy memmap index.
 
 
 def _get_client():
-    """Lazy-init persistent ChromaDB client."""
+    """Lazy-init persistent ChromaDB client (chromadb is imported only when used)."""
     global _client
     if _client is None:
-        if chromadb is None:
-            raise ImportError("chromadb is not installed. Run: pip install chromadb")
-        os.makedirs(CHROMA_DIR, exist_ok=True)
-        _client = chromadb.PersistentClient(path=CHROMA_DIR)
+        with _collections_lock:
+            if _client is None:
+                try:
+                    import chromadb
+                except ImportError:
+                    raise ImportError("chromadb is not installed. Run: pip install chromadb")
+                os.makedirs(CHROMA_DIR, exist_ok=True)
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
     return _client
 
 
-def get_collection():
-    """Get or create the persona_communications collection."""
-    global _collection
-    if _collection is None:
-        client = _get_client()
-        _collection = client.get_or_create_collection(
-            name="persona_communications",
+class ChromaCollection:
+    """Backend wrapper around a Chroma collection."""
+
+    def __init__(self, name, client=None):
+        self.collection = (client or _get_client()).get_or_create_collection(
+            name=name,
+            embedding_function=LocalEmbeddingFunction(),
             metadata={"hnsw:space": "cosine"},
         )
-    return _collection
-
-
-def add_documents(ids, documents, metadatas=None):
-    """Batch insert documents with 100-item chunking."""
-    collection = get_collection()
-    for i in range(0, len(ids), 100):
-        batch_ids = ids[i:i + 100]
-        batch_docs = documents[i:i + 100]
-        batch_meta = metadatas[i:i + 100] if metadatas else None
-        kwargs = {"ids": batch_ids, "documents": batch_docs}
-        if batch_meta:
-            kwargs["metadatas"] = batch_meta
-        collection.add(**kwargs)
-
-
-def query(query_text, n_results=5, where=None):
-    """Semantic search against the collection."""
-    collection = get_collection()
-    if collection.count() == 0:
-        return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
-    kwargs = {"query_texts": [query_text], "n_results": min(n_results, collection.count())}
-    if where:
-        kwargs["where"] = where
-    return collection.query(**kwargs)
-
-
-def delete_collection():
-    """Delete the entire collection for full rebuild."""
-    global _collection
-    try:
-        client = _get_client()
-        client.delete_collection("persona_communications")
-    except Exception:
-        pass
-    _collection = None
 
+    def _write(self, method, ids, documents, embeddings, metadatas):
+        kwargs = {"ids": ids, "documents": documents, "embeddings": embeddings}
+        if metadatas:
+            kwargs["metadatas"] = metadatas
+        method(**kwargs)
+
+    def add(self, ids, documents, embeddings, metadatas=None):
+        self._write(self.collection.add, ids, documents, embeddings, metadatas)
+
+    def upsert(self, ids, documents, embeddings, metadatas=None):
+        self._write(self.collection.upsert, ids, documents, embeddings, metadatas)
+
+    def query(self, embedding, n_results=5, where=None):
+        return self.query_many([embedding], n_results, where)
+
+    def query_many(self, embeddings, n_results=5, where=None):
+        kwargs = {"query_embeddings": embeddings, "n_results": n_results}
+        if where:
+            kwargs["where"] = where
+        return self.collection.query(**kwargs)
+
+    def get_metadatas(self, where=None):
+        kwargs = {"include": ["metadatas"]}
+        if where:
+            kwargs["where"] = where
+        return self.collection.get(**kwargs).get("metadatas") or []
+
+    def get_ids(self, limit, offset=0):
+        return self.collection.get(include=[], limit=limit, offset=offset)["ids"]
+
+    def delete_ids(self, ids):
+        self.collection.delete(ids=list(ids))
+
+    def delete_where(self, where):
+        self.collection.delete(where=where)
+
+    def count(self):
+        return self.collection.count()
+
+
+def get_collection(name=PERSONA_COLLECTION):
+    """Get or create a collection (persona_communications by default)."""
+    collection = _collections.get(name)
+    if collection is None:
+        # Warm-up and request threads may open the same collection at once;
+        # two NumpyCollections on one memmap would not see each other's writes
+        with _collections_lock:
+            collection = _collections.get(name)
+            if collection is None:
+                if VECTOR_BACKEND == "numpy":
+                    from services.numpy_vectors import NumpyCollection
+                    collection = NumpyCollection(
+                        os.path.join(VECTOR_DIR, name), quantization=VECTOR_QUANTIZATION, rerank=VECTOR_RERANK_FACTOR
+                    )
+                else:
+                    collection = ChromaCollection(name)
+                _collections[name] = collection
+    return collection
+
+
+def _count(name):
+    """Collection size, cached for VECTOR_COUNT_TTL seconds and invalidated by
+    writes from this process. A cached zero is always re-checked, so writes
+    from other processes never hide results.
+    """
+    cached = _counts.get(name)
+    if cached and cached[0] and time.monotonic() - cached[1] < VECTOR_COUNT_TTL:
+        return cached[0]
+    count = get_collection(name).count()
+    _counts[name] = (count, time.monotonic())
+    return count
+
+
+def _write_batches(method, ids, documents, metadatas):
+    embeddings = embed(list(documents))
+    for i in range(0, len(ids), VECTOR_ADD_BATCH):
+        end = i + VECTOR_ADD_BATCH
+        method(ids[i:end], documents[i:end], embeddings[i:end], metadatas[i:end] if metadatas else None)
+
+
+def add_documents(ids, documents, metadatas=None, collection=PERSONA_COLLECTION):
+    """Embed all documents in one pass, then insert in VECTOR_ADD_BATCH chunks."""
+    _counts.pop(collection, None)
+    _write_batches(get_collection(collection).add, ids, documents, metadatas)
+
+
+def upsert_documents(ids, documents, metadatas=None, collection=PERSONA_COLLECTION):
+    """Like add_documents, but replaces existing ids (safe to repeat)."""
+    _counts.pop(collection, None)
+    _write_batches(get_collection(collection).upsert, ids, documents, metadatas)
+
+
+def query_many(query_texts, n_results=5, where=None, collection=PERSONA_COLLECTION):
+    """Semantic search for several texts: one embedding batch, one search call.
+    Returns Chroma's result shape with one inner list per query text.
+    """
+    if not query_texts:
+        return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    count = _count(collection)
+    if count == 0:
+        return {key: [[] for _ in query_texts] for key in ("ids", "documents", "metadatas", "distances")}
+    embeddings = embed(list(query_texts), cache=False)
+    return get_collection(collection).query_many(embeddings, n_results=min(n_results, count), where=where)
+
+
+def query(query_text, n_results=5, where=None, collection=PERSONA_COLLECTION):
+    """Semantic search against a collection."""
+    return query_many([query_text], n_results, where, collection)
+
+
+def _shingles(text):
+    words = re.findall(r"\w+", (text or "").lower())
+    return set(zip(words, words[1:], words[2:])) or set(words)
+
+
+def _near_duplicate(a, b):
+    return bool(a and b) and len(a & b) / len(a | b) >= HYBRID_DEDUP_THRESHOLD
+
+
+def _fuse(ranked_lists, distances, n_results):
+    """Reciprocal rank fusion of [(id, document, metadata)] lists, dropping near-duplicates."""
+    scores, items = {}, {}
+    for ranked in ranked_lists:
+        for rank, (item_id, document, metadata) in enumerate(ranked, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (RRF_K + rank)
+            items.setdefault(item_id, (document, metadata))
+
+    results, kept = [], []
+    for item_id in sorted(scores, key=scores.get, reverse=True):
+        document, metadata = items[item_id]
+        shingles = _shingles(document)
+        if any(_near_duplicate(shingles, seen) for seen in kept):
+            continue
+        kept.append(shingles)
+        results.append({
+            "id": item_id,
+            "document": document,
+            "metadata": metadata,
+            "score": scores[item_id],
+            "distance": distances.get(item_id),
+        })
+        if len(results) >= n_results:
+            break
+    return results
+
+
+def hybrid_query_many(query_texts, n_results=5, lexical=None, where=None,
+                      collection=PERSONA_COLLECTION, candidates=HYBRID_CANDIDATES):
+    """Vector search fused with a lexical retriever by reciprocal rank fusion,
+    for several texts (the vector side is one batched query_many call).
+    lexical(query_text, k) returns [(id, document, metadata)] best first, using
+    the collection's ids (it is not subject to `where`). Near-identical
+    documents are dropped in favour of the better-ranked one.
+    Returns, per text, [{id, document, metadata, score, distance}] best first;
+    distance is the vector distance, or None for lexical-only matches.
+    """
+    vector = query_many(query_texts, n_results=candidates, where=where, collection=collection)
+    fused = []
+    for i, text in enumerate(query_texts):
+        ranked_lists = [list(zip(vector["ids"][i], vector["documents"][i], vector["metadatas"][i]))]
+        if lexical:
+            ranked_lists.append(lexical(text, candidates))
+        distances = dict(zip(vector["ids"][i], vector["distances"][i]))
+        fused.append(_fuse(ranked_lists, distances, n_results))
+    return fused
 
-def get_count():
-    """Return the number of documents in the collection."""
+
+def hybrid_query(query_text, n_results=5, lexical=None, where=None,
+                 collection=PERSONA_COLLECTION, candidates=HYBRID_CANDIDATES):
+    """hybrid_query_many for a single text."""
+    return hybrid_query_many([query_text], n_results, lexical, where, collection, candidates)[0]
+
+
+def get_metadatas(where=None, collection=PERSONA_COLLECTION):
+    """Metadata of every item matching `where` (no documents or embeddings)."""
+    return get_collection(collection).get_metadatas(where)
+
+
+def get_ids(limit, offset=0, collection=PERSONA_COLLECTION):
+    """One page of item ids (no documents, metadata or embeddings)."""
+    return get_collection(collection).get_ids(limit, offset)
+
+
+def delete_ids(ids, collection=PERSONA_COLLECTION):
+    if ids:
+        _counts.pop(collection, None)
+        get_collection(collection).delete_ids(ids)
+
+
+def delete_where(where, collection=PERSONA_COLLECTION):
+    """Delete every item matching a metadata filter."""
+    _counts.pop(collection, None)
+    get_collection(collection).delete_where(where)
+
+
+def delete_collection(name=PERSONA_COLLECTION):
+    """Delete an entire collection for full rebuild."""
+    with _collections_lock:
+        _collections.pop(name, None)
+        _counts.pop(name, None)
+        if VECTOR_BACKEND == "numpy":
+            from services.numpy_vectors import drop
+            drop(os.path.join(VECTOR_DIR, name))
+            return
+        try:
+            client = _get_client()
+            client.delete_collection(name)
+        except Exception:
+            pass
+
+
+def get_count(collection=PERSONA_COLLECTION):
+    """Return the number of documents in a collection."""
     try:
-        return get_collection().count()
+        return get_collection(collection).count()
     except Exception:
         return 0
+
+
+# ── Warm-up ──
+
+def warm_up(collections=(PERSONA_COLLECTION,)):
+    """Load the embedding model, open each collection and run a dummy query
+    against it, so the first real query doesn't pay for any of it. Progress is
+    reported through readiness(); queries made meanwhile simply do the same
+    lazy initialization themselves.
+    """
+    start = time.monotonic()
+    _warmup.update(state="warming", seconds=None, collections=[])
+    try:
+        embed(["warm-up"], cache=False)
+        for name in collections:
+            query("warm-up", n_results=1, collection=name)
+            _warmup["collections"] = _warmup["collections"] + [name]
+        _warmup["state"] = "ready"
+    except Exception as e:
+        _warmup["state"] = "failed"
+        print(f"Vector store warm-up failed: {e}")
+    _warmup["seconds"] = round(time.monotonic() - start, 2)
+
+
+def start_warmup(collections=(PERSONA_COLLECTION,)):
+    """Run warm_up() on a daemon thread, once per process."""
+    with _warmup_lock:
+        if not VECTOR_WARMUP_ENABLED or _warmup["state"] != "disabled":
+            return
+        _warmup["state"] = "pending"
+    threading.Thread(target=warm_up, args=(list(collections),), name="vector-warmup", daemon=True).start()
+
+
+def readiness():
+    """Warm-up status: state is disabled, pending, warming, ready or failed."""
+    return dict(_warmup)
+
+
+# ── Benchmark ──
+
+def benchmark(count=1000, batch_sizes=(EMBEDDING_BATCH_SIZE,)):
+    """Encode `count` texts at each batch size; returns [{batch_size, seconds, per_second}].
+    Uses stored persona samples when there are enough, synthetic sentences otherwise.
+    """
+    import db
+    texts = [s["content"] for s in db.get_persona_samples(limit=count)]
+    while len(texts) < count:
+        i = len(texts)
+        texts.append(f"Sample sentence {i} about quarterly planning, hiring and customer follow-ups.")
+
+    _get_model()  # exclude load time
+    results = []
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        embed(texts, batch_size=batch_size, cache=False)
+        seconds = time.perf_counter() - start
+        results.append({"batch_size": batch_size, "seconds": seconds, "per_second": count / seconds})
+    return results
+
+
+def _peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _bench_backend(backend, count, queries, dim):
+    """Run in a fresh process: build a `count`-vector collection with random
+    vectors, then time single queries. Import/open time counts as startup.
+    """
+    import random
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix=f"vector-bench-{backend}-")
+    rng = random.Random(0)
+
+    def vector():
+        return [rng.gauss(0, 1) for _ in range(dim)]
+
+    try:
+        start = time.perf_counter()
+        if backend == "numpy":
+            from services.numpy_vectors import NumpyCollection
+            coll = NumpyCollection(directory)
+        else:
+            import chromadb
+            coll = ChromaCollection("bench", client=chromadb.PersistentClient(path=directory))
+        startup = time.perf_counter() - start
+
+        insert = 0.0
+        for i in range(0, count, VECTOR_ADD_BATCH):
+            n = min(VECTOR_ADD_BATCH, count - i)
+            ids = [f"v{i + j}" for j in range(n)]
+            vectors = [vector() for _ in range(n)]
+            metadatas = [{"bucket": (i + j) % 10} for j in range(n)]
+            start = time.perf_counter()
+            coll.add(ids, ids, vectors, metadatas)
+            insert += time.perf_counter() - start
+
+        latencies = []
+        for q in range(queries):
+            where = {"bucket": q % 10} if q % 2 else None
+            embedding = vector()
+            start = time.perf_counter()
+            coll.query(embedding, n_results=10, where=where)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        return {
+            "backend": backend,
+            "startup_s": startup,
+            "insert_s": insert,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def benchmark_backends(count=20000, queries=200, dim=384, backends=("numpy", "chroma")):
+    """Compare backends on random vectors (half the queries use a metadata
+    filter). Each backend runs in its own spawned process so startup time and
+    peak RSS are not shared. Returns one result dict per backend.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = []
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            try:
+                results.append(pool.submit(_bench_backend, backend, count, queries, dim).result())
+            except ImportError as e:
+                print(f"Skipping {backend}: {e}")
+    return results
+
+
+def _bench_quantization(directory, quantization, rerank, queries_path, truth, k):
+    """Run in a fresh process: query an existing collection and measure recall@k
+    against exact float32 results. Peak RSS shows what the scan keeps resident.
+    """
+    import numpy as np
+    from services.numpy_vectors import NumpyCollection
+
+    coll = NumpyCollection(directory, quantization=quantization, rerank=rerank)
+    hits, latencies = 0, []
+    for embedding, expected in zip(np.load(queries_path), truth):
+        start = time.perf_counter()
+        found = coll.query(embedding, n_results=k)["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found) & set(expected))
+    latencies.sort()
+    return {
+        "recall": hits / (k * len(truth)),
+        "p50_ms": latencies[len(latencies) // 2],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def benchmark_quantization(count=100000, queries=200, dim=384, k=10, rerank_factors=(1, 4, 10)):
+    """Recall@k vs memory for int8 storage on a synthetic clustered corpus
+    (numpy backend). Each configuration queries the same collection from its
+    own spawned process. Returns one result dict per configuration; scan_mb is
+    the size of the arrays every query reads in full.
+    """
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    from services.numpy_vectors import NumpyCollection
+
+    directory = tempfile.mkdtemp(prefix="vector-bench-quant-")
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(1, count // 200), dim)).astype(np.float32)
+
+    def sample(n):
+        return centers[rng.integers(len(centers), size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+
+    try:
+        coll = NumpyCollection(directory, quantization="int8")
+        for i in range(0, count, VECTOR_ADD_BATCH):
+            n = min(VECTOR_ADD_BATCH, count - i)
+            ids = [f"v{i + j}" for j in range(n)]
+            coll.add(ids, ids, sample(n))
+        query_vectors = sample(queries)
+        queries_path = os.path.join(directory, "queries.npy")
+        np.save(queries_path, query_vectors)
+        truth = NumpyCollection(directory).query_many(query_vectors, n_results=k)["ids"]
+
+        configs = [("none", 1)] + [("int8", r) for r in rerank_factors]
+        results = []
+        for quantization, rerank in configs:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(
+                    _bench_quantization, directory, quantization, rerank, queries_path, truth, k
+                ).result()
+            scan_bytes = count * dim * 4 if quantization == "none" else count * (dim + 4)
+            result.update(quantization=quantization, rerank=rerank, scan_mb=scan_bytes / 1024 ** 2)
+            results.append(result)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput, vector backends or int8 storage.")
+    parser.add_argument("--bench", type=int, default=1000, help="Number of texts to embed")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[EMBEDDING_BATCH_SIZE])
+    parser.add_argument("--bench-backends", type=int, default=0, metavar="N",
+                        help="Compare vector backends on N random vectors instead")
+    parser.add_argument("--bench-quantization", type=int, default=0, metavar="N",
+                        help="Measure int8 recall@10 vs memory on N synthetic vectors instead")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.bench_quantization:
+        print(f"{'storage':8} {'rerank':>6} {'recall@10':>10} {'scan':>8} {'p50':>8} {'peak RSS':>9}")
+        for r in benchmark_quantization(args.bench_quantization, args.queries):
+            print(f"{r['quantization']:8} {r['rerank']:>6} {r['recall']:>10.3f} {r['scan_mb']:>6.0f}MB "
+                  f"{r['p50_ms']:>6.1f}ms {r['peak_rss_mb']:>7.0f}MB")
+        return
+
+    if args.bench_backends:
+        print(f"{'backend':8} {'startup':>8} {'insert':>8} {'p50':>8} {'p95':>8} {'peak RSS':>9}")
+        for r in benchmark_backends(args.bench_backends, args.queries):
+            print(f"{r['backend']:8} {r['startup_s']:>7.2f}s {r['insert_s']:>7.1f}s "
+                  f"{r['p50_ms']:>6.1f}ms {r['p95_ms']:>6.1f}ms {r['peak_rss_mb']:>7.0f}MB")
+        return
+
+    import db
+    db.init_db()
+    print(f"model={EMBEDDING_MODEL} backend={EMBEDDING_BACKEND} device={EMBEDDING_DEVICE} "
+          f"threads={EMBEDDING_THREADS or 'default'} pool_min={EMBEDDING_POOL_MIN}")
+    print(f"{'batch':>6} {'seconds':>8} {'emb/s':>8}")
+    for r in benchmark(args.bench, args.batch_sizes):
+        print(f"{r['batch_size']:>6} {r['seconds']:>8.2f} {r['per_second']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()